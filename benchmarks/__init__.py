@@ -0,0 +1 @@
+"""Performance benchmarks for OpenWRT SSH MCP Server (run against the router emulator)."""
@@ -0,0 +1,172 @@
+"""
+Server startup benchmark: import time and time to first MCP responses.
+
+Each run starts a fresh interpreter, so nothing is cached in memory:
+    - import: time to import ``openwrt_ssh_mcp.server``
+    - initialize / list_tools / first_call: time from spawning the server
+      over stdio until it answers ``initialize``, ``list_tools`` and a first
+      tool call that needs the router
+
+The server talks to the in-process router emulator with an SSH handshake
+delay (``--handshake-latency``) mimicking a slow router CPU, so the cost of
+connecting shows in first_call but should not in initialize or list_tools.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --handshake-latency 2 --json startup.json
+    python -m benchmarks.bench_startup --baseline startup.json --max-regression 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Any
+
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+
+from .emulator import EmulatorConfig, RouterEmulator
+from .stats import format_table, percentile
+
+METRICS = ("import", "initialize", "list_tools", "first_call")
+
+# Tool called once the server is up; it needs the router
+FIRST_TOOL = "openwrt_get_system_info"
+
+IMPORT_SCRIPT = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import openwrt_ssh_mcp.server\n"
+    "print(time.perf_counter() - start, 'asyncssh' in sys.modules)\n"
+)
+
+
+def server_env(host: str, port: int) -> dict[str, str]:
+    """Environment pointing a server process at the emulator."""
+    env = dict(os.environ)
+    env.update({
+        "OPENWRT_HOST": host,
+        "OPENWRT_PORT": str(port),
+        "OPENWRT_PASSWORD": "emulator",
+        "OPENWRT_KEY_FILE": "",
+        "ENABLE_AUDIT_LOGGING": "false",
+        "LOG_FILE": os.devnull,
+    })
+    return env
+
+
+def measure_import(env: dict[str, str]) -> tuple[float, bool]:
+    """Import the server in a fresh interpreter; returns (seconds, asyncssh imported)."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT], env=env, capture_output=True, text=True,
+        check=True,
+    ).stdout.split()
+    return float(output[0]), output[1] == "True"
+
+
+async def measure_startup(env: dict[str, str]) -> dict[str, float]:
+    """Spawn the server and time its first responses."""
+    params = StdioServerParameters(
+        command=sys.executable, args=["-m", "openwrt_ssh_mcp.server"], env=env
+    )
+    timings = {}
+    with open(os.devnull, "w", encoding="utf-8") as errlog:
+        start = time.perf_counter()
+        async with stdio_client(params, errlog=errlog) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                timings["initialize"] = time.perf_counter() - start
+                await session.list_tools()
+                timings["list_tools"] = time.perf_counter() - start
+                result = await session.call_tool(FIRST_TOOL, {"compact": True})
+                timings["first_call"] = time.perf_counter() - start
+                if result.isError or json.loads(result.content[0].text).get("success") is False:
+                    raise RuntimeError(f"{FIRST_TOOL} failed: {result.content[0].text}")
+    return timings
+
+
+async def run(args: argparse.Namespace) -> list[dict[str, Any]]:
+    """Run the benchmark; returns one row per metric."""
+    samples: dict[str, list[float]] = {metric: [] for metric in METRICS}
+    asyncssh_imported = False
+    config = EmulatorConfig(handshake_latency=args.handshake_latency)
+    async with RouterEmulator(config) as router:
+        env = server_env(router.host, router.port)
+        for _ in range(args.runs):
+            seconds, imported = await asyncio.to_thread(measure_import, env)
+            samples["import"].append(seconds)
+            asyncssh_imported |= imported
+            for metric, value in (await measure_startup(env)).items():
+                samples[metric].append(value)
+
+    if asyncssh_imported:
+        logging.getLogger(__name__).warning("Importing the server imported asyncssh")
+    rows = []
+    for metric in METRICS:
+        values = sorted(samples[metric])
+        rows.append({
+            "metric": metric,
+            "runs": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1),
+        })
+    return rows
+
+
+def compare(rows: list[dict], baseline_path: str, max_regression: float) -> list[str]:
+    """Return descriptions of p50 regressions beyond ``max_regression``."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {row["metric"]: row for row in json.load(f)["results"]}
+
+    regressions = []
+    for row in rows:
+        base = baseline.get(row["metric"])
+        if not base or not base["p50_ms"]:
+            continue
+        ratio = row["p50_ms"] / base["p50_ms"]
+        if ratio > 1 + max_regression:
+            regressions.append(
+                f"{row['metric']}: p50 {base['p50_ms']}ms -> {row['p50_ms']}ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="Server starts to measure")
+    parser.add_argument("--handshake-latency", type=float, default=1.0,
+                        help="Emulated SSH handshake delay in seconds")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare p50 times against this JSON file")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed p50 increase over the baseline (default: 0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    rows = asyncio.run(run(args))
+    print(format_table(rows, ["metric", "runs", "p50_ms", "p95_ms", "max_ms"]))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(rows, args.baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
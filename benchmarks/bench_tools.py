@@ -0,0 +1,195 @@
+"""
+Per-tool latency and throughput benchmark against the local router emulator.
+
+Runs each tool through the same dispatch path as ``call_tool`` (validation,
+shaping, pagination and JSON serialization) at several concurrency levels and
+reports p50/p95/p99 latency and throughput. Results can be saved as JSON and
+compared against a baseline to fail CI on regressions.
+
+Usage:
+    python -m benchmarks.bench_tools
+    python -m benchmarks.bench_tools --concurrency 1,8,32 --latency 0.01 --json bench.json
+    python -m benchmarks.bench_tools --baseline bench.json --max-regression 0.25
+    python -m benchmarks.bench_tools --record fleet.jsonl.gz     # capture emulator output
+    python -m benchmarks.bench_tools --cassette fleet.jsonl.gz   # replay offline
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import Any
+
+from openwrt_ssh_mcp.config import settings
+
+from .emulator import EmulatorConfig, RouterEmulator
+from .stats import format_table, summarize
+
+# Tool invocations benchmarked by default
+DEFAULT_TOOLS: dict[str, dict[str, Any]] = {
+    "openwrt_test_connection": {},
+    "openwrt_get_system_info": {},
+    "openwrt_get_wifi_status": {},
+    "openwrt_list_dhcp_leases": {},
+    "openwrt_get_firewall_rules": {},
+    "openwrt_read_config": {"config_name": "network"},
+    "openwrt_thread_get_state": {},
+    "openwrt_thread_get_info": {},
+    "openwrt_opkg_list_installed": {},
+    "openwrt_opkg_list_available": {},
+}
+
+
+def point_settings_at(router: RouterEmulator) -> None:
+    """Configure the server to talk to the emulator."""
+    settings.openwrt_host = router.host
+    settings.openwrt_port = router.port
+    settings.openwrt_password = "emulator"
+    settings.openwrt_key_file = None
+    settings.enable_audit_logging = False
+
+
+async def bench_tool(tool: str, arguments: dict, concurrency: int, iterations: int) -> dict:
+    """Run ``iterations`` calls of one tool with ``concurrency`` concurrent callers."""
+    from openwrt_ssh_mcp.server import dispatch_tool
+    from openwrt_ssh_mcp.shaping import serialize
+
+    latencies: list[float] = []
+    errors = 0
+    remaining = iterations
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                result = await dispatch_tool(tool, dict(arguments))
+                serialize(result)
+                if not result.get("success", True):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - wall_start
+
+    return {"tool": tool, "concurrency": concurrency, "errors": errors,
+            **summarize(latencies, wall_time)}
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    """Start the emulator (or load a cassette), connect and benchmark every selected tool."""
+    tools = {name: DEFAULT_TOOLS[name] for name in args.tools} if args.tools else DEFAULT_TOOLS
+
+    async with AsyncExitStack() as stack:
+        if args.cassette:
+            settings.ssh_replay_cassette = args.cassette
+            settings.ssh_replay_timing = args.timing
+        else:
+            config = EmulatorConfig(
+                latency=args.latency,
+                latency_jitter=args.jitter,
+                bandwidth=args.bandwidth or None,
+                opkg_available=args.opkg_available,
+                dhcp_leases=args.dhcp_leases,
+            )
+            point_settings_at(await stack.enter_async_context(RouterEmulator(config)))
+            settings.ssh_record_cassette = args.record
+        settings.ssh_max_concurrent_commands = args.max_concurrent_commands
+
+        # Imported after the settings are final: the client reads them at creation
+        from openwrt_ssh_mcp.ssh_client import ssh_client
+
+        if not await ssh_client.connect():
+            raise RuntimeError("Could not connect to the router")
+
+        rows = []
+        try:
+            for concurrency in args.concurrency:
+                for tool, arguments in tools.items():
+                    # Warm up (connection, caches, imports)
+                    await bench_tool(tool, arguments, 1, 2)
+                    rows.append(await bench_tool(tool, arguments, concurrency, args.iterations))
+        finally:
+            await ssh_client.disconnect()
+    return rows
+
+
+def compare(rows: list[dict], baseline_path: str, max_regression: float) -> list[str]:
+    """Return descriptions of p95 regressions beyond ``max_regression``."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(row["tool"], row["concurrency"]): row for row in json.load(f)["results"]}
+
+    regressions = []
+    for row in rows:
+        base = baseline.get((row["tool"], row["concurrency"]))
+        if not base or not base["p95_ms"]:
+            continue
+        ratio = row["p95_ms"] / base["p95_ms"]
+        if ratio > 1 + max_regression:
+            regressions.append(
+                f"{row['tool']} @ concurrency {row['concurrency']}: "
+                f"p95 {base['p95_ms']}ms -> {row['p95_ms']}ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", default="1,4,16",
+                        type=lambda v: [int(x) for x in v.split(",")],
+                        help="Comma-separated concurrency levels (default: 1,4,16)")
+    parser.add_argument("--iterations", type=int, default=50, help="Calls per tool and level")
+    parser.add_argument("--tools", nargs="*", choices=sorted(DEFAULT_TOOLS),
+                        help="Subset of tools to benchmark")
+    parser.add_argument("--latency", type=float, default=0.002,
+                        help="Emulated per-command latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Emulated latency jitter in seconds")
+    parser.add_argument("--bandwidth", type=int, default=0,
+                        help="Emulated output bandwidth in bytes/s (0 = unlimited)")
+    parser.add_argument("--opkg-available", type=int, default=5000,
+                        help="Packages in the emulated 'opkg list'")
+    parser.add_argument("--dhcp-leases", type=int, default=50, help="Emulated DHCP leases")
+    parser.add_argument("--max-concurrent-commands", type=int,
+                        default=settings.ssh_max_concurrent_commands,
+                        help="SSH_MAX_CONCURRENT_COMMANDS for the run")
+    parser.add_argument("--record", help="Record the emulator session to this cassette file")
+    parser.add_argument("--cassette", help="Replay this cassette instead of using the emulator")
+    parser.add_argument("--timing", default="none",
+                        help="Cassette replay timing: none, original or a scale factor")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare p95 latency against this JSON file")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed p95 increase over the baseline (default: 0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    rows = asyncio.run(run(args))
+    print(format_table(rows, ["tool", "concurrency", "count", "errors", "p50_ms", "p95_ms",
+                              "p99_ms", "max_ms", "throughput"]))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(rows, args.baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
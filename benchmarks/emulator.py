@@ -0,0 +1,458 @@
+"""Local SSH server emulating an OpenWRT router, for tests and benchmarks."""
+
+import asyncio
+import json
+import logging
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+import asyncssh
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmulatorConfig:
+    """Shape and performance of the emulated router."""
+
+    # Dataset sizes
+    opkg_available: int = 3000
+    opkg_installed: int = 150
+    dhcp_leases: int = 25
+    thread_neighbors: int = 4
+    seed: int = 1
+
+    # Injected latency (seconds) before each command produces output
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Extra latency per command prefix, e.g. {"opkg update": 2.0}
+    command_latency: dict[str, float] = field(default_factory=dict)
+    # Delay before a new connection is accepted (slow key exchange on weak CPUs)
+    handshake_latency: float = 0.0
+
+    # Output bandwidth limit in bytes per second (None = unlimited)
+    bandwidth: Optional[int] = None
+    chunk_size: int = 16 * 1024
+
+
+class _EmulatorServer(asyncssh.SSHServer):
+    """Accepts any client without authentication."""
+
+    def __init__(self, emulator: "RouterEmulator"):
+        self.emulator = emulator
+
+    def connection_made(self, conn: asyncssh.SSHServerConnection) -> None:
+        self.emulator.connections += 1
+        self.emulator._open_connections.add(conn)
+        self._conn = conn
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.emulator._open_connections.discard(self._conn)
+
+    async def begin_auth(self, username: str) -> bool:
+        if self.emulator.config.handshake_latency:
+            await asyncio.sleep(self.emulator.config.handshake_latency)
+        return False
+
+
+class RouterEmulator:
+    """
+    asyncssh-based stand-in for an OpenWRT router.
+
+    Answers the commands used by OpenWRTTools with realistic output
+    (ubus JSON, ot-ctl tables, opkg lists, DHCP lease files) of configurable
+    size, with optional latency and bandwidth limits.
+
+    Usage:
+        async with RouterEmulator(EmulatorConfig(latency=0.01)) as router:
+            settings.openwrt_port = router.port
+    """
+
+    def __init__(self, config: Optional[EmulatorConfig] = None):
+        """Initialize the emulator (call start() or use as async context manager)."""
+        self.config = config or EmulatorConfig()
+        self.host = "127.0.0.1"
+        self.port = 0
+        self.commands: Counter[str] = Counter()
+        self.connections = 0
+        # Commands that ended because the client signalled or closed the channel
+        self.terminated: Counter[str] = Counter()
+        self._open_connections: set[asyncssh.SSHServerConnection] = set()
+        self._random = random.Random(self.config.seed)
+        self._acceptor: Optional[asyncssh.SSHAcceptor] = None
+        self._packages = self._generate_packages(self.config.opkg_available)
+        self._installed = set(name for name, _, _ in self._packages[:self.config.opkg_installed])
+        self._thread_state = "leader"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> "RouterEmulator":
+        """Start listening; ``port=0`` picks a free port (see ``self.port``)."""
+        host_key = asyncssh.generate_private_key("ssh-ed25519")
+        self._acceptor = await asyncssh.listen(
+            host,
+            port,
+            server_host_keys=[host_key],
+            server_factory=lambda: _EmulatorServer(self),
+            process_factory=self._handle,
+            encoding=None,
+        )
+        self.host = host
+        self.port = self._acceptor.get_port()
+        logger.info(f"Router emulator listening on {self.host}:{self.port}")
+        return self
+
+    async def stop(self) -> None:
+        """Stop listening and close client connections."""
+        if self._acceptor:
+            self._acceptor.close()
+            await self._acceptor.wait_closed()
+            self._acceptor = None
+
+    def drop_connections(self) -> None:
+        """Close every client connection from the router side (keeps listening)."""
+        for conn in list(self._open_connections):
+            conn.close()
+
+    async def __aenter__(self) -> "RouterEmulator":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    # ========== Session handling ==========
+
+    async def _handle(self, process: asyncssh.SSHServerProcess) -> None:
+        """Serve a single exec request."""
+        command = (process.command or "").strip()
+        self.commands[command] += 1
+
+        try:
+            delay = self._latency_for(command)
+            if delay > 0:
+                await self._run_for(process, delay)
+
+            stdout, stderr, exit_status = self.respond(command)
+            await self._write(process, stdout)
+            if stderr:
+                process.stderr.write(stderr.encode())
+            process.exit(exit_status)
+        except (asyncssh.BreakReceived, asyncssh.SignalReceived, asyncssh.TerminalSizeChanged):
+            self.terminated[command] += 1
+            process.exit(130)
+        except (BrokenPipeError, ConnectionError, asyncssh.Error):
+            self.terminated[command] += 1
+            process.close()
+
+    @staticmethod
+    async def _run_for(process: asyncssh.SSHServerProcess, delay: float) -> None:
+        """Keep a command busy for ``delay`` seconds unless the client stops it."""
+        try:
+            # Signals from the client are raised by reads; EOF means it hung up
+            await asyncio.wait_for(process.stdin.read(), delay)
+        except asyncio.TimeoutError:
+            return
+        raise BrokenPipeError("Client closed the channel")
+
+    def _latency_for(self, command: str) -> float:
+        delay = self.config.latency
+        if self.config.latency_jitter:
+            delay += self._random.uniform(0, self.config.latency_jitter)
+        for prefix, extra in self.config.command_latency.items():
+            if command.startswith(prefix):
+                delay += extra
+        return delay
+
+    async def _write(self, process: asyncssh.SSHServerProcess, output: str) -> None:
+        """Write output, throttled to the configured bandwidth."""
+        data = output.encode()
+        if not self.config.bandwidth:
+            process.stdout.write(data)
+            return
+
+        size = self.config.chunk_size
+        for offset in range(0, len(data), size):
+            chunk = data[offset:offset + size]
+            process.stdout.write(chunk)
+            await process.stdout.drain()
+            await asyncio.sleep(len(chunk) / self.config.bandwidth)
+
+    # ========== Command responses ==========
+
+    def respond(self, command: str) -> tuple[str, str, int]:
+        """
+        Produce (stdout, stderr, exit_status) for a command.
+
+        Unknown commands behave like a missing binary on BusyBox.
+        """
+        command = re.sub(r"^/usr/sbin/", "", command)
+
+        if command.startswith("echo "):
+            return command[5:].strip("'\"") + "\n", "", 0
+        if command == "ubus call system board":
+            return self._json(self._board()), "", 0
+        if command == "ubus call system info":
+            return self._json(self._system_info()), "", 0
+        if command == "ubus call network.wireless status":
+            return self._json(self._wireless_status()), "", 0
+        if re.match(r"^ubus call network\.interface\.\w+ \w+$", command):
+            return "", "", 0
+        if command == "cat /proc/uptime":
+            return "86400.52 170000.10\n", "", 0
+        if command == "cat /proc/loadavg":
+            return "0.08 0.12 0.10 1/92 4321\n", "", 0
+        if command == "cat /proc/meminfo":
+            return (
+                "MemTotal:         502648 kB\nMemFree:          312488 kB\n"
+                "MemAvailable:     350120 kB\nBuffers:            4212 kB\n"
+                "Cached:            41876 kB\n"
+            ), "", 0
+        if command == "cat /proc/net/dev":
+            return self._net_dev(), "", 0
+        if command == "cat /tmp/dhcp.leases":
+            return self._dhcp_leases(), "", 0
+        if command.startswith("cat "):
+            path = command[4:]
+            return "", f"cat: can't open '{path}': No such file or directory\n", 1
+        if command.startswith("iptables "):
+            return self._iptables(), "", 0
+        if command.startswith("uci show "):
+            return self._uci(command[9:]), "", 0
+        if command.startswith("ot-ctl "):
+            return self._ot_ctl(command[7:])
+        if command.startswith("opkg "):
+            return self._opkg(command[5:])
+
+        binary = command.split(" ", 1)[0] if command else ""
+        return "", f"sh: {binary}: not found\n", 127
+
+    def _net_dev(self) -> str:
+        # Counters grow with every read so that rates can be computed
+        reads = self.commands["cat /proc/net/dev"]
+        lines = [
+            "Inter-|   Receive                                                |  Transmit",
+            " face |bytes    packets errs drop fifo frame compressed multicast|"
+            "bytes    packets errs drop fifo colls carrier compressed",
+        ]
+        for index, name in enumerate(("lo", "br-lan", "eth0", "wlan0")):
+            rx = (index + 1) * 1_000_000 + reads * (index + 1) * 15_000
+            tx = (index + 1) * 800_000 + reads * (index + 1) * 9_000
+            lines.append(
+                f"{name:>6}: {rx} {rx // 500} 0 0 0 0 0 0 {tx} {tx // 500} 0 0 0 0 0 0"
+            )
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _json(data: dict) -> str:
+        return json.dumps(data, indent="\t") + "\n"
+
+    @staticmethod
+    def _board() -> dict:
+        return {
+            "kernel": "5.15.137",
+            "hostname": "OpenWrt",
+            "system": "ARMv8 Processor rev 4",
+            "model": "Emulated OpenWRT Router",
+            "board_name": "emulator,openwrt",
+            "rootfs_type": "squashfs",
+            "release": {
+                "distribution": "OpenWrt",
+                "version": "23.05.2",
+                "revision": "r23630-842932a63d",
+                "target": "mediatek/filogic",
+                "description": "OpenWrt 23.05.2 r23630-842932a63d",
+            },
+        }
+
+    @staticmethod
+    def _system_info() -> dict:
+        return {
+            "localtime": 1700000000,
+            "uptime": 86400,
+            "load": [5242, 7864, 6553],
+            "memory": {
+                "total": 514711552,
+                "free": 319987712,
+                "shared": 1150976,
+                "buffered": 0,
+                "available": 351383552,
+                "cached": 42033152,
+            },
+            "root": {"total": 81920, "free": 78480, "used": 3440, "avail": 78480},
+            "tmp": {"total": 251324, "free": 250892, "used": 432, "avail": 250892},
+            "swap": {"total": 0, "free": 0},
+        }
+
+    def _wireless_status(self) -> dict:
+        status = {}
+        for index, band in enumerate(("2g", "5g")):
+            status[f"radio{index}"] = {
+                "up": True,
+                "pending": False,
+                "autostart": True,
+                "disabled": False,
+                "retry_setup_failed": False,
+                "config": {"band": band, "channel": "auto", "htmode": "HE80"},
+                "interfaces": [
+                    {
+                        "section": f"default_radio{index}",
+                        "ifname": f"phy{index}-ap0",
+                        "config": {
+                            "mode": "ap",
+                            "ssid": "OpenWrt",
+                            "encryption": "sae-mixed",
+                            "network": ["lan"],
+                        },
+                    }
+                ],
+            }
+        return status
+
+    def _dhcp_leases(self) -> str:
+        lines = []
+        for index in range(self.config.dhcp_leases):
+            mac = "02:00:00:%02x:%02x:%02x" % (index >> 16 & 0xFF, index >> 8 & 0xFF, index & 0xFF)
+            ip = f"192.168.{1 + index // 250}.{10 + index % 250}"
+            lines.append(f"{1700000000 + index} {mac} {ip} host-{index} 01:{mac}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def _iptables(self) -> str:
+        lines = []
+        for chain in ("INPUT", "FORWARD", "OUTPUT"):
+            lines.append(f"Chain {chain} (policy ACCEPT 0 packets, 0 bytes)")
+            lines.append(" pkts bytes target     prot opt in     out     source               destination")
+            for rule in range(20):
+                lines.append(
+                    f" {rule * 13:>4} {rule * 977:>5} ACCEPT     all  --  *      *       "
+                    f"0.0.0.0/0            0.0.0.0/0            /* rule-{rule} */"
+                )
+            lines.append("")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _uci(config: str) -> str:
+        sections = {
+            "network": [
+                "network.loopback=interface",
+                "network.loopback.device='lo'",
+                "network.loopback.proto='static'",
+                "network.lan=interface",
+                "network.lan.device='br-lan'",
+                "network.lan.proto='static'",
+                "network.lan.ipaddr='192.168.1.1'",
+                "network.wan=interface",
+                "network.wan.proto='dhcp'",
+            ],
+            "system": ["system.@system[0]=system", "system.@system[0].hostname='OpenWrt'"],
+        }
+        lines = sections.get(config, [f"{config}.@defaults[0]={config}"])
+        return "\n".join(lines) + "\n"
+
+    def _ot_ctl(self, args: str) -> tuple[str, str, int]:
+        done = "Done\n"
+        if args == "state":
+            return f"{self._thread_state}\n{done}", "", 0
+        if args == "channel":
+            return f"15\n{done}", "", 0
+        if args == "panid":
+            return f"0x1234\n{done}", "", 0
+        if args == "networkname":
+            return f"OpenWRT-Thread\n{done}", "", 0
+        if args == "extpanid":
+            return f"dead00beef00cafe\n{done}", "", 0
+        if args == "networkkey":
+            return f"00112233445566778899aabbccddeeff\n{done}", "", 0
+        if args == "rloc16":
+            return f"0400\n{done}", "", 0
+        if args == "ipaddr":
+            return (
+                "fdde:ad00:beef:0:0:ff:fe00:fc00\n"
+                "fdde:ad00:beef:0:0:ff:fe00:400\n"
+                "fe80:0:0:0:1c2b:3c4d:5e6f:7081\n" + done
+            ), "", 0
+        if args == "leaderdata":
+            return (
+                "Partition ID: 1077744240\nWeighting: 64\nData Version: 109\n"
+                "Stable Data Version: 211\nLeader Router ID: 1\n" + done
+            ), "", 0
+        if args == "neighbor table":
+            rows = [
+                "| Role | RLOC16 | Age | Avg RSSI | Last RSSI |R|D|N| Extended MAC     |",
+                "+------+--------+-----+----------+-----------+-+-+-+------------------+",
+            ]
+            for index in range(self.config.thread_neighbors):
+                rows.append(
+                    f"|   C  | 0x{0x401 + index:04x} |  {index + 1:>2} |      -42 |       -41 "
+                    f"|1|1|1| {0x1ed687a9cb9d4000 + index:016x} |"
+                )
+            return "\n".join(rows) + "\n" + done, "", 0
+        if args == "child table":
+            return (
+                "| ID  | RLOC16 | Timeout    | Age        | LQ In | C_VN |R|D|N|Ver|CSL|QMsgCnt|\n"
+                + done
+            ), "", 0
+        if args.startswith("dataset active"):
+            if args.endswith("-x"):
+                return f"0e080000000000010000000300000f35060004001fffe0{done}", "", 0
+            return (
+                "Active Timestamp: 1\nChannel: 15\nNetwork Name: OpenWRT-Thread\nPAN ID: 0x1234\n"
+                + done
+            ), "", 0
+        if args == "thread start":
+            self._thread_state = "leader"
+            return done, "", 0
+        if args == "thread stop":
+            self._thread_state = "disabled"
+            return done, "", 0
+        # Setters and other actions
+        return done, "", 0
+
+    def _opkg(self, args: str) -> tuple[str, str, int]:
+        if args == "list":
+            lines = [f"{name} - {version} - {desc}" for name, version, desc in self._packages]
+            return "\n".join(lines) + "\n", "", 0
+        if args == "list-installed":
+            lines = [
+                f"{name} - {version}"
+                for name, version, _ in self._packages
+                if name in self._installed
+            ]
+            return "\n".join(lines) + "\n", "", 0
+        if args == "update":
+            return (
+                "Downloading https://downloads.openwrt.org/releases/23.05.2/packages/"
+                "aarch64_cortex-a53/base/Packages.gz\nUpdated list of available packages in "
+                "/var/opkg-lists/openwrt_base\n"
+            ), "", 0
+
+        verb, _, name = args.partition(" ")
+        known = {pkg[0]: pkg for pkg in self._packages}
+        if name not in known:
+            return "", f"Unknown package '{name}'.\n", 255
+        if verb == "info":
+            _, version, desc = known[name]
+            status = "install ok installed" if name in self._installed else "unknown ok not-installed"
+            return (
+                f"Package: {name}\nVersion: {version}\nDepends: libc\nStatus: {status}\n"
+                f"Section: utils\nArchitecture: aarch64_cortex-a53\nSize: 12345\n"
+                f"Description: {desc}\n"
+            ), "", 0
+        if verb == "install":
+            self._installed.add(name)
+            return f"Installing {name} ({known[name][1]}) to root...\nConfiguring {name}.\n", "", 0
+        if verb == "remove":
+            self._installed.discard(name)
+            return f"Removing package {name} from root...\n", "", 0
+        return "", f"opkg: unknown sub-command {verb}\n", 1
+
+    def _generate_packages(self, count: int) -> list[tuple[str, str, str]]:
+        words = ["luci", "kmod", "lib", "ot-br", "wpad", "iptables", "usb", "net", "proto", "app"]
+        packages = []
+        for index in range(count):
+            word = words[index % len(words)]
+            version = f"{self._random.randint(0, 9)}.{self._random.randint(0, 30)}-{index % 7 + 1}"
+            packages.append(
+                (f"{word}-pkg{index:05d}", version, f"Emulated {word} package number {index}")
+            )
+        return packages
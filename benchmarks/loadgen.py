@@ -0,0 +1,303 @@
+"""
+Concurrent MCP client load generator.
+
+Starts the MCP server as a subprocess and drives it over the real MCP stdio
+protocol with N concurrent simulated clients sharing one session, using a
+configurable weighted tool mix. By default the server talks to an in-process
+router emulator, so deployments can be sized without touching real hardware.
+
+Recorded:
+    - per-tool latency histograms and p50/p95/p99
+    - error rate (transport errors and tool results with success=false)
+    - event-loop lag of the load generator itself (to spot a saturated client)
+    - server responsiveness: round trip of a tool that does not touch the router
+    - server RSS over time (Linux, read from /proc)
+
+Usage:
+    python -m benchmarks.loadgen --clients 16 --duration 30
+    python -m benchmarks.loadgen --mix openwrt_get_system_info=5,openwrt_opkg_list_available=1
+    python -m benchmarks.loadgen --router 192.168.1.1:22 --clients 4   # real router
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional
+
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+
+from .emulator import EmulatorConfig, RouterEmulator
+from .stats import format_table, percentile, summarize
+
+DEFAULT_MIX = {
+    "openwrt_get_system_info": 4,
+    "openwrt_thread_get_state": 4,
+    "openwrt_list_dhcp_leases": 3,
+    "openwrt_get_wifi_status": 3,
+    "openwrt_thread_get_info": 1,
+    "openwrt_opkg_list_installed": 1,
+    "openwrt_opkg_list_available": 1,
+}
+
+# Latency histogram bucket upper bounds in milliseconds
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+# Probe used to measure server responsiveness without touching the router
+PROBE_TOOL = ("openwrt_fetch_result", {"cursor": "loadgen-probe:0", "compact": True})
+
+
+class LoadStats:
+    """Latency, error and resource samples collected during a run."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.timeline: list[dict[str, Any]] = []
+        self._window_latencies: list[float] = []
+        self._window_errors = 0
+        self._window_lag: list[float] = []
+        self._window_probe: list[float] = []
+
+    def record(self, tool: str, latency: float, ok: bool) -> None:
+        self.latencies[tool].append(latency)
+        self._window_latencies.append(latency)
+        if not ok:
+            self.errors[tool] += 1
+            self._window_errors += 1
+
+    def record_lag(self, lag: float) -> None:
+        self._window_lag.append(lag)
+
+    def record_probe(self, latency: float) -> None:
+        self._window_probe.append(latency)
+
+    def close_window(self, rss_bytes: Optional[int]) -> None:
+        values = sorted(self._window_latencies)
+        self.timeline.append({
+            "t": round(time.perf_counter() - self.start, 1),
+            "calls": len(values),
+            "errors": self._window_errors,
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "loop_lag_max_ms": round(max(self._window_lag, default=0.0) * 1000, 2),
+            "probe_ms": round(max(self._window_probe, default=0.0) * 1000, 2),
+            "server_rss_mb": round(rss_bytes / 2**20, 1) if rss_bytes else None,
+        })
+        self._window_latencies, self._window_errors = [], 0
+        self._window_lag, self._window_probe = [], []
+
+
+def histogram(latencies: list[float]) -> dict[str, int]:
+    """Bucket latencies (seconds) into HISTOGRAM_BUCKETS_MS."""
+    counts = {f"<={bound}ms": 0 for bound in HISTOGRAM_BUCKETS_MS}
+    counts[f">{HISTOGRAM_BUCKETS_MS[-1]}ms"] = 0
+    for latency in latencies:
+        ms = latency * 1000
+        for bound in HISTOGRAM_BUCKETS_MS:
+            if ms <= bound:
+                counts[f"<={bound}ms"] += 1
+                break
+        else:
+            counts[f">{HISTOGRAM_BUCKETS_MS[-1]}ms"] += 1
+    return counts
+
+
+def find_server_pid() -> Optional[int]:
+    """Find the MCP server subprocess among our children (Linux /proc)."""
+    me = os.getpid()
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+            cmdline = (entry / "cmdline").read_bytes()
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == me and b"openwrt_ssh_mcp.server" in cmdline:
+            return int(entry.name)
+    return None
+
+
+def read_rss(pid: Optional[int]) -> Optional[int]:
+    """Resident set size of a process in bytes (Linux), or None."""
+    if pid is None:
+        return None
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def is_error(result: Any) -> bool:
+    """Whether an MCP tool result reports a failure."""
+    if result.isError:
+        return True
+    try:
+        payload = json.loads(result.content[0].text)
+    except (ValueError, IndexError, AttributeError):
+        return True
+    return isinstance(payload, dict) and payload.get("success") is False
+
+
+async def client_loop(
+    session: ClientSession,
+    mix: dict[str, int],
+    stats: LoadStats,
+    deadline: float,
+    think_time: float,
+    rng: random.Random,
+) -> None:
+    """One simulated client: call tools from the mix until the deadline."""
+    tools, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        tool = rng.choices(tools, weights)[0]
+        start = time.perf_counter()
+        try:
+            result = await session.call_tool(tool, {"compact": True})
+            ok = not is_error(result)
+        except Exception as e:
+            logging.getLogger(__name__).debug(f"{tool} failed: {e}")
+            ok = False
+        stats.record(tool, time.perf_counter() - start, ok)
+        if think_time:
+            await asyncio.sleep(rng.uniform(0, 2 * think_time))
+
+
+async def monitor(session: ClientSession, stats: LoadStats, deadline: float) -> None:
+    """Sample loop lag every 50 ms; probe the server and RSS every interval."""
+    pid = find_server_pid()
+    tick = 0.05
+    next_window = time.perf_counter() + stats.interval
+    while time.perf_counter() < deadline:
+        expected = time.perf_counter() + tick
+        await asyncio.sleep(tick)
+        stats.record_lag(max(0.0, time.perf_counter() - expected))
+
+        if time.perf_counter() >= next_window:
+            start = time.perf_counter()
+            await session.call_tool(*PROBE_TOOL)
+            stats.record_probe(time.perf_counter() - start)
+            stats.close_window(read_rss(pid))
+            next_window += stats.interval
+
+
+async def run(args: argparse.Namespace) -> LoadStats:
+    """Start the emulator and server, then drive the load."""
+    emulator: Optional[RouterEmulator] = None
+    if args.router:
+        host, _, port = args.router.partition(":")
+        port = port or "22"
+    else:
+        config = EmulatorConfig(latency=args.latency, latency_jitter=args.jitter)
+        emulator = await RouterEmulator(config).start()
+        host, port = emulator.host, str(emulator.port)
+
+    env = dict(os.environ)
+    env.update({"OPENWRT_HOST": host, "OPENWRT_PORT": port, "ENABLE_AUDIT_LOGGING": "false"})
+    if emulator:
+        env.update({"OPENWRT_PASSWORD": "emulator", "OPENWRT_KEY_FILE": ""})
+
+    params = StdioServerParameters(
+        command=sys.executable, args=["-m", "openwrt_ssh_mcp.server"], env=env
+    )
+    errlog = open(args.server_log or os.devnull, "w", encoding="utf-8")
+    stats = LoadStats(args.interval)
+
+    try:
+        async with stdio_client(params, errlog=errlog) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                await session.list_tools()
+
+                rng = random.Random(args.seed)
+                deadline = time.perf_counter() + args.duration
+                stats.start = time.perf_counter()
+                await asyncio.gather(
+                    monitor(session, stats, deadline),
+                    *(
+                        client_loop(session, args.mix, stats, deadline, args.think_time,
+                                    random.Random(rng.random()))
+                        for _ in range(args.clients)
+                    ),
+                )
+    finally:
+        errlog.close()
+        if emulator:
+            await emulator.stop()
+    return stats
+
+
+def report(stats: LoadStats, wall_time: float) -> dict[str, Any]:
+    """Build the per-tool summary."""
+    rows = []
+    for tool, latencies in sorted(stats.latencies.items()):
+        summary = summarize(latencies, wall_time)
+        summary["error_rate"] = round(stats.errors[tool] / max(1, len(latencies)), 4)
+        rows.append({"tool": tool, **summary, "histogram": histogram(latencies)})
+    return {"tools": rows, "timeline": stats.timeline}
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        tool, _, weight = part.partition("=")
+        mix[tool.strip()] = int(weight or 1)
+    return mix
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent simulated clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Run time in seconds")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="Timeline sampling interval in seconds")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Weighted tool mix, e.g. 'openwrt_get_system_info=3,"
+                             "openwrt_list_dhcp_leases=1'")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Mean pause between a client's calls in seconds")
+    parser.add_argument("--router", help="Use a real router host[:port] instead of the emulator")
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="Emulated per-command latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.002,
+                        help="Emulated latency jitter in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the tool mix")
+    parser.add_argument("--server-log", help="Write server stderr to this file")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    stats = asyncio.run(run(args))
+    result = report(stats, time.perf_counter() - stats.start)
+
+    print(format_table(result["tools"], ["tool", "count", "error_rate", "p50_ms", "p95_ms",
+                                         "p99_ms", "max_ms", "throughput"]))
+    print()
+    print(format_table(result["timeline"], ["t", "calls", "errors", "p95_ms", "loop_lag_max_ms",
+                                            "probe_ms", "server_rss_mb"]))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), **result}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""Latency statistics shared by the benchmark scripts."""
+
+import math
+from typing import Iterable
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: Iterable[float], wall_time: float) -> dict[str, float]:
+    """
+    Summarize latencies (seconds) of calls made during ``wall_time`` seconds.
+
+    Returns:
+        dict: count, p50/p95/p99/max in milliseconds and throughput in calls/s
+    """
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round((values[-1] if values else 0.0) * 1000, 3),
+        "throughput": round(len(values) / wall_time, 2) if wall_time > 0 else 0.0,
+    }
+
+
+def format_table(rows: list[dict], columns: list[str]) -> str:
+    """Render rows as a fixed-width text table."""
+    widths = {
+        col: max([len(col)] + [len(str(row.get(col, ""))) for row in rows]) for col in columns
+    }
+    lines = ["  ".join(col.ljust(widths[col]) for col in columns)]
+    lines.append("  ".join("-" * widths[col] for col in columns))
+    for row in rows:
+        lines.append("  ".join(str(row.get(col, "")).ljust(widths[col]) for col in columns))
+    return "\n".join(lines)
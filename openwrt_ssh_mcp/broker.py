@@ -0,0 +1,341 @@
+"""Local daemon sharing one router connection between MCP server processes."""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import sys
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from .config import settings
+from .scheduler import INTERACTIVE, PRIORITY_CLASSES, current_class, priority_class
+from .ssh_client import SSHClient
+from .transport import (
+    CommandResult,
+    DisconnectHandler,
+    Transport,
+    TransportError,
+    create_transport,
+)
+
+logger = logging.getLogger(__name__)
+
+# Largest message (one JSON line) either side accepts; outputs such as
+# `opkg list` run to several MB
+MAX_MESSAGE = 128 * 1024 * 1024
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    return json.dumps(message).encode() + b"\n"
+
+
+class ConnectionBroker:
+    """
+    Owns the router connection and runs commands for local server processes.
+
+    Server processes connect to a Unix socket and send newline-delimited JSON
+    requests tagged with an id: ``hello`` (answered once the router is
+    reachable), ``run`` (a command, answered with its output) and ``cancel``
+    (stops a run the process no longer waits for, unless it is a read shared
+    with other processes). Commands from every process go through one
+    SSHClient, so they share its connection, concurrency limit, read
+    coalescing, learned timeouts and circuit breaker.
+
+    Commands are not validated again: the socket is only accessible to its
+    owner (mode 0600), who could run them with the router credentials anyway.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path, None] = None,
+        client: Optional[SSHClient] = None,
+    ):
+        """
+        Initialize the broker (not listening).
+
+        Args:
+            path: Unix socket to listen on (defaults to settings)
+            client: Client reaching the router (defaults to a new one that
+                connects directly rather than through a broker)
+        """
+        socket = path or settings.ssh_broker_socket
+        if not socket:
+            raise ValueError("SSH_BROKER_SOCKET is not set")
+        self.path = Path(socket)
+        self.client = client or SSHClient(create_transport(use_broker=False))
+        self.sessions = 0
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> "ConnectionBroker":
+        """Listen on the socket and connect to the router."""
+        if self.path.exists():
+            try:
+                _, writer = await asyncio.open_unix_connection(str(self.path))
+            except OSError:
+                # Left behind by a broker that did not shut down cleanly
+                self.path.unlink()
+            else:
+                writer.close()
+                raise RuntimeError(f"A broker is already listening on {self.path}")
+
+        # Create the socket private: it must never be reachable by other users,
+        # not even between bind() and a later chmod()
+        umask = os.umask(0o077)
+        try:
+            self._server = await asyncio.start_unix_server(
+                self._handle, path=str(self.path), limit=MAX_MESSAGE
+            )
+        finally:
+            os.umask(umask)
+        os.chmod(self.path, 0o600)
+        logger.info(f"Connection broker listening on {self.path}")
+        # A router that is down now is retried on the first request
+        await self.client.connect()
+        return self
+
+    async def stop(self) -> None:
+        """Stop listening, drop server processes and close the router connection."""
+        if self._server:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            self.path.unlink(missing_ok=True)
+        await self.client.disconnect()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.sessions += 1
+        self._writers.add(writer)
+        tasks: dict[int, asyncio.Task] = {}
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                if request["op"] == "cancel":
+                    task = tasks.get(request["id"])
+                    if task is not None:
+                        task.cancel()
+                    continue
+                task = asyncio.ensure_future(self._answer(request, writer))
+                tasks[request["id"]] = task
+
+                def forget(_: asyncio.Task, key: int = request["id"]) -> None:
+                    tasks.pop(key, None)
+
+                task.add_done_callback(forget)
+        except (ConnectionError, ValueError, KeyError) as e:
+            logger.warning(f"Dropping server process: {e}")
+        finally:
+            # Nobody is left to read the results
+            for task in list(tasks.values()):
+                task.cancel()
+            self._writers.discard(writer)
+            self.sessions -= 1
+            writer.close()
+
+    async def _answer(self, request: dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        response: dict[str, Any]
+        if request["op"] == "hello":
+            response = {"connected": await self.client.ensure_connected()}
+        elif request["op"] == "run":
+            response = await self._run(request)
+        else:
+            response = {"error": f"Unknown operation: {request['op']}"}
+
+        try:
+            writer.write(_encode({"id": request["id"], **response}))
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _run(self, request: dict[str, Any]) -> dict[str, Any]:
+        self.requests += 1
+        if not await self.client.ensure_connected():
+            return {"error": f"Router unreachable: {self.client.breaker.last_error}"}
+
+        name = request.get("priority")
+        with priority_class(name if name in PRIORITY_CLASSES else INTERACTIVE):
+            result = await self.client.execute(request["command"], request.get("timeout"))
+        return {
+            "stdout": result["stdout"],
+            "stderr": result["stderr"],
+            "exit_status": result["exit_code"],
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        """Connected server processes, requests served and the router connection."""
+        return {
+            "socket": str(self.path),
+            "sessions": self.sessions,
+            "requests": self.requests,
+            "connected": self.client.is_connected,
+            "connects": self.client.connects,
+            "circuit": self.client.breaker.snapshot(),
+        }
+
+
+class BrokerTransport(Transport):
+    """
+    Runs commands through a ConnectionBroker instead of a connection of its own.
+
+    The broker's connection is already open, so connect() costs a local
+    socket round trip instead of an SSH handshake. If no broker is listening,
+    ``fallback`` (normally a direct asyncssh transport) is used instead; the
+    broker is tried again on the next connect(). Connect options only apply
+    to the fallback: the broker uses its own settings.
+    """
+
+    def __init__(self, path: Union[str, Path], fallback: Optional[Transport] = None):
+        """
+        Initialize the transport (not connected).
+
+        Args:
+            path: The broker's Unix socket
+            fallback: Transport used while no broker is listening
+        """
+        self.path = Path(path)
+        self.fallback = fallback
+        self.direct = False
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: dict[int, asyncio.Future[dict[str, Any]]] = {}
+        self._ids = itertools.count(1)
+
+    def _direct_transport(self) -> Transport:
+        # Only connect() enters direct mode, and only with a fallback
+        if self.fallback is None:
+            raise TransportError("Connection broker unavailable and fallback is disabled")
+        return self.fallback
+
+    def set_disconnect_handler(self, handler: Optional[DisconnectHandler]) -> None:
+        super().set_disconnect_handler(handler)
+        if self.fallback is not None:
+            self.fallback.set_disconnect_handler(handler)
+
+    async def connect(self, **options: Any) -> None:
+        await self.close()
+        try:
+            reader, self._writer = await asyncio.open_unix_connection(
+                str(self.path), limit=MAX_MESSAGE
+            )
+        except OSError as e:
+            if self.fallback is None:
+                raise TransportError(f"Connection broker unavailable: {e}") from e
+            logger.warning(f"Connection broker unavailable ({e}); connecting directly")
+            self.direct = True
+            await self.fallback.connect(**options)
+            return
+
+        self._reader_task = asyncio.ensure_future(self._read(reader, self._writer))
+        hello = await self._request({"op": "hello"})
+        if not hello.get("connected"):
+            await self.close()
+            raise TransportError("Connection broker cannot reach the router")
+        logger.info(f"Using connection broker at {self.path}")
+
+    async def _read(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        error: Optional[Exception] = None
+        try:
+            while line := await reader.readline():
+                response = json.loads(line)
+                future = self._pending.pop(response.pop("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except (ConnectionError, ValueError) as e:
+            error = e
+
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(TransportError("Connection broker went away"))
+        self._pending.clear()
+        if writer is self._writer:
+            # Not closed by close(): the broker stopped or dropped us
+            self._writer = None
+            logger.warning(f"Connection broker went away: {error or 'socket closed'}")
+            if self._disconnect_handler is not None:
+                self._disconnect_handler(error)
+
+    async def _request(self, message: dict[str, Any]) -> dict[str, Any]:
+        if self._writer is None:
+            raise TransportError("Not connected")
+        request_id = next(self._ids)
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(_encode({"id": request_id, **message}))
+            await self._writer.drain()
+            return await future
+        except ConnectionError as e:
+            raise TransportError(str(e)) from e
+        except asyncio.CancelledError:
+            # Let the broker stop the command rather than leaving it running
+            self._pending.pop(request_id, None)
+            if self._writer is not None and not self._writer.is_closing():
+                self._writer.write(_encode({"id": request_id, "op": "cancel"}))
+            raise
+
+    async def run(self, command: str) -> CommandResult:
+        if self.direct:
+            return await self._direct_transport().run(command)
+
+        response = await self._request(
+            {"op": "run", "command": command, "priority": current_class()}
+        )
+        if "error" in response:
+            raise TransportError(response["error"])
+        return CommandResult(
+            stdout=response["stdout"],
+            stderr=response["stderr"],
+            exit_status=response["exit_status"],
+        )
+
+    async def close(self) -> None:
+        if self.direct:
+            self.direct = False
+            await self._direct_transport().close()
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+        if self._reader_task is not None:
+            await self._reader_task
+            self._reader_task = None
+
+    @property
+    def is_connected(self) -> bool:
+        if self.direct:
+            return self.fallback is not None and self.fallback.is_connected
+        return self._writer is not None and not self._writer.is_closing()
+
+
+async def main() -> None:
+    """Run a broker until interrupted."""
+    settings.validate_auth()
+    broker = await ConnectionBroker().start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Shutting down connection broker...")
+        await broker.stop()
+
+
+def run() -> None:
+    """Run the broker (used by setuptools entry point)."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stderr)],
+    )
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
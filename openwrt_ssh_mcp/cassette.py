@@ -0,0 +1,191 @@
+"""Record/replay of router sessions ("cassettes") for deterministic performance tests."""
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from .transport import CommandResult, DisconnectHandler, Transport, TransportError
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+
+@dataclass
+class Interaction:
+    """One recorded command and how the router answered it."""
+
+    command: str
+    stdout: str
+    stderr: str
+    exit_status: Optional[int]
+    duration: float
+
+
+class Cassette:
+    """
+    Ordered list of recorded interactions.
+
+    Stored as JSON Lines (one header line, then one interaction per line),
+    gzip-compressed when the file name ends in ``.gz``.
+    """
+
+    def __init__(self, interactions: Optional[list[Interaction]] = None, **metadata: Any):
+        """Create a cassette from interactions and optional header metadata."""
+        self.interactions: list[Interaction] = list(interactions or [])
+        self.metadata = metadata
+        self._positions: dict[str, int] = defaultdict(int)
+        self._by_command: Optional[dict[str, list[Interaction]]] = None
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+    def record(self, interaction: Interaction) -> None:
+        """Append an interaction."""
+        self.interactions.append(interaction)
+        self._by_command = None
+
+    def next_for(self, command: str) -> Optional[Interaction]:
+        """
+        Next recorded interaction for a command.
+
+        Repeated commands are served in recorded order and cycle once exhausted.
+        """
+        if self._by_command is None:
+            self._by_command = defaultdict(list)
+            for interaction in self.interactions:
+                self._by_command[interaction.command].append(interaction)
+
+        recorded = self._by_command.get(command)
+        if not recorded:
+            return None
+        position = self._positions[command]
+        self._positions[command] = position + 1
+        return recorded[position % len(recorded)]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the cassette to ``path``."""
+        path = Path(path)
+        header = {"version": CASSETTE_VERSION, **self.metadata}
+        with _open(path, "wt") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for interaction in self.interactions:
+                f.write(json.dumps(asdict(interaction), ensure_ascii=False) + "\n")
+        logger.info(f"Saved cassette with {len(self)} interactions to {path}")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Cassette":
+        """Read a cassette written by save()."""
+        path = Path(path)
+        with _open(path, "rt") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}: {header.get('version')}")
+            header.pop("version")
+            interactions = [Interaction(**json.loads(line)) for line in f if line.strip()]
+        return cls(interactions, **header)
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class RecordingTransport(Transport):
+    """Wraps a real transport and records every command into a cassette."""
+
+    def __init__(self, inner: Transport, path: Union[str, Path, None] = None):
+        """Record through ``inner``; the cassette is saved to ``path`` on close()."""
+        self.inner = inner
+        self.path = Path(path) if path else None
+        self.cassette = Cassette(
+            recorded_at=datetime.now(timezone.utc).isoformat(timespec="seconds")
+        )
+
+    async def connect(self, **options: Any) -> None:
+        self.cassette.metadata.setdefault("router", f"{options.get('host')}:{options.get('port')}")
+        await self.inner.connect(**options)
+
+    async def run(self, command: str) -> CommandResult:
+        start = time.perf_counter()
+        result = await self.inner.run(command)
+        self.cassette.record(Interaction(
+            command=command,
+            stdout=result.stdout,
+            stderr=result.stderr,
+            exit_status=result.exit_status,
+            duration=round(time.perf_counter() - start, 6),
+        ))
+        return result
+
+    def set_disconnect_handler(self, handler: Optional[DisconnectHandler]) -> None:
+        self.inner.set_disconnect_handler(handler)
+
+    async def close(self) -> None:
+        try:
+            await self.inner.close()
+        finally:
+            if self.path:
+                self.cassette.save(self.path)
+
+    @property
+    def is_connected(self) -> bool:
+        return self.inner.is_connected
+
+
+class ReplayTransport(Transport):
+    """
+    Serves recorded interactions instead of talking to a router.
+
+    Args:
+        cassette: Cassette (or path to one) to replay
+        timing: ``"none"`` to answer immediately, ``"original"`` to wait the
+            recorded duration, or a number to scale recorded durations by
+    """
+
+    def __init__(self, cassette: Union[Cassette, str, Path], timing: Union[str, float] = "none"):
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette.load(cassette)
+        self.scale = self._parse_timing(timing)
+        self._connected = False
+
+    @staticmethod
+    def _parse_timing(timing: Union[str, float]) -> float:
+        if timing in (None, "", "none"):
+            return 0.0
+        if timing == "original":
+            return 1.0
+        try:
+            return float(timing)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid replay timing: {timing!r}") from None
+
+    async def connect(self, **options: Any) -> None:
+        self._connected = True
+
+    async def run(self, command: str) -> CommandResult:
+        if not self._connected:
+            raise TransportError("Not connected")
+
+        interaction = self.cassette.next_for(command)
+        if interaction is None:
+            logger.warning(f"No recorded interaction for command: {command}")
+            return CommandResult("", f"cassette: no recording for '{command}'", 127)
+
+        if self.scale:
+            await asyncio.sleep(interaction.duration * self.scale)
+        return CommandResult(interaction.stdout, interaction.stderr, interaction.exit_status)
+
+    async def close(self) -> None:
+        self._connected = False
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
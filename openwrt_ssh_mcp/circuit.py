@@ -0,0 +1,119 @@
+"""Circuit breaker that fails fast while a router is unreachable."""
+
+import logging
+import time
+from typing import Any, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures to reach one router.
+
+    Closed: requests go through. After ``failure_threshold`` consecutive
+    failures (connect errors, lost connections, timeouts) the circuit opens
+    and requests are rejected without touching the network. Once
+    ``reset_timeout`` has passed, a single probe is let through (half-open);
+    its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+    ):
+        """
+        Initialize a closed circuit.
+
+        Args:
+            name: Router the circuit protects (for logs)
+            failure_threshold: Consecutive failures that open the circuit
+                (defaults to settings)
+            reset_timeout: Seconds the circuit stays open before a probe
+                (defaults to settings)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.circuit_failure_threshold
+        self.reset_timeout = reset_timeout or settings.circuit_reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opens = 0
+        self.last_error: Optional[str] = None
+        self._opened_at = 0.0
+
+    def allows_requests(self) -> bool:
+        """Whether callers may use the router (the circuit is closed)."""
+        return self.state == CLOSED
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe while the circuit is open."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def begin_probe(self) -> None:
+        """Let one probe through an open circuit."""
+        self.state = HALF_OPEN
+
+    def record_success(self) -> None:
+        """The router answered: close the circuit."""
+        if self.state != CLOSED:
+            logger.info(f"Circuit for {self.name} closed: router is reachable again")
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self, error: str) -> bool:
+        """
+        The router could not be reached.
+
+        Args:
+            error: What went wrong
+
+        Returns:
+            bool: True if this failure opened the circuit
+        """
+        self.failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.failures >= self.failure_threshold
+        ):
+            was_closed = self.state == CLOSED
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            if was_closed:
+                self.opens += 1
+                logger.error(
+                    f"Circuit for {self.name} opened after {self.failures} failures: {error}"
+                )
+                return True
+        return False
+
+    def unavailable(self) -> dict[str, Any]:
+        """Tool result returned instead of calling an unreachable router."""
+        return {
+            "success": False,
+            "router_unavailable": True,
+            "error": (
+                f"Router {self.name} is unavailable ({self.last_error}); "
+                f"not retrying for {self.retry_after():.0f}s"
+            ),
+            "retry_after": round(self.retry_after(), 1),
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opens": self.opens,
+            "retry_after": round(self.retry_after(), 1),
+            "last_error": self.last_error,
+        }
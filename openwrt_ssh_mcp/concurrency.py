@@ -0,0 +1,225 @@
+"""AIMD limit on the number of commands running on a router at once."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Optional
+
+from .config import settings
+from .metrics import command_template
+
+logger = logging.getLogger(__name__)
+
+# Command whose output reports the router's load average
+LOADAVG_COMMAND = "cat /proc/loadavg"
+
+# Run time above the baseline that never counts as inflation (network jitter)
+MIN_INFLATION = 0.01
+
+# Each sample lets a template's baseline drift up by this fraction, so the
+# baseline follows a router whose unloaded latency has changed
+BASELINE_DRIFT = 0.01
+
+
+class AdaptiveLimiter:
+    """
+    Bounds concurrent commands, adapting the bound to how the router copes.
+
+    The limit grows by one per window of successful commands while it is
+    fully used (additive increase) and is cut by ``backoff`` (multiplicative
+    decrease) when a command times out or loses its connection, when a run
+    takes more than ``tolerance`` times the fastest recent run of the same
+    command template, or when the router reports a 1-minute load average
+    above ``max_load``. At most one decrease applies per generation of
+    commands: samples from commands started before the last decrease are
+    ignored.
+
+    Waiters are served by priority, and each ``aging`` seconds of waiting
+    count as one priority level, so low-priority waiters are not starved by
+    a steady stream of urgent ones. One slot is kept for priority 0: lower
+    priorities hold at most ``limit - 1`` slots, and while the limit is one
+    and a lower priority holds it, a priority-0 command may run next to it.
+    """
+
+    def __init__(
+        self,
+        initial: Optional[int] = None,
+        min_limit: Optional[int] = None,
+        max_limit: Optional[int] = None,
+        adaptive: Optional[bool] = None,
+        tolerance: Optional[float] = None,
+        backoff: Optional[float] = None,
+        max_load: Optional[float] = None,
+        aging: Optional[float] = None,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial: Starting limit (defaults to settings)
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            adaptive: Adjust the limit (otherwise it stays at ``initial``)
+            tolerance: Run time / baseline ratio treated as overload
+            backoff: Factor applied to the limit on overload
+            max_load: 1-minute load average treated as overload
+            aging: Seconds of waiting worth one priority level
+        """
+        self.limit = float(initial or settings.ssh_max_concurrent_commands)
+        self.min_limit = min_limit or settings.ssh_min_concurrent_commands
+        self.max_limit = max_limit or settings.ssh_max_concurrent_commands_limit
+        self.adaptive = settings.ssh_adaptive_concurrency if adaptive is None else adaptive
+        self.tolerance = tolerance or settings.ssh_concurrency_tolerance
+        self.backoff = backoff or settings.ssh_concurrency_backoff
+        self.max_load = max_load or settings.ssh_concurrency_max_load
+        self.aging = aging or settings.ssh_priority_aging
+        self.in_flight = 0
+        # Slots held by priorities other than 0
+        self.lower_in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self.load: Optional[float] = None
+        # time.monotonic() of the last load sample
+        self.load_observed_at = float("-inf")
+        # Heap of (deadline, arrival, priority, future): the deadline is the
+        # arrival time plus ``aging`` per priority level; earliest goes first
+        self._waiters: list[tuple[float, int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self._baselines: dict[str, float] = {}
+        self._last_decrease = float("-inf")
+
+    @property
+    def waiting(self) -> int:
+        """Callers queued for a slot."""
+        return len(self._waiters)
+
+    async def acquire(self, priority: int = 0) -> None:
+        """
+        Wait for a slot.
+
+        Args:
+            priority: Waiters with lower values are served first; equal
+                priorities are served in arrival order
+        """
+        if not self._waiters and self._has_slot(priority):
+            self._take(priority)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        deadline = time.perf_counter() + priority * self.aging
+        entry = (deadline, next(self._arrivals), priority, waiter)
+        heapq.heappush(self._waiters, entry)
+        # A priority-0 caller may fit where the waiters ahead of it do not
+        self._wake()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over as we were cancelled: pass it on
+                self.release(priority)
+            else:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self, priority: int = 0) -> None:
+        """Give back a slot taken with acquire() at ``priority``."""
+        self.in_flight -= 1
+        if priority:
+            self.lower_in_flight -= 1
+        self._wake()
+
+    def _has_slot(self, priority: int) -> bool:
+        limit = int(self.limit)
+        if priority == 0:
+            return self.in_flight < max(limit, self.lower_in_flight + 1)
+        return self.in_flight < limit and self.lower_in_flight < max(1, limit - 1)
+
+    def _take(self, priority: int) -> None:
+        self.in_flight += 1
+        if priority:
+            self.lower_in_flight += 1
+
+    def _wake(self) -> None:
+        if not self._waiters:
+            return
+        waiting = []
+        for entry in sorted(self._waiters):
+            priority, waiter = entry[2], entry[3]
+            if waiter.done():
+                continue
+            if self._has_slot(priority):
+                self._take(priority)
+                waiter.set_result(None)
+            else:
+                waiting.append(entry)
+        # A sorted list is a valid heap
+        self._waiters = waiting
+
+    def record(self, command: str, started: float, seconds: float, ok: bool) -> None:
+        """
+        Adjust the limit after a command ran.
+
+        Call before release().
+
+        Args:
+            command: Command as executed
+            started: time.perf_counter() when the command was sent
+            seconds: Time the router took to run it
+            ok: False if it timed out or lost its connection
+        """
+        if not ok:
+            self._decrease(started, "command failed")
+            return
+
+        template = command_template(command)
+        baseline = min(seconds, self._baselines.get(template, seconds) * (1 + BASELINE_DRIFT))
+        self._baselines[template] = baseline
+        if seconds > baseline * self.tolerance and seconds - baseline > MIN_INFLATION:
+            self._decrease(started, f"latency {seconds * 1000:.0f} ms vs {baseline * 1000:.0f} ms")
+        elif self.in_flight >= int(self.limit):
+            self._increase()
+
+    def observe_load(self, output: str) -> None:
+        """Take the router's load into account (output of LOADAVG_COMMAND)."""
+        try:
+            self.load = float(output.split()[0])
+        except (IndexError, ValueError):
+            return
+        self.load_observed_at = time.monotonic()
+        if self.load > self.max_load:
+            self._decrease(time.perf_counter(), f"load average {self.load:.2f}")
+
+    def _increase(self) -> None:
+        if not self.adaptive or self.limit >= self.max_limit:
+            return
+        before = int(self.limit)
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        if int(self.limit) > before:
+            self.increases += 1
+            logger.debug(f"Concurrent command limit raised to {int(self.limit)}")
+            self._wake()
+
+    def _decrease(self, started: float, reason: str) -> None:
+        if not self.adaptive or started < self._last_decrease:
+            return
+        self._last_decrease = time.perf_counter()
+        before = int(self.limit)
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        if int(self.limit) < before:
+            self.decreases += 1
+            logger.info(f"Concurrent command limit lowered to {int(self.limit)}: {reason}")
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current limit, usage and adjustments."""
+        return {
+            "adaptive": self.adaptive,
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "load": self.load,
+        }
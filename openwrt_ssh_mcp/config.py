@@ -23,12 +23,107 @@ class Settings(BaseSettings):
     # SSH Connection Settings
     ssh_timeout: int = 30
     ssh_keepalive_interval: int = 15
+    # Keepalives without reply before the connection is declared dead
+    ssh_keepalive_count_max: int = 3
+    # Reconnects: attempts per round and jittered exponential backoff (seconds)
+    ssh_reconnect_attempts: int = 3
+    ssh_reconnect_backoff: float = 0.5
+    ssh_reconnect_backoff_max: float = 10.0
+    # Seconds a timed-out remote command gets to exit after SIGTERM before SIGKILL
+    ssh_kill_grace: float = 2.0
+    # Adaptive timeouts: p99 of recent run times x factor, within [floor, ceiling]
+    ssh_adaptive_timeouts: bool = True
+    ssh_timeout_factor: float = 3.0
+    ssh_timeout_floor: float = 2.0
+    ssh_timeout_ceiling: float = 120.0
+    ssh_timeout_min_samples: int = 20
+    # Fixed timeouts by command prefix (JSON), e.g. {"opkg update": 600}
+    ssh_timeout_overrides: Optional[str] = None
+    # Circuit breaker: consecutive failures before failing fast, and seconds
+    # before the router is probed again
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 30.0
+    ssh_max_concurrent_commands: int = 4
+    # Adapt the limit above (AIMD) to latency inflation, errors and router load
+    ssh_adaptive_concurrency: bool = True
+    ssh_min_concurrent_commands: int = 1
+    ssh_max_concurrent_commands_limit: int = 16
+    ssh_concurrency_tolerance: float = 2.0
+    ssh_concurrency_backoff: float = 0.7
+    ssh_concurrency_max_load: float = 2.0
+    # Seconds between router load samples for the adaptive limit (0 = only
+    # loads read by tools or the metrics sampler count)
+    ssh_load_poll_interval: float = 15.0
+    # Seconds a queued command waits before it outranks the next priority class
+    ssh_priority_aging: float = 5.0
+    # Concurrent identical read-only commands share one execution
+    ssh_coalesce_reads: bool = True
+    # Unix socket of a connection broker (openwrt-mcp-broker) to run commands
+    # through, and whether to connect directly while no broker is listening
+    ssh_broker_socket: Optional[str] = None
+    ssh_broker_fallback: bool = True
+    # Fault injection for resilience testing (JSON FaultConfig), never in production
+    ssh_faults: Optional[str] = None
+    # Session cassettes: record real router output, or replay it offline
+    ssh_record_cassette: Optional[str] = None
+    ssh_replay_cassette: Optional[str] = None
+    ssh_replay_timing: str = "none"  # none, original, or a scale factor like 0.5
 
     # Security Settings
     enable_command_validation: bool = True
     enable_audit_logging: bool = True
     log_file: str = "openwrt_mcp.log"
 
+    # Result Store Settings (pagination of large tool outputs)
+    result_page_size: int = 200
+    result_store_max_entries: int = 32
+    result_store_max_bytes: int = 32 * 1024 * 1024
+    result_store_ttl: int = 600
+
+    # Snapshot Settings (delta responses for polling tools)
+    snapshot_max_per_router: int = 16
+
+    # Batch Settings
+    batch_max_calls: int = 20
+
+    # Metrics Settings
+    metrics_max_command_templates: int = 256
+    # OpenMetrics endpoint (disabled unless a port is set)
+    metrics_host: str = "127.0.0.1"
+    metrics_port: Optional[int] = None
+    metrics_router_interval: int = 15
+
+    # Tracing: append every tool call's spans to this file (Chrome trace format)
+    trace_file: Optional[str] = None
+
+    # Profiling: tools profiled on every call ("*" for all), output directory
+    profile_tools: Optional[str] = None
+    profile_dir: str = "profiles"
+    profile_top: int = 40
+
+    # Event-loop monitor: lag sampling interval and stall reporting threshold
+    enable_loop_monitor: bool = True
+    loop_monitor_interval: float = 0.1
+    loop_block_threshold: float = 0.25
+
+    # MCP transport: stdio (one client) or http (streamable HTTP, many clients,
+    # each limited to a number of concurrent tool calls)
+    mcp_transport: str = "stdio"
+    mcp_http_host: str = "127.0.0.1"
+    mcp_http_port: int = 8000
+    mcp_session_max_concurrent_tools: int = 4
+
+    # Parsing of large outputs off the event loop: thread, process or off
+    parse_offload_mode: str = "thread"
+    parse_offload_threshold: int = 256 * 1024
+    parse_offload_workers: int = 2
+    parse_offload_max_pending: int = 8
+
+    @property
+    def router_id(self) -> str:
+        """Identifier of the configured router (user@host:port)."""
+        return f"{self.openwrt_user}@{self.openwrt_host}:{self.openwrt_port}"
+
     def validate_auth(self) -> None:
         """Ensure at least one authentication method is configured."""
         # Allow default SSH key authentication if neither password nor explicit key file is set
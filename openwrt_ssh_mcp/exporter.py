@@ -0,0 +1,442 @@
+"""Optional OpenMetrics (Prometheus) HTTP endpoint for server and router metrics."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Iterable, Optional
+
+from .circuit import CLOSED, HALF_OPEN, OPEN
+from .config import settings
+from .loop_monitor import LoopMonitor, loop_monitor
+from .metrics import Histogram, Metrics, metrics
+from .result_store import ResultStore, result_store
+from .scheduler import BACKGROUND, PRIORITY_CLASSES, priority_class
+from .ssh_client import SSHClient, ssh_client
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Numeric value of each circuit breaker state
+CIRCUIT_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Read-only commands sampled from the router
+ROUTER_COMMANDS = {
+    "loadavg": "cat /proc/loadavg",
+    "meminfo": "cat /proc/meminfo",
+    "uptime": "cat /proc/uptime",
+    "net_dev": "cat /proc/net/dev",
+}
+
+MEMINFO_FIELDS = {
+    "MemTotal": "total",
+    "MemFree": "free",
+    "MemAvailable": "available",
+    "Buffers": "buffers",
+    "Cached": "cached",
+}
+
+NET_DEV_FIELDS = ("receive_bytes", "receive_packets", "receive_errs", "receive_drop",
+                  None, None, None, None,
+                  "transmit_bytes", "transmit_packets", "transmit_errs", "transmit_drop")
+
+
+def parse_router_sample(outputs: dict[str, str]) -> dict[str, Any]:
+    """
+    Parse the output of ROUTER_COMMANDS.
+
+    Args:
+        outputs: Command stdout keyed like ROUTER_COMMANDS (missing keys are skipped)
+
+    Returns:
+        dict: load (1/5/15 min), memory bytes, uptime seconds and per-interface counters
+    """
+    sample: dict[str, Any] = {}
+
+    if "loadavg" in outputs:
+        parts = outputs["loadavg"].split()
+        sample["load"] = {"1": float(parts[0]), "5": float(parts[1]), "15": float(parts[2])}
+
+    if "meminfo" in outputs:
+        memory = {}
+        for line in outputs["meminfo"].splitlines():
+            key, _, value = line.partition(":")
+            if key in MEMINFO_FIELDS:
+                memory[MEMINFO_FIELDS[key]] = int(value.split()[0]) * 1024
+        sample["memory"] = memory
+
+    if "uptime" in outputs:
+        sample["uptime"] = float(outputs["uptime"].split()[0])
+
+    if "net_dev" in outputs:
+        interfaces = {}
+        for line in outputs["net_dev"].splitlines()[2:]:
+            name, _, values = line.partition(":")
+            numbers = values.split()
+            interfaces[name.strip()] = {
+                field: int(numbers[index])
+                for index, field in enumerate(NET_DEV_FIELDS)
+                if field and index < len(numbers)
+            }
+        sample["interfaces"] = interfaces
+
+    return sample
+
+
+class RouterSampler:
+    """Periodically samples load, memory, uptime and interface counters from the router."""
+
+    def __init__(self, client: Optional[SSHClient] = None, interval: Optional[float] = None):
+        """
+        Initialize the sampler.
+
+        Args:
+            client: SSH client used for sampling (defaults to the global client)
+            interval: Seconds between samples (defaults to settings)
+        """
+        self.client = client or ssh_client
+        self.interval = interval or settings.metrics_router_interval
+        self.sample: dict[str, Any] = {}
+        self.sampled_at: Optional[float] = None
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def sample_once(self) -> bool:
+        """Take one sample; returns False if the router could not be sampled."""
+        # Never force a connection just for metrics
+        if not self.client.is_connected:
+            return False
+
+        outputs = {}
+        with priority_class(BACKGROUND):
+            for key, command in ROUTER_COMMANDS.items():
+                result = await self.client.execute(command, timeout=min(10, settings.ssh_timeout))
+                if result["success"]:
+                    outputs[key] = result["stdout"]
+
+        try:
+            sample = parse_router_sample(outputs)
+        except (ValueError, IndexError) as e:
+            logger.warning(f"Could not parse router metrics: {e}")
+            sample = {}
+
+        if len(outputs) < len(ROUTER_COMMANDS) or not sample:
+            self.errors += 1
+        if sample:
+            self.sample = sample
+            self.sampled_at = time.time()
+        return bool(sample)
+
+    def start(self) -> None:
+        """Start sampling in the background."""
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop background sampling, letting a sample in progress finish."""
+        if self._task:
+            # Signalled rather than cancelled: a cancellation arriving just as a
+            # command completes can be swallowed by asyncio.wait_for()
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.sample_once()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Router metrics sampling failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class OpenMetricsWriter:
+    """Accumulates metric families in the OpenMetrics text format."""
+
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str,
+               samples: Iterable[tuple[str, dict[str, str], float]]) -> None:
+        """
+        Add a metric family.
+
+        Args:
+            name: Family name (without the ``_total`` suffix for counters)
+            kind: counter, gauge or histogram
+            help_text: HELP text
+            samples: (suffix, labels, value) tuples, e.g. ("_total", {...}, 3)
+        """
+        self.lines.append(f"# TYPE {name} {kind}")
+        self.lines.append(f"# HELP {name} {help_text}")
+        for suffix, labels, value in samples:
+            self.lines.append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str,
+                  histograms: Iterable[tuple[dict[str, str], Histogram]]) -> None:
+        """Add a histogram family from pre-aggregated latency histograms."""
+        samples: list[tuple[str, dict[str, str], float]] = []
+        for labels, hist in histograms:
+            for bound, count in zip(LATENCY_BUCKETS, hist.cumulative(list(LATENCY_BUCKETS))):
+                samples.append(("_bucket", {**labels, "le": repr(float(bound))}, count))
+            samples.append(("_bucket", {**labels, "le": "+Inf"}, hist.count))
+            samples.append(("_count", labels, hist.count))
+            samples.append(("_sum", labels, hist.total / 1_000_000))
+        self.family(name, "histogram", help_text, samples)
+
+    def render(self) -> str:
+        return "\n".join(self.lines + ["# EOF"]) + "\n"
+
+
+def render_metrics(
+    server_metrics: Optional[Metrics] = None,
+    client: Optional[SSHClient] = None,
+    store: Optional[ResultStore] = None,
+    sampler: Optional[RouterSampler] = None,
+    monitor: Optional[LoopMonitor] = None,
+) -> str:
+    """
+    Render server (and, if sampled, router) metrics as OpenMetrics text.
+
+    Everything is read from counters and histograms that are maintained as
+    calls happen, so a scrape never touches the router.
+    """
+    server_metrics = server_metrics or metrics
+    client = client or ssh_client
+    store = result_store if store is None else store
+    monitor = monitor or loop_monitor
+    out = OpenMetricsWriter()
+
+    tools = sorted(server_metrics.tools.items())
+    out.family("openwrt_mcp_tool_calls", "counter", "Tool calls", [
+        ("_total", {"tool": tool}, phases["total"].count) for tool, phases in tools
+    ])
+    out.family("openwrt_mcp_tool_errors", "counter", "Tool calls that failed", [
+        ("_total", {"tool": tool}, server_metrics.tool_errors[tool]) for tool, _ in tools
+    ])
+    out.histogram("openwrt_mcp_tool_duration_seconds", "Tool call latency by phase", [
+        ({"tool": tool, "phase": phase}, hist)
+        for tool, phases in tools for phase, hist in sorted(phases.items())
+    ])
+
+    commands = sorted(server_metrics.commands.items())
+    out.histogram("openwrt_mcp_command_duration_seconds", "SSH command latency by template", [
+        ({"command": template}, phases["total"]) for template, phases in commands
+    ])
+    out.family("openwrt_mcp_command_errors", "counter", "SSH commands that failed", [
+        ("_total", {"command": template}, server_metrics.command_errors[template])
+        for template, _ in commands
+    ])
+
+    out.family("openwrt_mcp_ssh_connected", "gauge", "Whether the SSH connection is up", [
+        ("", {}, int(client.is_connected)),
+    ])
+    out.family("openwrt_mcp_ssh_connects", "counter", "Successful SSH connects", [
+        ("_total", {}, client.connects),
+    ])
+    out.family("openwrt_mcp_ssh_connect_failures", "counter", "Failed SSH connects", [
+        ("_total", {}, client.connect_failures),
+    ])
+    out.family("openwrt_mcp_ssh_connection_losses", "counter",
+               "SSH connections lost while running a command", [
+                   ("_total", {}, client.connection_losses),
+               ])
+    out.family("openwrt_mcp_ssh_command_slots", "gauge", "Current concurrent command limit", [
+        ("", {}, client.command_slots),
+    ])
+    out.family("openwrt_mcp_ssh_commands_active", "gauge", "Commands running on the router", [
+        ("", {}, client.active_commands),
+    ])
+    out.family("openwrt_mcp_ssh_commands_waiting", "gauge", "Commands waiting for a slot", [
+        ("", {}, client.waiting_commands),
+    ])
+
+    scheduler = client.scheduler
+    out.family("openwrt_mcp_ssh_queue_depth", "gauge", "Commands waiting for a slot by class", [
+        ("", {"class": name}, scheduler.queued[name]) for name in PRIORITY_CLASSES
+    ])
+    out.histogram("openwrt_mcp_ssh_queue_wait_seconds", "Wait for a command slot by class", [
+        ({"class": name}, scheduler.waits[name]) for name in PRIORITY_CLASSES
+    ])
+    out.family("openwrt_mcp_ssh_writes_waiting", "gauge",
+               "Mutating tool calls waiting for the router's write lock", [
+                   ("", {}, scheduler.writes_waiting),
+               ])
+
+    out.family("openwrt_mcp_ssh_commands_coalesced", "counter",
+               "Commands that shared an identical in-flight execution", [
+                   ("_total", {}, client.coalesced_commands),
+               ])
+
+    out.family("openwrt_mcp_ssh_commands_retried", "counter",
+               "Read-only commands retried after a reconnect", [
+                   ("_total", {}, client.retried_commands),
+               ])
+
+    out.family("openwrt_mcp_ssh_circuit_state", "gauge",
+               "Circuit breaker state (0 closed, 1 half-open, 2 open)", [
+                   ("", {}, CIRCUIT_STATES[client.breaker.state]),
+               ])
+    out.family("openwrt_mcp_ssh_circuit_opens", "counter",
+               "Times the router was declared unavailable", [
+                   ("_total", {}, client.breaker.opens),
+               ])
+
+    out.family("openwrt_mcp_result_store_hits", "counter", "Result store page hits", [
+        ("_total", {}, store.hits),
+    ])
+    out.family("openwrt_mcp_result_store_misses", "counter", "Result store page misses", [
+        ("_total", {}, store.misses),
+    ])
+    out.family("openwrt_mcp_result_store_entries", "gauge", "Results held in memory", [
+        ("", {}, len(store)),
+    ])
+    out.family("openwrt_mcp_result_store_bytes", "gauge", "Approximate size of held results", [
+        ("", {}, store.total_bytes),
+    ])
+
+    if monitor.running:
+        out.histogram("openwrt_mcp_event_loop_lag_seconds", "Event-loop wake-up lag", [
+            ({}, monitor.lag),
+        ])
+        out.family("openwrt_mcp_event_loop_stalls", "counter",
+                   "Times the event loop was blocked beyond the threshold", [
+                       ("_total", {}, monitor.stall_count),
+                   ])
+
+    if sampler is not None:
+        _render_router(out, sampler)
+
+    return out.render()
+
+
+def _render_router(out: OpenMetricsWriter, sampler: RouterSampler) -> None:
+    router = {"router": settings.router_id}
+    sample = sampler.sample
+
+    out.family("openwrt_router_sample_errors", "counter", "Failed router metric samples", [
+        ("_total", router, sampler.errors),
+    ])
+    if sampler.sampled_at is None:
+        return
+
+    out.family("openwrt_router_last_sample_timestamp_seconds", "gauge",
+               "When the router was last sampled", [("", router, sampler.sampled_at)])
+    if "load" in sample:
+        out.family("openwrt_router_load", "gauge", "Load average", [
+            ("", {**router, "period": f"{period}m"}, value)
+            for period, value in sample["load"].items()
+        ])
+    if "memory" in sample:
+        out.family("openwrt_router_memory_bytes", "gauge", "Memory from /proc/meminfo", [
+            ("", {**router, "type": kind}, value) for kind, value in sample["memory"].items()
+        ])
+    if "uptime" in sample:
+        out.family("openwrt_router_uptime_seconds", "gauge", "Router uptime", [
+            ("", router, sample["uptime"]),
+        ])
+    interfaces = sorted(sample.get("interfaces", {}).items())
+    for field in NET_DEV_FIELDS:
+        if field is None:
+            continue
+        out.family(f"openwrt_router_network_{field}", "counter",
+                   f"Interface {field.replace('_', ' ')} from /proc/net/dev", [
+                       ("_total", {**router, "interface": name}, counters[field])
+                       for name, counters in interfaces if field in counters
+                   ])
+
+
+class MetricsExporter:
+    """Minimal HTTP server answering ``GET /metrics`` in OpenMetrics format."""
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        sampler: Optional[RouterSampler] = None,
+    ):
+        """
+        Initialize the exporter.
+
+        Args:
+            host: Address to listen on (defaults to settings)
+            port: Port to listen on, 0 for any free port (defaults to settings)
+            sampler: Router sampler to run and export (defaults to a new one)
+        """
+        self.host = host or settings.metrics_host
+        self.port = settings.metrics_port if port is None else port
+        self.sampler = sampler or RouterSampler()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> "MetricsExporter":
+        """Start listening and sampling the router."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.sampler.start()
+        logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+        return self
+
+    async def stop(self) -> None:
+        """Stop listening and sampling."""
+        await self.sampler.stop()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain the headers; the request has no body
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                status, body, content_type = "405 Method Not Allowed", "", "text/plain"
+            elif parts[1].split("?")[0] != "/metrics":
+                status, body, content_type = "404 Not Found", "", "text/plain"
+            else:
+                status, content_type = "200 OK", CONTENT_TYPE
+                body = render_metrics(sampler=self.sampler)
+
+            data = body.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            writer.close()
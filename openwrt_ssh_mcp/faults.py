@@ -0,0 +1,114 @@
+"""Fault-injecting transport for resilience and tail-latency testing."""
+
+import asyncio
+import logging
+import random
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .transport import CommandResult, DisconnectHandler, Transport, TransportError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FaultConfig:
+    """
+    Probabilities (0.0-1.0) and timings of injected faults.
+
+    Each command draws at most one fault, checked in field order.
+    """
+
+    # Connection dropped before the command runs (transport must reconnect)
+    disconnect_rate: float = 0.0
+    # Connection becomes half-open: this and every later command hang until reconnect
+    half_open_rate: float = 0.0
+    # A single command hangs for ``stall_time`` seconds
+    stall_rate: float = 0.0
+    stall_time: float = 3600.0
+    # Output is cut short and the channel closes without an exit status
+    partial_output_rate: float = 0.0
+    # Output arrives slowly (``slow_read_bandwidth`` bytes per second)
+    slow_read_rate: float = 0.0
+    slow_read_bandwidth: int = 10_000
+    # Output arrives normally but the exit status is delayed
+    exit_delay_rate: float = 0.0
+    exit_delay: float = 1.0
+    # Connection attempts fail
+    connect_failure_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class FaultInjectingTransport(Transport):
+    """Wraps another transport and injects faults according to a FaultConfig."""
+
+    def __init__(self, inner: Transport, config: Optional[FaultConfig] = None):
+        """Wrap ``inner``; with a default config no faults are injected."""
+        self.inner = inner
+        self.config = config or FaultConfig()
+        self.injected: Counter[str] = Counter()
+        self._random = random.Random(self.config.seed)
+        self._half_open = False
+
+    async def connect(self, **options: Any) -> None:
+        if self._chance(self.config.connect_failure_rate):
+            self.injected["connect_failure"] += 1
+            raise TransportError("Connection refused (injected fault)")
+        await self.inner.connect(**options)
+        self._half_open = False
+
+    async def run(self, command: str) -> CommandResult:
+        if self._half_open:
+            await asyncio.sleep(self.config.stall_time)
+
+        cfg = self.config
+        if self._chance(cfg.disconnect_rate):
+            self.injected["disconnect"] += 1
+            await self.inner.close()
+            raise TransportError("Connection lost (injected fault)")
+
+        if self._chance(cfg.half_open_rate):
+            self.injected["half_open"] += 1
+            self._half_open = True
+            await asyncio.sleep(cfg.stall_time)
+
+        if self._chance(cfg.stall_rate):
+            self.injected["stall"] += 1
+            await asyncio.sleep(cfg.stall_time)
+
+        result = await self.inner.run(command)
+
+        if self._chance(cfg.partial_output_rate):
+            self.injected["partial_output"] += 1
+            return CommandResult(
+                stdout=result.stdout[:len(result.stdout) // 2],
+                stderr=result.stderr,
+                exit_status=None,
+            )
+
+        if self._chance(cfg.slow_read_rate):
+            self.injected["slow_read"] += 1
+            size = len(result.stdout) + len(result.stderr)
+            await asyncio.sleep(size / max(1, cfg.slow_read_bandwidth))
+
+        if self._chance(cfg.exit_delay_rate):
+            self.injected["exit_delay"] += 1
+            await asyncio.sleep(cfg.exit_delay)
+
+        return result
+
+    def set_disconnect_handler(self, handler: Optional[DisconnectHandler]) -> None:
+        self.inner.set_disconnect_handler(handler)
+
+    async def close(self) -> None:
+        self._half_open = False
+        await self.inner.close()
+
+    @property
+    def is_connected(self) -> bool:
+        # A half-open connection still looks connected, like a real dead TCP peer
+        return self.inner.is_connected
+
+    def _chance(self, rate: float) -> bool:
+        return rate > 0 and self._random.random() < rate
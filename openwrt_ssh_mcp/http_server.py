@@ -0,0 +1,145 @@
+"""Streamable HTTP transport serving many MCP clients from one process."""
+
+import asyncio
+import ipaddress
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+import uvicorn
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from mcp.server.transport_security import TransportSecuritySettings
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.types import Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Path of the MCP endpoint
+MCP_PATH = "/mcp"
+
+# Names under which local clients reach a loopback listener
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+
+
+def is_loopback(host: str) -> bool:
+    """Whether ``host`` only accepts connections from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def security_settings() -> TransportSecuritySettings:
+    """
+    DNS rebinding protection for the endpoint.
+
+    Requests must be addressed to a loopback name, and browser requests must
+    come from a page served by this machine, so a web page cannot reach the
+    router tools through the user's browser.
+    """
+    return TransportSecuritySettings(
+        enable_dns_rebinding_protection=True,
+        allowed_hosts=[*LOOPBACK_HOSTS, *(f"{host}:*" for host in LOOPBACK_HOSTS)],
+        allowed_origins=[
+            *(f"http://{host}" for host in LOOPBACK_HOSTS),
+            *(f"http://{host}:*" for host in LOOPBACK_HOSTS),
+        ],
+    )
+
+
+class _MCPEndpoint:
+    """ASGI endpoint handing requests to the session manager."""
+
+    def __init__(self, manager: StreamableHTTPSessionManager):
+        self.manager = manager
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.manager.handle_request(scope, receive, send)
+
+
+def create_http_app(server: Any) -> Starlette:
+    """
+    Build the ASGI application serving ``server`` at MCP_PATH.
+
+    Every client gets its own MCP session; sessions share the process's SSH
+    connection, caches and metrics.
+    """
+    manager = StreamableHTTPSessionManager(app=server, security_settings=security_settings())
+
+    @asynccontextmanager
+    async def lifespan(_: Starlette) -> AsyncIterator[None]:
+        async with manager.run():
+            yield
+
+    return Starlette(routes=[Route(MCP_PATH, endpoint=_MCPEndpoint(manager))], lifespan=lifespan)
+
+
+class MCPHTTPServer:
+    """Runs the streamable HTTP transport with uvicorn."""
+
+    def __init__(
+        self,
+        server: Any,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+    ):
+        """
+        Initialize the HTTP server.
+
+        Args:
+            server: MCP server answering the sessions
+            host: Address to listen on (defaults to settings)
+            port: Port to listen on, 0 for any free port (defaults to settings)
+
+        Raises:
+            ValueError: If ``host`` is not a loopback address: the endpoint
+                has no authentication and exposes tools that change the router
+        """
+        self.host = host or settings.mcp_http_host
+        if not is_loopback(self.host):
+            raise ValueError(
+                f"Refusing to serve MCP over HTTP on {self.host}: the endpoint has no "
+                "authentication; use a loopback MCP_HTTP_HOST such as 127.0.0.1"
+            )
+        self.port = settings.mcp_http_port if port is None else port
+        config = uvicorn.Config(
+            create_http_app(server), host=self.host, port=self.port,
+            log_level="warning", lifespan="on",
+        )
+        self._server = uvicorn.Server(config)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def url(self) -> str:
+        """URL of the MCP endpoint."""
+        return f"http://{self.host}:{self.port}{MCP_PATH}"
+
+    async def serve(self) -> None:
+        """Serve until interrupted."""
+        logger.info(f"MCP endpoint listening on {self.url}")
+        await self._server.serve()
+
+    async def start(self) -> "MCPHTTPServer":
+        """Start serving in the background."""
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._task.done():
+                # Failed to start (e.g. port in use): raise its error
+                await self._task
+                raise RuntimeError("HTTP server stopped during startup")
+            await asyncio.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        logger.info(f"MCP endpoint listening on {self.url}")
+        return self
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._task is not None:
+            self._server.should_exit = True
+            await self._task
+            self._task = None
@@ -0,0 +1,146 @@
+"""Event-loop lag monitor and detector of callbacks that block the loop."""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Optional
+
+from .config import settings
+from .metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Stack frames kept per detected stall
+STALL_STACK_DEPTH = 30
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and reports callbacks that block it.
+
+    A coroutine wakes up every ``interval`` seconds and records how late it
+    woke up (the loop lag). A watchdog thread checks the coroutine's heartbeat;
+    when the loop has not run for longer than ``threshold`` it captures the
+    stack of the loop thread, i.e. the code that is blocking it.
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        threshold: Optional[float] = None,
+        max_stalls: int = 20,
+    ):
+        """
+        Initialize the monitor.
+
+        Args:
+            interval: Seconds between lag samples (defaults to settings)
+            threshold: Block duration reported as a stall (defaults to settings)
+            max_stalls: Recent stalls kept for reporting
+        """
+        self.interval = interval or settings.loop_monitor_interval
+        self.threshold = threshold or settings.loop_block_threshold
+        self.lag = Histogram()
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=max_stalls)
+        self.stall_count = 0
+        self._heartbeat = time.monotonic()
+        self._in_stall = False
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """Whether the monitor has been started."""
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        self._stopping.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.lag.record(lag)
+            self._heartbeat = now
+
+            if self._in_stall:
+                # The loop is running again: record how long it was blocked
+                self._in_stall = False
+                if self.stalls:
+                    self.stalls[-1]["blocked_ms"] = round(lag * 1000, 1)
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
+
+    def _watch(self) -> None:
+        check_every = min(self.interval, self.threshold) / 2
+        while not self._stopping.wait(check_every):
+            blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked > self.threshold and not self._in_stall:
+                self._in_stall = True
+                self._report_stall(blocked)
+
+    def _report_stall(self, blocked: float) -> None:
+        thread_id = self._loop_thread_id
+        frame = sys._current_frames().get(thread_id) if thread_id is not None else None
+        stack = traceback.format_stack(frame, limit=STALL_STACK_DEPTH) if frame else []
+        self.stall_count += 1
+        self.stalls.append({
+            "at": time.time(),
+            "blocked_ms": round(blocked * 1000, 1),
+            "stack": [line.rstrip() for line in stack],
+        })
+        logger.warning(
+            f"Event loop blocked for more than {blocked * 1000:.0f} ms in:\n"
+            + "".join(stack[-5:])
+        )
+
+    def reset(self) -> None:
+        """Drop recorded lag samples and stalls."""
+        self.lag = Histogram()
+        self.stalls.clear()
+        self.stall_count = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        """Lag percentiles and recent stalls."""
+        return {
+            "running": self.running,
+            "lag": self.lag.summary(),
+            "stalls": self.stall_count,
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "recent_stalls": list(self.stalls),
+        }
+
+
+# Global loop monitor instance
+loop_monitor = LoopMonitor()
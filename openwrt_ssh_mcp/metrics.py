@@ -0,0 +1,275 @@
+"""In-process latency histograms per tool and per command template."""
+
+import re
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .config import settings
+
+# Linear sub-buckets per power of two: bucket width is at most 1/64 of the value
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# Phases recorded for every SSH command
+COMMAND_PHASES = ("queue_wait", "channel_open", "remote")
+
+# Phases recorded for every tool call ("total" covers validation through shaping;
+# "serialize" is measured separately when the result is turned into MCP text)
+TOOL_PHASES = ("total", *COMMAND_PHASES, "parse", "serialize")
+
+OTHER_TEMPLATE = "<other>"
+
+_TEMPLATE_RULES = [
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "?"),
+    (re.compile(r"\b(?:[0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2}\b"), "<mac>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?:/\d+)?\b"), "<ip>"),
+    (re.compile(r"(?<![\w.-])-?\d+(?:\.\d+)?(?![\w.-])"), "<n>"),
+]
+
+
+def command_template(command: str) -> str:
+    """
+    Normalize a command so that calls differing only in values share metrics.
+
+    Quoted strings, MAC and IP addresses and bare numbers are replaced by
+    placeholders, e.g. ``ping -c 3 '10.0.0.1'`` becomes ``ping -c <n> ?``.
+    """
+    for pattern, placeholder in _TEMPLATE_RULES:
+        command = pattern.sub(placeholder, command)
+    return " ".join(command.split())[:120]
+
+
+class Histogram:
+    """
+    HDR-style log-linear latency histogram with ~1.5% relative precision.
+
+    Values are recorded in microseconds into buckets that are exact below
+    SUB_BUCKETS and then split every power of two into SUB_BUCKETS/2 linear
+    sub-buckets, so memory stays small regardless of the number of samples.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: dict[int, int] = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def bucket_of(value_us: int) -> int:
+        """Lowest value of the bucket holding ``value_us``."""
+        if value_us < SUB_BUCKETS:
+            return value_us
+        shift = value_us.bit_length() - SUB_BUCKET_BITS
+        return (value_us >> shift) << shift
+
+    @staticmethod
+    def bucket_width(bucket: int) -> int:
+        """Number of distinct microsecond values in a bucket."""
+        if bucket < SUB_BUCKETS:
+            return 1
+        return 1 << (bucket.bit_length() - SUB_BUCKET_BITS)
+
+    def record(self, seconds: float) -> None:
+        """Record a duration in seconds."""
+        value = max(0, int(seconds * 1_000_000))
+        self.buckets[self.bucket_of(value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, pct: float) -> float:
+        """Value at a percentile (0-100), in seconds."""
+        if not self.count:
+            return 0.0
+        rank = max(1, round(pct / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                upper = bucket + self.bucket_width(bucket) - 1
+                return min(upper, self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def cumulative(self, bounds_s: list[float]) -> list[int]:
+        """Number of samples at or below each bound (seconds), for exposition."""
+        counts = []
+        items = sorted(self.buckets.items())
+        index, seen = 0, 0
+        for bound in bounds_s:
+            limit = bound * 1_000_000
+            while index < len(items) and items[index][0] <= limit:
+                seen += items[index][1]
+                index += 1
+            counts.append(seen)
+        return counts
+
+    def summary(self) -> dict[str, Any]:
+        """Count and latency percentiles in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count / 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p90_ms": round(self.percentile(90) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max / 1000, 3),
+        }
+
+
+@dataclass
+class ToolCall:
+    """Timing collected while one tool call is running."""
+
+    tool: str
+    phases: dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    # (start, end) of every SSH command run by the call
+    commands: list[tuple[float, float]] = field(default_factory=list)
+
+    def ssh_time(self) -> float:
+        """Wall time during which at least one SSH command was running."""
+        busy, end = 0.0, float("-inf")
+        for start, stop in sorted(self.commands):
+            if stop <= end:
+                continue
+            busy += stop - max(start, end)
+            end = stop
+        return busy
+
+
+_current_call: ContextVar[Optional[ToolCall]] = ContextVar("current_tool_call", default=None)
+
+
+class Metrics:
+    """Latency histograms and counters for tools and SSH commands."""
+
+    def __init__(self, max_templates: Optional[int] = None):
+        """
+        Initialize empty metrics.
+
+        Args:
+            max_templates: Distinct command templates tracked before further
+                ones are grouped as "<other>" (defaults to settings)
+        """
+        self.max_templates = max_templates or settings.metrics_max_command_templates
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop every recorded sample."""
+        self.started = time.time()
+        self.tools: dict[str, dict[str, Histogram]] = defaultdict(
+            lambda: defaultdict(Histogram)
+        )
+        self.commands: dict[str, dict[str, Histogram]] = defaultdict(
+            lambda: defaultdict(Histogram)
+        )
+        self.tool_errors: dict[str, int] = defaultdict(int)
+        self.command_errors: dict[str, int] = defaultdict(int)
+
+    def begin_call(self, tool: str) -> tuple[ToolCall, Any]:
+        """Start timing a tool call; commands run until end_call() count towards it."""
+        call = ToolCall(tool)
+        return call, _current_call.set(call)
+
+    def end_call(self, call: ToolCall, token: Any, total: float, handler: float,
+                 ok: bool) -> None:
+        """
+        Finish a tool call started with begin_call().
+
+        Args:
+            call: The call being timed
+            token: Token returned by begin_call()
+            total: Time from validation through shaping, in seconds
+            handler: Time spent in the tool handler, in seconds
+            ok: Whether the call succeeded
+        """
+        _current_call.reset(token)
+        histograms = self.tools[call.tool]
+        histograms["total"].record(total)
+        for phase in COMMAND_PHASES:
+            histograms[phase].record(call.phases[phase])
+        # Whatever the handler did outside SSH is result parsing
+        histograms["parse"].record(max(0.0, handler - call.ssh_time()))
+        if not ok:
+            self.tool_errors[call.tool] += 1
+
+    def record_serialize(self, tool: str, seconds: float) -> None:
+        """Record the time taken to serialize a tool's result."""
+        self.tools[tool]["serialize"].record(seconds)
+
+    def record_command(self, command: str, start: float, end: float,
+                       phases: dict[str, float], ok: bool) -> None:
+        """
+        Record one SSH command.
+
+        Args:
+            command: Command as executed
+            start: time.perf_counter() when execute() was entered
+            end: time.perf_counter() when the result was available
+            phases: Seconds spent in each of COMMAND_PHASES
+            ok: Whether the command succeeded
+        """
+        template = command_template(command)
+        if template not in self.commands and len(self.commands) >= self.max_templates:
+            template = OTHER_TEMPLATE
+
+        histograms = self.commands[template]
+        histograms["total"].record(end - start)
+        for phase in COMMAND_PHASES:
+            histograms[phase].record(phases.get(phase, 0.0))
+        if not ok:
+            self.command_errors[template] += 1
+
+        call = _current_call.get()
+        if call is not None:
+            call.commands.append((start, end))
+            for phase in COMMAND_PHASES:
+                call.phases[phase] += phases.get(phase, 0.0)
+
+    def record_shared_command(self, start: float, end: float) -> None:
+        """
+        Record waiting for a command another caller is already running.
+
+        The command itself is recorded once by its runner; the wait only
+        counts towards the current tool call's SSH time.
+        """
+        call = _current_call.get()
+        if call is not None:
+            call.commands.append((start, end))
+
+    def snapshot(self, tool: Optional[str] = None) -> dict[str, Any]:
+        """
+        Summaries of every histogram.
+
+        Args:
+            tool: Only report this tool (commands are always reported)
+        """
+        tools = {
+            name: {
+                "calls": phases["total"].count,
+                "errors": self.tool_errors[name],
+                "phases": {phase: phases[phase].summary() for phase in TOOL_PHASES
+                           if phase in phases},
+            }
+            for name, phases in sorted(self.tools.items())
+            if tool is None or name == tool
+        }
+        commands = {
+            template: {
+                "calls": phases["total"].count,
+                "errors": self.command_errors[template],
+                "phases": {phase: hist.summary() for phase, hist in phases.items()},
+            }
+            for template, phases in sorted(self.commands.items())
+        }
+        return {
+            "since": self.started,
+            "uptime_s": round(time.time() - self.started, 1),
+            "tools": tools,
+            "commands": commands,
+        }
+
+
+# Global metrics instance
+metrics = Metrics()
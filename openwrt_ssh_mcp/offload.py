@@ -0,0 +1,110 @@
+"""Runs parsing of large command outputs off the event loop."""
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from .config import settings
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+OFFLOAD_MODES = ("thread", "process", "off")
+
+
+class ParseOffloader:
+    """
+    Routes parsing of outputs above a size threshold to a worker pool.
+
+    Small outputs are parsed inline, which is cheaper than a round trip to a
+    worker. Large ones run in a thread pool (keeps the loop responsive between
+    GIL switches) or a process pool (true parallelism, at the cost of
+    pickling the output and the result). At most ``max_pending`` parses are
+    queued or running; further callers wait for a slot.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        threshold: Optional[int] = None,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        """
+        Initialize the offloader (the pool is created on first use).
+
+        Args:
+            mode: "thread", "process" or "off" (defaults to settings)
+            threshold: Output size in characters from which parsing is offloaded
+            workers: Worker threads or processes
+            max_pending: Parses allowed to be queued or running at once
+        """
+        self.mode = mode or settings.parse_offload_mode
+        if self.mode not in OFFLOAD_MODES:
+            raise ValueError(f"Invalid parse offload mode: {self.mode}")
+        self.threshold = settings.parse_offload_threshold if threshold is None else threshold
+        self.workers = workers or settings.parse_offload_workers
+        self.max_pending = max_pending or settings.parse_offload_max_pending
+        self.inline = 0
+        self.offloaded = 0
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def run(self, parser: Callable[[str], T], output: str) -> T:
+        """
+        Parse ``output`` with ``parser``, in a worker if the output is large.
+
+        Args:
+            parser: Module-level function taking the output (picklable for
+                process mode)
+            output: Command output
+
+        Returns:
+            The parser's result; its exceptions propagate to the caller
+        """
+        if self.mode == "off" or len(output) < self.threshold:
+            self.inline += 1
+            with tracer.span("parse", parser=parser.__name__, size=len(output)):
+                return parser(output)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        async with self._slots:
+            self.offloaded += 1
+            loop = asyncio.get_running_loop()
+            with tracer.span("parse", parser=parser.__name__, size=len(output),
+                             offloaded=self.mode):
+                return await loop.run_in_executor(self._get_executor(), parser, output)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="parse"
+                )
+            logger.info(f"Started {self.mode} pool with {self.workers} workers for parsing")
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Inline and offloaded parse counts."""
+        return {
+            "mode": self.mode,
+            "threshold": self.threshold,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+        }
+
+
+# Global parse offloader instance
+offloader = ParseOffloader()
@@ -0,0 +1,67 @@
+"""Parsers for router command output.
+
+Parsers are pure module-level functions of the command output so that large
+outputs can be parsed in a worker thread or process (see offload.py).
+"""
+
+from typing import Any
+
+
+def parse_dhcp_leases(output: str) -> list[dict[str, str]]:
+    """
+    Parse a dnsmasq lease file.
+
+    Each line is ``<expiry> <mac> <ip> <hostname> [<client id>]``.
+    """
+    leases = []
+    for line in output.strip().split("\n"):
+        if line:
+            parts = line.split()
+            if len(parts) >= 4:
+                leases.append({
+                    "timestamp": parts[0],
+                    "mac": parts[1],
+                    "ip": parts[2],
+                    "hostname": parts[3] if len(parts) > 3 else "",
+                    "client_id": parts[4] if len(parts) > 4 else "",
+                })
+    return leases
+
+
+def parse_opkg_installed(output: str) -> list[dict[str, str]]:
+    """Parse ``opkg list-installed`` (``<name> - <version>`` lines)."""
+    packages = []
+    for line in output.strip().split("\n"):
+        if line:
+            parts = line.split(" - ")
+            if len(parts) >= 2:
+                packages.append({
+                    "name": parts[0],
+                    "version": parts[1],
+                })
+    return packages
+
+
+def parse_opkg_list(output: str) -> list[dict[str, str]]:
+    """Parse ``opkg list`` (``<name> - <version> - <description>`` lines)."""
+    packages = []
+    for line in output.strip().split("\n"):
+        if line:
+            parts = line.split(" - ")
+            if len(parts) >= 2:
+                packages.append({
+                    "name": parts[0],
+                    "version": parts[1],
+                    "description": parts[2] if len(parts) > 2 else "",
+                })
+    return packages
+
+
+def parse_key_values(output: str) -> dict[str, Any]:
+    """Parse ``Key: value`` lines (e.g. ``opkg info``) into snake_case keys."""
+    info = {}
+    for line in output.strip().split("\n"):
+        if ": " in line:
+            key, value = line.split(": ", 1)
+            info[key.lower().replace(" ", "_")] = value
+    return info
@@ -0,0 +1,155 @@
+"""Opt-in cProfile and tracemalloc profiling of individual tool calls."""
+
+import cProfile
+import io
+import logging
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Option accepted by every tool to profile that one call
+PROFILE_PROPERTY = {
+    "type": "boolean",
+    "description": (
+        "Profile this call (CPU and memory allocations) and write the report "
+        "to the server's profile directory"
+    ),
+    "default": False,
+}
+
+# Frames kept per allocation site in tracemalloc
+TRACEMALLOC_FRAMES = 5
+
+
+@dataclass
+class ProfileRun:
+    """Files written for one profiled call."""
+
+    tool: str
+    stats_path: Path
+    report_path: Path
+
+
+class ToolProfiler:
+    """
+    Profiles tool calls with cProfile and a tracemalloc snapshot diff.
+
+    cProfile is deterministic and per thread, so coroutines of other tool calls
+    that run on the loop while the profiled call is awaiting appear in its
+    profile too. Only one call is profiled at a time; overlapping requests run
+    unprofiled.
+    """
+
+    def __init__(
+        self,
+        tools: Optional[str] = None,
+        directory: Optional[str] = None,
+        top: Optional[int] = None,
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+            tools: Comma-separated tool names to always profile, or "*" for
+                all (defaults to settings; None profiles only on request)
+            directory: Where profiles are written (defaults to settings)
+            top: Number of functions and allocation sites in the report
+        """
+        tools = tools if tools is not None else settings.profile_tools
+        self.tools = {name.strip() for name in (tools or "").split(",") if name.strip()}
+        self.directory = Path(directory or settings.profile_dir)
+        self.top = top or settings.profile_top
+        self._active = False
+
+    def should_profile(self, tool: str, requested: bool = False) -> bool:
+        """Whether a call of ``tool`` is profiled."""
+        return requested or "*" in self.tools or tool in self.tools
+
+    @contextmanager
+    def profile(self, tool: str, requested: bool = False) -> Iterator[Optional[ProfileRun]]:
+        """
+        Profile the enclosed block if the tool is selected.
+
+        Args:
+            tool: Tool name (used in the file names)
+            requested: The caller asked for a profile of this call
+
+        Yields:
+            The files that will be written when the block exits, or None if
+            the call is not profiled
+        """
+        if not self.should_profile(tool, requested):
+            yield None
+            return
+        if self._active:
+            logger.warning(f"Not profiling {tool}: another call is being profiled")
+            yield None
+            return
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        run = ProfileRun(
+            tool=tool,
+            stats_path=self.directory / f"{tool}-{stamp}.prof",
+            report_path=self.directory / f"{tool}-{stamp}.txt",
+        )
+
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+
+        self._active = True
+        profiler.enable()
+        try:
+            yield run
+        finally:
+            profiler.disable()
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            self._active = False
+
+            try:
+                self._write(run, profiler, before, after, peak)
+                logger.info(f"Profile of {tool} written to {run.report_path}")
+            except OSError as e:
+                logger.error(f"Could not write profile of {tool}: {e}")
+
+    def _write(
+        self,
+        run: ProfileRun,
+        profiler: cProfile.Profile,
+        before: tracemalloc.Snapshot,
+        after: tracemalloc.Snapshot,
+        peak: int,
+    ) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(run.stats_path))
+
+        report = io.StringIO()
+        report.write(f"Profile of {run.tool}\n\n")
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(self.top)
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+        report.write(f"Top {self.top} allocation sites (growth during the call)\n")
+        report.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n\n")
+        for stat in diff[:self.top]:
+            report.write(f"{stat}\n")
+
+        run.report_path.write_text(report.getvalue(), encoding="utf-8")
+
+
+# Global profiler instance
+profiler = ToolProfiler()
@@ -0,0 +1,166 @@
+"""Declarative registry of MCP tools with precomputed schemas and validators."""
+
+import logging
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from jsonschema import Draft202012Validator
+from mcp.types import Tool
+
+from .profiling import PROFILE_PROPERTY
+from .shaping import add_shaping_properties
+from .snapshots import SNAPSHOT_PROPERTY
+from .tracing import TIMING_PROPERTY
+
+logger = logging.getLogger(__name__)
+
+ToolHandler = Callable[..., Awaitable[dict[str, Any]]]
+# Tells from a call's arguments whether it changes router state
+MutatingCheck = Callable[[dict[str, Any]], bool]
+
+
+@dataclass
+class ToolSpec:
+    """A registered tool: its MCP definition, validator and handler."""
+
+    name: str
+    handler: ToolHandler
+    tool: Tool
+    parameters: frozenset[str]
+    mutating: bool = False
+    delta: bool = False
+    requires_router: bool = True
+    mutating_check: Optional[MutatingCheck] = None
+
+    def is_mutating(self, arguments: dict[str, Any]) -> bool:
+        """Whether a call with ``arguments`` changes router state."""
+        if self.mutating_check is not None:
+            return self.mutating_check(arguments)
+        return self.mutating
+
+    @cached_property
+    def validator(self) -> Draft202012Validator:
+        """
+        Validator of the tool's arguments, compiled on first use.
+
+        Checking and compiling every schema at import time would delay the
+        server's startup by tens of milliseconds for tools that may never be
+        called.
+        """
+        Draft202012Validator.check_schema(self.tool.inputSchema)
+        return Draft202012Validator(self.tool.inputSchema)
+
+    def validate(self, arguments: dict[str, Any]) -> None:
+        """
+        Validate arguments against the tool's schema.
+
+        Raises:
+            ValueError: Describing the first invalid or missing argument
+        """
+        error = next(iter(self.validator.iter_errors(arguments)), None)
+        if error is None:
+            return
+        if error.validator == "required":
+            missing = [key for key in error.validator_value if key not in arguments]
+            raise ValueError(f"Missing required argument: {', '.join(missing)}")
+        location = ".".join(str(part) for part in error.absolute_path) or "arguments"
+        raise ValueError(f"Invalid argument '{location}': {error.message}")
+
+    def bind(self, arguments: dict[str, Any]) -> dict[str, Any]:
+        """Pick the handler's own keyword arguments out of the call arguments."""
+        return {key: value for key, value in arguments.items() if key in self.parameters}
+
+
+class ToolRegistry:
+    """Builds tool definitions once and dispatches calls by name."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._specs: dict[str, ToolSpec] = {}
+        self._tools: list[Tool] = []
+
+    def tool(
+        self,
+        name: str,
+        description: str,
+        properties: Optional[dict[str, Any]] = None,
+        required: Optional[list[str]] = None,
+        mutating: Union[bool, MutatingCheck] = False,
+        delta: bool = False,
+        requires_router: bool = True,
+    ) -> Callable[[ToolHandler], ToolHandler]:
+        """
+        Register an async function as an MCP tool.
+
+        Args:
+            name: Tool name exposed over MCP
+            description: Tool description
+            properties: JSON schema properties of the tool's own arguments
+            required: Names of required arguments
+            mutating: Whether the tool changes router state, or a function
+                telling it per call from the arguments
+            delta: Whether the tool supports snapshot/delta responses
+            requires_router: Whether the tool needs the router to be reachable
+
+        Returns:
+            Decorator returning the function unchanged
+        """
+        def decorator(handler: ToolHandler) -> ToolHandler:
+            if name in self._specs:
+                raise ValueError(f"Tool already registered: {name}")
+
+            own_properties: dict[str, Any] = dict(properties or {})
+            schema: dict[str, Any] = {
+                "type": "object",
+                "properties": dict(own_properties),
+                "required": list(required or []),
+            }
+            add_shaping_properties(schema)
+            schema["properties"].setdefault("include_timing", TIMING_PROPERTY)
+            schema["properties"].setdefault("profile", PROFILE_PROPERTY)
+            if delta:
+                schema["properties"]["snapshot"] = SNAPSHOT_PROPERTY
+
+            spec = ToolSpec(
+                name=name,
+                handler=handler,
+                tool=Tool(name=name, description=description, inputSchema=schema),
+                parameters=frozenset(own_properties),
+                mutating=bool(mutating),
+                delta=delta,
+                requires_router=requires_router,
+                mutating_check=mutating if callable(mutating) else None,
+            )
+            self._specs[name] = spec
+            self._tools.append(spec.tool)
+            return handler
+
+        return decorator
+
+    @property
+    def tools(self) -> list[Tool]:
+        """MCP tool definitions, in registration order."""
+        return self._tools
+
+    def get(self, name: str) -> ToolSpec:
+        """
+        Look up a registered tool.
+
+        Raises:
+            ValueError: If the tool is unknown
+        """
+        spec = self._specs.get(name)
+        if spec is None:
+            raise ValueError(f"Unknown tool: {name}")
+        return spec
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+
+# Global tool registry instance
+registry = ToolRegistry()
@@ -0,0 +1,233 @@
+"""Server-side store for large tool results with cursor-based pagination."""
+
+import json
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredResult:
+    """A large tool result kept server-side so it can be paged without re-running."""
+
+    field_name: str
+    kind: str  # "list" for parsed items, "text" for raw output lines
+    items: list
+    size_bytes: int
+    created_at: float = field(default_factory=time.monotonic)
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class ResultStore:
+    """LRU/TTL bounded store of large tool results, addressed by opaque cursors."""
+
+    def __init__(
+        self,
+        page_size: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        """Initialize the store (limits default to the configured settings)."""
+        self.page_size = page_size or settings.result_page_size
+        self.max_entries = max_entries or settings.result_store_max_entries
+        self.max_bytes = max_bytes or settings.result_store_max_bytes
+        self.ttl = ttl or settings.result_store_ttl
+        self._entries: "OrderedDict[str, StoredResult]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        """Approximate memory held by stored results."""
+        return self._total_bytes
+
+    def paginate(self, result: dict[str, Any]) -> dict[str, Any]:
+        """
+        Replace the largest oversized field of a tool result with its first page.
+
+        Only top-level lists with more than ``page_size`` items and strings with
+        more than ``page_size`` lines are considered. The full value is stored
+        once and a cursor for the next page is added under ``pagination``.
+
+        Args:
+            result: Tool result dictionary
+
+        Returns:
+            dict: The result, paginated if it was too large
+        """
+        if not isinstance(result, dict) or not result.get("success", True):
+            return result
+        if "pagination" in result:
+            # Already a page (e.g. from fetch)
+            return result
+
+        candidate = self._find_oversized_field(result)
+        if candidate is None:
+            return result
+
+        field_name, kind, items = candidate
+        size_bytes = len(json.dumps(items, ensure_ascii=False))
+        stored = StoredResult(field_name=field_name, kind=kind, items=items, size_bytes=size_bytes)
+
+        result_id = self._put(stored)
+        page, pagination = self._page(result_id, stored, 0, self.page_size)
+
+        shaped = dict(result)
+        shaped[field_name] = page
+        shaped["pagination"] = pagination
+        return shaped
+
+    def fetch(
+        self, cursor: str, offset: Optional[int] = None, limit: Optional[int] = None
+    ) -> dict[str, Any]:
+        """
+        Fetch a page (or an arbitrary slice) of a stored result.
+
+        Args:
+            cursor: Cursor returned by a previous page
+            offset: Explicit item offset (overrides the cursor's offset)
+            limit: Number of items to return (defaults to the page size)
+
+        Returns:
+            dict: Page of the stored result with updated pagination info
+        """
+        result_id, _, cursor_offset = cursor.partition(":")
+        stored = self._get(result_id)
+        if stored is None:
+            self.misses += 1
+            return {
+                "success": False,
+                "error": "Unknown or expired cursor. Re-run the original tool to get a new one.",
+            }
+        self.hits += 1
+
+        if offset is None:
+            try:
+                offset = int(cursor_offset or 0)
+            except ValueError:
+                return {"success": False, "error": f"Malformed cursor: {cursor}"}
+
+        if offset < 0:
+            return {"success": False, "error": "offset must be >= 0"}
+
+        limit = limit or self.page_size
+        if limit < 1:
+            return {"success": False, "error": "limit must be >= 1"}
+
+        page, pagination = self._page(result_id, stored, offset, limit)
+        return {
+            "success": True,
+            stored.field_name: page,
+            "pagination": pagination,
+        }
+
+    def clear(self) -> None:
+        """Drop all stored results."""
+        self._entries.clear()
+        self._total_bytes = 0
+
+    def _find_oversized_field(self, result: dict[str, Any]) -> Optional[tuple[str, str, list]]:
+        """Pick the largest top-level field exceeding the page size, if any."""
+        best: Optional[tuple[str, str, list]] = None
+        for key, value in result.items():
+            if isinstance(value, list):
+                kind, items = "list", value
+            elif isinstance(value, str) and value.count("\n") >= self.page_size:
+                kind, items = "text", value.split("\n")
+            else:
+                continue
+
+            if len(items) > self.page_size and (best is None or len(items) > len(best[2])):
+                best = (key, kind, items)
+        return best
+
+    def _page(
+        self, result_id: Optional[str], stored: StoredResult, offset: int, limit: int
+    ) -> tuple[Any, dict[str, Any]]:
+        """Slice a stored result and build its pagination metadata."""
+        total = len(stored.items)
+        chunk = stored.items[offset:offset + limit]
+        next_offset = offset + len(chunk)
+        has_more = next_offset < total
+
+        pagination = {
+            "field": stored.field_name,
+            "offset": offset,
+            "returned": len(chunk),
+            "total": total,
+            "has_more": has_more,
+            "next_cursor": f"{result_id}:{next_offset}" if has_more and result_id else None,
+        }
+        if has_more and not result_id:
+            pagination["note"] = (
+                "Result too large to keep server-side; narrow the request to see more."
+            )
+
+        page = "\n".join(chunk) if stored.kind == "text" else chunk
+        return page, pagination
+
+    def _put(self, stored: StoredResult) -> Optional[str]:
+        """Store a result, evicting old entries as needed. Returns its id."""
+        if stored.size_bytes > self.max_bytes:
+            logger.warning(
+                f"Result for '{stored.field_name}' ({stored.size_bytes} bytes) exceeds "
+                f"result store limit ({self.max_bytes} bytes); returning first page only"
+            )
+            return None
+
+        self._evict_expired()
+        while self._entries and (
+            len(self._entries) >= self.max_entries
+            or self._total_bytes + stored.size_bytes > self.max_bytes
+        ):
+            self._evict_oldest()
+
+        result_id = secrets.token_urlsafe(9)
+        self._entries[result_id] = stored
+        self._total_bytes += stored.size_bytes
+        logger.debug(
+            f"Stored result {result_id} ({len(stored.items)} items, {stored.size_bytes} bytes)"
+        )
+        return result_id
+
+    def _get(self, result_id: str) -> Optional[StoredResult]:
+        """Look up a stored result, honouring TTL and refreshing LRU order."""
+        self._evict_expired()
+        stored = self._entries.get(result_id)
+        if stored is None:
+            return None
+        stored.last_access = time.monotonic()
+        self._entries.move_to_end(result_id)
+        return stored
+
+    def _evict_expired(self) -> None:
+        """Remove entries not accessed within the TTL."""
+        cutoff = time.monotonic() - self.ttl
+        expired = [rid for rid, stored in self._entries.items() if stored.last_access < cutoff]
+        for result_id in expired:
+            self._remove(result_id)
+
+    def _evict_oldest(self) -> None:
+        """Remove the least recently used entry."""
+        result_id = next(iter(self._entries))
+        self._remove(result_id)
+
+    def _remove(self, result_id: str) -> None:
+        stored = self._entries.pop(result_id)
+        self._total_bytes -= stored.size_bytes
+
+
+# Global result store instance
+result_store = ResultStore()
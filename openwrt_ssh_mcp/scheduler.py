@@ -0,0 +1,128 @@
+"""Priority classes for router commands and serialization of mutating tools."""
+
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from .concurrency import AdaptiveLimiter
+from .metrics import Histogram
+
+# Priority classes, most urgent first
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+WRITE = "write"
+PRIORITY_CLASSES = (INTERACTIVE, BACKGROUND, WRITE)
+
+_current_class: ContextVar[str] = ContextVar("priority_class", default=INTERACTIVE)
+
+
+def current_class() -> str:
+    """Priority class of the code running in this context."""
+    return _current_class.get()
+
+
+@contextmanager
+def priority_class(name: str) -> Iterator[None]:
+    """Run the enclosed block's commands in priority class ``name``."""
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {name}")
+    token = _current_class.set(name)
+    try:
+        yield
+    finally:
+        _current_class.reset(token)
+
+
+class RouterScheduler:
+    """
+    Orders one router's commands by priority class.
+
+    Commands of read tools run as interactive, metrics polling and health
+    probes as background, and commands of mutating tools as write: when
+    commands queue for a slot, interactive ones are served first, and a
+    command queued long enough moves up a class (see AdaptiveLimiter). One
+    slot is always kept for interactive commands, and mutating tools run one
+    at a time per router, so a long write never holds up reads. A running
+    command is never preempted.
+    """
+
+    def __init__(self):
+        """Initialize with empty queues."""
+        self.queued: dict[str, int] = defaultdict(int)
+        self.waits: dict[str, Histogram] = defaultdict(Histogram)
+        self.writes_waiting = 0
+        self.write_wait = Histogram()
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._write_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @asynccontextmanager
+    async def tool(self, mutating: bool) -> AsyncIterator[None]:
+        """
+        Run a tool call in its priority class.
+
+        Args:
+            mutating: The tool changes router state; it waits for other
+                mutating tools on this router to finish first
+        """
+        if not mutating:
+            with priority_class(INTERACTIVE):
+                yield
+            return
+
+        start = time.perf_counter()
+        lock = self._get_write_lock()
+        self.writes_waiting += 1
+        try:
+            await lock.acquire()
+        finally:
+            self.writes_waiting -= 1
+        self.write_wait.record(time.perf_counter() - start)
+        try:
+            with priority_class(WRITE):
+                yield
+        finally:
+            lock.release()
+
+    async def acquire(self, limiter: AdaptiveLimiter) -> float:
+        """
+        Wait for a command slot at the current class's priority.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        name = current_class()
+        start = time.perf_counter()
+        self.queued[name] += 1
+        try:
+            await limiter.acquire(PRIORITY_CLASSES.index(name))
+        finally:
+            self.queued[name] -= 1
+        waited = time.perf_counter() - start
+        self.waits[name].record(waited)
+        return waited
+
+    def release(self, limiter: AdaptiveLimiter) -> None:
+        """Give back a slot taken with acquire() in this context."""
+        limiter.release(PRIORITY_CLASSES.index(current_class()))
+
+    def _get_write_lock(self) -> asyncio.Lock:
+        # Locks are bound to one event loop; the global client may outlive it
+        loop = asyncio.get_running_loop()
+        if self._write_lock is None or self._write_lock_loop is not loop:
+            self._write_lock = asyncio.Lock()
+            self._write_lock_loop = loop
+        return self._write_lock
+
+    def snapshot(self) -> dict[str, Any]:
+        """Queue depth and slot wait times per class, and the write lock."""
+        return {
+            "classes": {
+                name: {"queued": self.queued[name], "wait": self.waits[name].summary()}
+                for name in PRIORITY_CLASSES
+            },
+            "writes_waiting": self.writes_waiting,
+            "write_lock_wait": self.write_wait.summary(),
+        }
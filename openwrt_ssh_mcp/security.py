@@ -32,7 +32,7 @@ class SecurityValidator:
         r"^uci get \w+\.\S+$",  # Get specific UCI value
         
         # System information (read-only)
-        r"^cat /proc/(uptime|meminfo|cpuinfo|loadavg)$",
+        r"^cat /proc/(uptime|meminfo|cpuinfo|loadavg|net/dev)$",
         r"^cat /etc/openwrt_release$",
         r"^ip addr show$",
         r"^ip route show$",
@@ -125,6 +125,44 @@ class SecurityValidator:
         r"telnet",  # Insecure telnet
     ]
 
+    # Commands that only read router state, matched as a whole. Anything else,
+    # and any command containing SHELL_METACHARACTERS, is treated as mutating
+    # and never shares a result with another caller.
+    READ_ONLY_PATTERNS = [
+        r"^echo( .*)?$",
+        r"^ubus call network\.wireless status$",
+        r"^ubus call network\.interface\.\w+ status$",
+        r"^ubus call system (board|info)$",
+        r"^ubus list( \S+)?$",
+        r"^uci (show( \S+)?|get \S+)$",
+        r"^cat \S+$",
+        r"^ip (addr|route) show$",
+        r"^(df -h|free|uptime|ps|ps w|top -n 1 -b)$",
+        r"^iptables (-t \w+ )?-L -n -v$",
+        r"^(/usr/sbin/)?ot-ctl (state|channel|panid|networkkey|networkname|extpanid|ifconfig"
+        r"|prefix|ipaddr|rloc16|leaderdata)$",
+        r"^(/usr/sbin/)?ot-ctl (neighbor|router|child) table$",
+        r"^(/usr/sbin/)?ot-ctl dataset (active|pending)( -x)?$",
+        r"^opkg (list|list-installed|list-upgradable)$",
+        r"^opkg (info|search) [a-zA-Z0-9._-]+$",
+    ]
+
+    # Command separators, pipes, redirections and substitutions
+    SHELL_METACHARACTERS = re.compile(r"[;&|<>$`\n]")
+
+    @classmethod
+    def is_mutating(cls, command: str) -> bool:
+        """
+        Whether a command may change router state.
+
+        Commands not known to be read-only, and commands containing shell
+        metacharacters, count as mutating.
+        """
+        command = command.strip()
+        if cls.SHELL_METACHARACTERS.search(command):
+            return True
+        return not any(re.match(pattern, command) for pattern in cls.READ_ONLY_PATTERNS)
+
     @classmethod
     def validate_command(cls, command: str) -> tuple[bool, Optional[str]]:
         """
@@ -243,6 +281,20 @@ class AuditLogger:
         
         self.logger.info(log_message)
 
+    def log_process_kill(self, command: str, signal: str, reason: str):
+        """
+        Log a remote command stopped before it finished.
+
+        Args:
+            command: The command that was stopped
+            signal: Last signal sent (TERM or KILL)
+            reason: Why and how it was stopped
+        """
+        if not settings.enable_audit_logging:
+            return
+
+        self.logger.warning(f"PROCESS KILLED: {command} | SIGNAL: {signal} | REASON: {reason}")
+
 
 # Global audit logger instance
 audit_logger = AuditLogger()
@@ -3,15 +3,27 @@
 import asyncio
 import logging
 import sys
-from typing import Any
+import time
+from typing import Any, Optional
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
 from .config import settings
+from .loop_monitor import loop_monitor
+from .metrics import metrics
+from .offload import offloader
+from .profiling import profiler
+from .registry import ToolSpec, registry
+from .result_store import result_store
+from .sessions import session_limiter
+from .shaping import project, serialize
+from .snapshots import snapshot_store
+from .timeouts import timeout_policy
 from .ssh_client import ssh_client
-from .tools import OpenWRTTools
+from .tracing import timing_breakdown, tracer
+from .tools import OpenWRTTools  # noqa: F401 - registers the router tools
 
 # Configure logging
 logging.basicConfig(
@@ -28,357 +40,242 @@ logger = logging.getLogger(__name__)
 app = Server("openwrt-ssh-mcp")
 
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """List available OpenWRT management tools."""
-    return [
-        Tool(
-            name="openwrt_test_connection",
-            description="Test SSH connection to the OpenWRT router",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_execute_command",
-            description=(
-                "Execute a validated shell command on the OpenWRT router. "
-                "Commands are validated against a security whitelist. "
-                "Use this for commands not covered by other specialized tools."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "command": {
-                        "type": "string",
-                        "description": "Shell command to execute (must be in whitelist)",
-                    },
-                },
-                "required": ["command"],
-            },
-        ),
-        Tool(
-            name="openwrt_get_system_info",
-            description=(
-                "Get comprehensive system information including board details, "
-                "uptime, memory usage, and CPU load"
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_restart_interface",
-            description="Restart a network interface (e.g., wan, lan, wlan0)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "interface": {
-                        "type": "string",
-                        "description": "Interface name to restart (e.g., 'wan', 'lan')",
-                    },
-                },
-                "required": ["interface"],
-            },
-        ),
-        Tool(
-            name="openwrt_get_wifi_status",
-            description="Get WiFi status including connected clients and signal strength",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_list_dhcp_leases",
-            description="List all DHCP leases (connected devices with IP/MAC addresses)",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_get_firewall_rules",
-            description="Get current firewall rules (iptables)",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_read_config",
-            description=(
-                "Read a UCI configuration file. "
-                "Allowed configs: network, wireless, dhcp, firewall, system"
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "config_name": {
-                        "type": "string",
-                        "description": "Configuration name (e.g., 'network', 'wireless')",
-                        "enum": ["network", "wireless", "dhcp", "firewall", "system"],
-                    },
-                },
-                "required": ["config_name"],
-            },
-        ),
-        # OpenThread Border Router (OTBR) Tools
-        Tool(
-            name="openwrt_thread_get_state",
-            description="Get current OpenThread network state (disabled, detached, child, router, leader)",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_thread_create_network",
-            description=(
-                "Create a new Thread network with specified parameters. "
-                "This will initialize a new Thread network, configure it, and start it. "
-                "Returns network credentials including network key and dataset."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "network_name": {
-                        "type": "string",
-                        "description": "Network name (default: OpenWRT-Thread)",
-                        "default": "OpenWRT-Thread",
-                    },
-                    "channel": {
-                        "type": "integer",
-                        "description": "Thread channel between 11-26 (default: 15)",
-                        "minimum": 11,
-                        "maximum": 26,
-                        "default": 15,
-                    },
-                    "panid": {
-                        "type": "string",
-                        "description": "PAN ID in hex format (e.g., 0x1234). Auto-generated if not provided.",
-                    },
-                },
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_thread_get_dataset",
-            description=(
-                "Get active Thread dataset (network credentials). "
-                "Returns dataset in both human-readable and hex format for sharing."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_thread_get_info",
-            description=(
-                "Get comprehensive Thread network information including state, "
-                "channel, PAN ID, network name, IP addresses, neighbors, and children."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_thread_enable_commissioner",
-            description=(
-                "Enable Thread Commissioner to allow new devices to join the network. "
-                "Devices can join using the provided passphrase."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "passphrase": {
-                        "type": "string",
-                        "description": "Joiner passphrase for devices (default: THREAD123)",
-                        "default": "THREAD123",
-                    },
-                },
-                "required": [],
-            },
-        ),
-        # Package Management (opkg) Tools
-        Tool(
-            name="openwrt_opkg_update",
-            description="Update package lists from repositories (opkg update)",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_opkg_install",
-            description="Install a package using opkg",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "package_name": {
-                        "type": "string",
-                        "description": "Name of the package to install (e.g., 'luci-app-openthread', 'ot-br-posix')",
-                    },
-                },
-                "required": ["package_name"],
-            },
-        ),
-        Tool(
-            name="openwrt_opkg_remove",
-            description="Remove a package using opkg",
-            inputSchema={
+@registry.tool(
+    name="openwrt_fetch_result",
+    description=(
+        "Fetch further pages (or a slice) of a large result returned by another tool, "
+        "without re-running the command on the router. Pass the 'next_cursor' value "
+        "from the previous response's 'pagination' field."
+    ),
+    properties={
+        "cursor": {
+            "type": "string",
+            "minLength": 1,
+            "description": "Cursor from a previous response's pagination.next_cursor",
+        },
+        "offset": {
+            "type": "integer",
+            "description": "Optional item offset to fetch instead of the cursor's",
+            "minimum": 0,
+        },
+        "limit": {
+            "type": "integer",
+            "description": "Optional number of items to return (default: page size)",
+            "minimum": 1,
+        },
+    },
+    required=["cursor"],
+    requires_router=False,
+)
+async def fetch_result(
+    cursor: str, offset: Optional[int] = None, limit: Optional[int] = None
+) -> dict[str, Any]:
+    """Serve a page of a stored result."""
+    return result_store.fetch(cursor, offset, limit)
+
+
+@registry.tool(
+    name="openwrt_batch",
+    description=(
+        "Run several tools in one request. Read tools run concurrently, tools "
+        "that change router state run sequentially in the given order. Returns "
+        "per-call status, timing and result."
+    ),
+    properties={
+        "calls": {
+            "type": "array",
+            "description": "Tool invocations to run",
+            "items": {
                 "type": "object",
                 "properties": {
-                    "package_name": {
+                    "tool": {
                         "type": "string",
-                        "description": "Name of the package to remove",
+                        "description": "Tool name (e.g. 'openwrt_get_system_info')",
                     },
-                },
-                "required": ["package_name"],
-            },
-        ),
-        Tool(
-            name="openwrt_opkg_list_installed",
-            description="List all installed packages on the router",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-        Tool(
-            name="openwrt_opkg_info",
-            description="Get detailed information about a specific package",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "package_name": {
-                        "type": "string",
-                        "description": "Name of the package",
+                    "arguments": {
+                        "type": "object",
+                        "description": "Arguments for the tool",
                     },
                 },
-                "required": ["package_name"],
+                "required": ["tool"],
             },
-        ),
-        Tool(
-            name="openwrt_opkg_list_available",
-            description="List available packages from repositories (limited to 500 packages)",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        ),
-    ]
+            "minItems": 1,
+        },
+        "parallel": {
+            "type": "boolean",
+            "description": "Run independent read tools concurrently (default: true)",
+            "default": True,
+        },
+    },
+    required=["calls"],
+    requires_router=False,
+)
+async def run_batch(calls: list[dict[str, Any]], parallel: bool = True) -> dict[str, Any]:
+    """
+    Run several tool invocations in one request.
+
+    Tools that change router state run one after another in the given order,
+    each after every call listed before it has finished. The read tools
+    between two of them run concurrently (bounded by the SSH client's
+    per-router limit).
+
+    Args:
+        calls: List of ``{"tool": name, "arguments": {...}}`` invocations
+        parallel: Run independent read tools concurrently
+
+    Returns:
+        dict: Per-invocation status, timing and result, in request order
+    """
+    if not isinstance(calls, list) or not calls:
+        raise ValueError("Missing required argument: calls (non-empty list)")
+    if len(calls) > settings.batch_max_calls:
+        raise ValueError(f"Too many calls in batch: {len(calls)} > {settings.batch_max_calls}")
+
+    batch_start = time.perf_counter()
+
+    def tool_of(call: Any) -> Optional[str]:
+        tool = call.get("tool") if isinstance(call, dict) else None
+        return tool if isinstance(tool, str) and tool else None
+
+    async def run_item(index: int, call: Any) -> dict[str, Any]:
+        tool = tool_of(call)
+        item: dict[str, Any] = {"index": index, "tool": tool}
+        start = time.perf_counter()
+
+        arguments = (call.get("arguments") or {}) if isinstance(call, dict) else None
+        if tool is None:
+            item.update(status="error", error="'tool' must be a non-empty string")
+            return item
+        if tool not in registry or tool == "openwrt_batch":
+            item.update(status="error", error=f"Invalid or unknown tool: {tool}")
+            return item
+        if not isinstance(arguments, dict):
+            item.update(status="error", error="'arguments' must be an object")
+            return item
+
+        try:
+            result = await dispatch_tool(tool, arguments)
+            item["status"] = "ok" if result.get("success", True) else "failed"
+            item["result"] = result
+        except Exception as e:
+            logger.error(f"Batch item {index} ({tool}) failed: {e}")
+            item.update(status="error", error=str(e))
+
+        item["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return item
+
+    items: list[dict[str, Any]] = []
+    # Reads listed since the last write
+    reads: list[tuple[int, Any]] = []
+
+    async def run_reads() -> None:
+        items.extend(await asyncio.gather(*(run_item(index, call) for index, call in reads)))
+        reads.clear()
+
+    for index, call in enumerate(calls):
+        tool = tool_of(call)
+        arguments = call.get("arguments") if isinstance(call, dict) else None
+        if parallel and tool is not None and tool in registry and not registry.get(tool).is_mutating(arguments or {}):
+            reads.append((index, call))
+            continue
+        # A write is a barrier: reads listed before it finish first, and reads
+        # listed after it see its effect
+        await run_reads()
+        items.append(await run_item(index, call))
+    await run_reads()
+
+    succeeded = sum(1 for item in items if item["status"] == "ok")
+    return {
+        "success": succeeded == len(items),
+        "results": items,
+        "count": len(items),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "duration_ms": round((time.perf_counter() - batch_start) * 1000, 2),
+    }
+
+
+@registry.tool(
+    name="openwrt_metrics",
+    description=(
+        "Latency histograms of this MCP server: per tool (total, queue wait, "
+        "channel open, remote runtime, parse, serialize) and per SSH command "
+        "template, with p50/p90/p99/max in milliseconds, plus event-loop lag "
+        "and recent stalls (code that blocked the loop, with its stack)."
+    ),
+    properties={
+        "tool": {
+            "type": "string",
+            "description": "Only report this tool (commands are always reported)",
+        },
+        "reset": {
+            "type": "boolean",
+            "description": "Clear all histograms after reading them (default: false)",
+            "default": False,
+        },
+    },
+    requires_router=False,
+)
+async def get_metrics(tool: Optional[str] = None, reset: bool = False) -> dict[str, Any]:
+    """Report the server's latency histograms."""
+    snapshot = metrics.snapshot(tool)
+    snapshot["event_loop"] = loop_monitor.snapshot()
+    snapshot["parse_offload"] = offloader.snapshot()
+    snapshot["timeouts"] = timeout_policy.snapshot()
+    snapshot["concurrency"] = ssh_client.limiter.snapshot()
+    snapshot["scheduler"] = ssh_client.scheduler.snapshot()
+    snapshot["sessions"] = session_limiter.snapshot()
+    if reset:
+        metrics.reset()
+        loop_monitor.reset()
+    return {"success": True, **snapshot}
+
+
+def current_session() -> Any:
+    """MCP session of the request being handled (None outside of a request)."""
+    try:
+        return app.request_context.session
+    except LookupError:
+        return None
+
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """List available OpenWRT management tools."""
+    return registry.tools
 
 
 @app.call_tool()
 async def call_tool(name: str, arguments: Any) -> list[TextContent]:
     """Handle tool execution requests."""
+    arguments = arguments or {}
     try:
         logger.info(f"Tool called: {name} with arguments: {arguments}")
-
-        # Route to appropriate tool
-        if name == "openwrt_test_connection":
-            result = await OpenWRTTools.test_connection()
-
-        elif name == "openwrt_execute_command":
-            command = arguments.get("command")
-            if not command:
-                raise ValueError("Missing required argument: command")
-            result = await OpenWRTTools.execute_command(command)
-
-        elif name == "openwrt_get_system_info":
-            result = await OpenWRTTools.get_system_info()
-
-        elif name == "openwrt_restart_interface":
-            interface = arguments.get("interface")
-            if not interface:
-                raise ValueError("Missing required argument: interface")
-            result = await OpenWRTTools.restart_interface(interface)
-
-        elif name == "openwrt_get_wifi_status":
-            result = await OpenWRTTools.get_wifi_status()
-
-        elif name == "openwrt_list_dhcp_leases":
-            result = await OpenWRTTools.list_dhcp_leases()
-
-        elif name == "openwrt_get_firewall_rules":
-            result = await OpenWRTTools.get_firewall_rules()
-
-        elif name == "openwrt_read_config":
-            config_name = arguments.get("config_name")
-            if not config_name:
-                raise ValueError("Missing required argument: config_name")
-            result = await OpenWRTTools.read_config(config_name)
-
-        # OpenThread Border Router tools
-        elif name == "openwrt_thread_get_state":
-            result = await OpenWRTTools.thread_get_state()
-
-        elif name == "openwrt_thread_create_network":
-            network_name = arguments.get("network_name", "OpenWRT-Thread")
-            channel = arguments.get("channel", 15)
-            panid = arguments.get("panid")
-            result = await OpenWRTTools.thread_create_network(network_name, channel, panid)
-
-        elif name == "openwrt_thread_get_dataset":
-            result = await OpenWRTTools.thread_get_dataset()
-
-        elif name == "openwrt_thread_get_info":
-            result = await OpenWRTTools.thread_get_info()
-
-        elif name == "openwrt_thread_enable_commissioner":
-            passphrase = arguments.get("passphrase", "THREAD123")
-            result = await OpenWRTTools.thread_enable_commissioner(passphrase)
-
-        # Package management tools
-        elif name == "openwrt_opkg_update":
-            result = await OpenWRTTools.opkg_update()
-
-        elif name == "openwrt_opkg_install":
-            package_name = arguments.get("package_name")
-            if not package_name:
-                raise ValueError("Missing required argument: package_name")
-            result = await OpenWRTTools.opkg_install(package_name)
-
-        elif name == "openwrt_opkg_remove":
-            package_name = arguments.get("package_name")
-            if not package_name:
-                raise ValueError("Missing required argument: package_name")
-            result = await OpenWRTTools.opkg_remove(package_name)
-
-        elif name == "openwrt_opkg_list_installed":
-            result = await OpenWRTTools.opkg_list_installed()
-
-        elif name == "openwrt_opkg_info":
-            package_name = arguments.get("package_name")
-            if not package_name:
-                raise ValueError("Missing required argument: package_name")
-            result = await OpenWRTTools.opkg_info(package_name)
-
-        elif name == "openwrt_opkg_list_available":
-            result = await OpenWRTTools.opkg_list_available()
-
-        else:
-            raise ValueError(f"Unknown tool: {name}")
-
-        # Format response
-        import json
-        response_text = json.dumps(result, indent=2, ensure_ascii=False)
+        include_timing = bool(arguments.get("include_timing"))
+        profile_requested = bool(arguments.get("profile"))
+        # Over HTTP each client session runs a bounded number of calls at once;
+        # the single stdio client keeps every command slot
+        session = current_session() if settings.mcp_transport == "http" else None
+        async with session_limiter.slot(session):
+            with (
+                profiler.profile(name, profile_requested) as profile,
+                tracer.span(f"tool {name}", force=include_timing, tool=name) as root,
+            ):
+                result = await dispatch_tool(name, arguments)
+                if include_timing and root is not None:
+                    result = {**result, "timing": timing_breakdown(root)}
+                if profile_requested and profile is not None:
+                    result = {**result, "profile": {
+                        "stats": str(profile.stats_path),
+                        "report": str(profile.report_path),
+                    }}
+
+                # Format response
+                start = time.perf_counter()
+                with tracer.span("serialize"):
+                    response_text = serialize(result, arguments.get("compact"))
+                if name in registry:
+                    metrics.record_serialize(name, time.perf_counter() - start)
 
         return [
             TextContent(
@@ -393,17 +290,80 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
             "success": False,
             "error": str(e),
         }
-        import json
         return [
             TextContent(
                 type="text",
-                text=json.dumps(error_response, indent=2),
+                text=serialize(error_response, arguments.get("compact")),
             )
         ]
 
 
+async def dispatch_tool(name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+    """
+    Validate arguments, run a tool and shape its result.
+
+    Args:
+        name: Tool name
+        arguments: Tool arguments
+
+    Returns:
+        dict: Shaped tool result
+
+    Raises:
+        ValueError: If the tool is unknown or its arguments are invalid
+    """
+    spec = registry.get(name)
+    call, token = metrics.begin_call(name)
+    start = time.perf_counter()
+    handler_time = 0.0
+    result = None
+    try:
+        with tracer.span(f"dispatch {name}", tool=name):
+            with tracer.span("validate"):
+                spec.validate(arguments)
+            if spec.requires_router and not ssh_client.breaker.allows_requests():
+                # Router known to be down: answer now instead of waiting for timeouts
+                result = ssh_client.breaker.unavailable()
+                return result
+            # Mutating tools run one at a time per router, behind pending reads
+            async with ssh_client.scheduler.tool(
+                spec.requires_router and spec.is_mutating(arguments)
+            ):
+                handler_start = time.perf_counter()
+                try:
+                    with tracer.span("handler", tool=name):
+                        result = await spec.handler(**spec.bind(arguments))
+                finally:
+                    handler_time = time.perf_counter() - handler_start
+            with tracer.span("shape"):
+                result = shape_result(spec, arguments, result)
+            return result
+    finally:
+        metrics.end_call(
+            call, token, time.perf_counter() - start, handler_time,
+            ok=bool(result and result.get("success", True)),
+        )
+
+
+def shape_result(spec: ToolSpec, arguments: dict[str, Any], result: dict[str, Any]) -> dict:
+    """Apply field projection, snapshot deltas and pagination to a tool result."""
+    # Drop fields the caller did not ask for, then page what is still large
+    result = project(result, arguments.get("fields"))
+
+    # Answer polling tools with changes since the caller's snapshot
+    if spec.delta and "snapshot" in arguments and result.get("success"):
+        state = {key: value for key, value in result.items() if key != "success"}
+        delta = snapshot_store.delta(
+            settings.router_id, spec.name, state, arguments.get("snapshot")
+        )
+        result = {"success": True, **delta} if delta["delta"] else {**result, **delta}
+
+    return result_store.paginate(result)
+
+
 async def main():
     """Main entry point for the MCP server."""
+    exporter = None
     try:
         # Validate configuration
         logger.info("Starting OpenWRT SSH MCP Server...")
@@ -415,22 +375,32 @@ async def main():
         logger.info(f"Command validation: {'enabled' if settings.enable_command_validation else 'DISABLED'}")
         logger.info(f"Audit logging: {'enabled' if settings.enable_audit_logging else 'disabled'}")
 
-        # Connect to router
-        logger.info("Establishing SSH connection...")
-        connected = await ssh_client.connect()
-        
-        if not connected:
-            logger.error("Failed to establish SSH connection. Server may not function properly.")
-            logger.warning("Continuing anyway - connection will be retried on first tool call")
+        # Connect to router in the background: initialize and list_tools are
+        # answered meanwhile, and commands wait for the connection
+        ssh_client.connect_in_background()
+
+        if settings.enable_loop_monitor:
+            loop_monitor.start()
+
+        # Optional Prometheus/OpenMetrics endpoint
+        if settings.metrics_port is not None:
+            from .exporter import MetricsExporter
+
+            exporter = await MetricsExporter().start()
 
         # Run MCP server
-        logger.info("MCP Server ready - waiting for requests...")
-        async with stdio_server() as (read_stream, write_stream):
-            await app.run(
-                read_stream,
-                write_stream,
-                app.create_initialization_options(),
-            )
+        if settings.mcp_transport == "http":
+            from .http_server import MCPHTTPServer
+
+            await MCPHTTPServer(app).serve()
+        else:
+            logger.info("MCP Server ready - waiting for requests...")
+            async with stdio_server() as (read_stream, write_stream):
+                await app.run(
+                    read_stream,
+                    write_stream,
+                    app.create_initialization_options(),
+                )
 
     except KeyboardInterrupt:
         logger.info("Server interrupted by user")
@@ -440,6 +410,10 @@ async def main():
     finally:
         # Cleanup
         logger.info("Shutting down...")
+        if exporter:
+            await exporter.stop()
+        await loop_monitor.stop()
+        offloader.shutdown()
         await ssh_client.disconnect()
         logger.info("Server stopped")
 
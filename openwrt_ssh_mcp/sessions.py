@@ -0,0 +1,83 @@
+"""Per-session limit on concurrent tool calls when serving many MCP clients."""
+
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from .config import settings
+from .metrics import Histogram
+
+
+@dataclass
+class _SessionSlots:
+    semaphore: asyncio.Semaphore
+    running: int = 0
+
+
+class SessionLimiter:
+    """
+    Bounds the tool calls each MCP session runs at once.
+
+    One busy client (e.g. an agent firing dozens of calls) then waits for its
+    own earlier calls instead of filling the router's command slots, which
+    every session shares, ahead of the other clients. Sessions are tracked
+    weakly and forgotten once closed.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_concurrent: Tool calls one session may run at once (defaults
+                to settings)
+        """
+        self.max_concurrent = max_concurrent or settings.mcp_session_max_concurrent_tools
+        self.calls = 0
+        self.wait = Histogram()
+        self._sessions: weakref.WeakKeyDictionary[Any, _SessionSlots] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @asynccontextmanager
+    async def slot(self, session: Any) -> AsyncIterator[None]:
+        """
+        Run a tool call of ``session``, waiting while it has too many running.
+
+        Args:
+            session: The calling session (None outside of a session: no limit)
+        """
+        if session is None:
+            yield
+            return
+
+        slots = self._sessions.get(session)
+        if slots is None:
+            slots = self._sessions[session] = _SessionSlots(asyncio.Semaphore(self.max_concurrent))
+        start = time.perf_counter()
+        async with slots.semaphore:
+            self.wait.record(time.perf_counter() - start)
+            slots.running += 1
+            self.calls += 1
+            try:
+                yield
+            finally:
+                slots.running -= 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Open sessions, their running calls and slot wait times."""
+        sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "max_concurrent_per_session": self.max_concurrent,
+            "running": sum(slots.running for slots in sessions),
+            "calls": self.calls,
+            "wait": self.wait.summary(),
+        }
+
+
+# Global session limiter instance
+session_limiter = SessionLimiter()
@@ -0,0 +1,128 @@
+"""Response shaping: field projection and compact serialization of tool results."""
+
+import json
+import re
+from typing import Any, Optional, Union
+
+# Keys always kept by a projection so callers can still tell success from failure
+ALWAYS_KEPT_KEYS = ("success", "error", "pagination")
+
+# Options accepted by every tool in addition to its own arguments
+SHAPING_PROPERTIES = {
+    "fields": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": (
+            "Optional projection: dotted paths of the fields to return "
+            "(e.g. 'system_info.board.model', 'packages.*.name'). "
+            "'*' matches any key or list item; a leading '$.' is accepted."
+        ),
+    },
+    "compact": {
+        "type": "boolean",
+        "description": "Return minified JSON without indentation",
+        "default": False,
+    },
+}
+
+_MISSING = object()
+_INDEX_RE = re.compile(r"\[(\*|\d+)\]")
+
+
+def add_shaping_properties(schema: dict[str, Any]) -> dict[str, Any]:
+    """Add the common shaping options to a tool input schema."""
+    properties = schema.setdefault("properties", {})
+    for key, spec in SHAPING_PROPERTIES.items():
+        properties.setdefault(key, spec)
+    return schema
+
+
+def parse_fields(fields: Union[str, list[str], None]) -> list[str]:
+    """Normalize a ``fields`` argument (list or comma-separated string)."""
+    if not fields:
+        return []
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    return [f.strip() for f in fields if f and f.strip()]
+
+
+def project(result: Any, fields: Union[str, list[str], None]) -> Any:
+    """
+    Keep only the requested paths of a tool result.
+
+    Args:
+        result: Tool result dictionary
+        fields: Dotted paths to keep; ``*`` matches any key or list item
+
+    Returns:
+        The projected result (the original result if no fields are given)
+    """
+    paths = parse_fields(fields)
+    if not paths or not isinstance(result, dict):
+        return result
+
+    projected: Any = {key: result[key] for key in ALWAYS_KEPT_KEYS if key in result}
+    for path in paths:
+        selected = _select(result, _split_path(path))
+        if selected is not _MISSING:
+            projected = _merge(projected, selected)
+    return projected
+
+
+def serialize(result: Any, compact: Optional[bool] = False) -> str:
+    """Serialize a tool result to JSON, indented unless ``compact`` is set."""
+    if compact:
+        return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(result, indent=2, ensure_ascii=False)
+
+
+def _split_path(path: str) -> list[str]:
+    """Split 'a.b[*].c' / '$.a.b' style paths into segments."""
+    path = path.strip()
+    if path.startswith("$"):
+        path = path[1:]
+    path = _INDEX_RE.sub(r".\1", path)
+    return [segment for segment in path.split(".") if segment]
+
+
+def _select(value: Any, segments: list[str]) -> Any:
+    """Extract the sub-structure of ``value`` addressed by ``segments``."""
+    if not segments:
+        return value
+
+    head, rest = segments[0], segments[1:]
+
+    if isinstance(value, dict):
+        keys = list(value) if head == "*" else ([head] if head in value else [])
+        selected = {}
+        for key in keys:
+            sub = _select(value[key], rest)
+            if sub is not _MISSING:
+                selected[key] = sub
+        return selected if selected or head == "*" else _MISSING
+
+    if isinstance(value, list):
+        if head == "*":
+            items = [_select(item, rest) for item in value]
+            return [None if item is _MISSING else item for item in items]
+        if head.isdigit() and int(head) < len(value):
+            sub = _select(value[int(head)], rest)
+            return _MISSING if sub is _MISSING else [sub]
+
+    return _MISSING
+
+
+def _merge(left: Any, right: Any) -> Any:
+    """Deep-merge two projections of the same result."""
+    if left is None or left is _MISSING:
+        return right
+    if right is None or right is _MISSING:
+        return left
+    if isinstance(left, dict) and isinstance(right, dict):
+        merged = dict(left)
+        for key, value in right.items():
+            merged[key] = _merge(merged.get(key, _MISSING), value)
+        return merged
+    if isinstance(left, list) and isinstance(right, list) and len(left) == len(right):
+        return [_merge(a, b) for a, b in zip(left, right)]
+    return right
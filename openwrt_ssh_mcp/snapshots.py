@@ -0,0 +1,145 @@
+"""Per-router snapshots of polled tool results and delta computation."""
+
+import logging
+import secrets
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Keys that identify an item inside a list of objects, so that list entries are
+# matched by identity rather than by position (e.g. a lease by its MAC address)
+IDENTITY_KEYS = ("mac", "ifname", "section", "name", "id")
+
+# Schema of the argument that turns a polling tool into a delta tool
+SNAPSHOT_PROPERTY = {
+    "type": "string",
+    "description": (
+        "Snapshot token from a previous call. Returns only additions, removals and "
+        "modifications since that snapshot, plus a new token. Pass an empty string "
+        "to get the full result and a first token."
+    ),
+}
+
+
+def flatten(value: Any, prefix: str = "") -> dict[str, Any]:
+    """
+    Flatten a nested result into ``{path: scalar}`` pairs.
+
+    Lists of objects are keyed by an identity field when one is present, and
+    multi-line strings (such as ``ot-ctl`` tables) are treated as sets of lines,
+    so that inserting one entry does not show every later entry as modified.
+    """
+    flat: dict[str, Any] = {}
+
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            flat.update(flatten(item, f"{prefix}[{_item_key(item, index)}]"))
+    elif isinstance(value, str) and "\n" in value:
+        for line in value.split("\n"):
+            if line.strip():
+                flat[f"{prefix}[{line.strip()}]"] = True
+    else:
+        flat[prefix] = value
+
+    return flat
+
+
+def _item_key(item: Any, index: int) -> str:
+    """Identity of a list item: its identity field, or its position."""
+    if isinstance(item, dict):
+        for key in IDENTITY_KEYS:
+            if isinstance(item.get(key), (str, int)) and item[key] != "":
+                return f"{key}={item[key]}"
+    return str(index)
+
+
+class SnapshotStore:
+    """Bounded per-router store of recent result snapshots addressed by tokens."""
+
+    def __init__(self, max_per_router: Optional[int] = None):
+        """Initialize the store (bound defaults to SNAPSHOT_MAX_PER_ROUTER)."""
+        self.max_per_router = max_per_router or settings.snapshot_max_per_router
+        self._snapshots: dict[str, "OrderedDict[str, tuple[str, dict[str, Any]]]"] = {}
+
+    def delta(
+        self, router: str, tool: str, state: Any, token: Optional[str]
+    ) -> dict[str, Any]:
+        """
+        Record a new snapshot and compute changes since ``token``.
+
+        Args:
+            router: Router identifier the snapshot belongs to
+            tool: Tool name (tokens are only valid for the tool that issued them)
+            state: Current result payload
+            token: Token of the caller's previous snapshot, if any
+
+        Returns:
+            dict: ``snapshot`` token plus ``added``/``removed``/``modified`` maps,
+                or ``delta: False`` when no usable base snapshot exists
+        """
+        current = flatten(state)
+        snapshots = self._snapshots.setdefault(router, OrderedDict())
+
+        base = snapshots.get(token) if token else None
+        if base is not None and base[0] != tool:
+            base = None
+
+        if base is None or not token:
+            new_token = self._store(snapshots, tool, current)
+            response: dict[str, Any] = {"snapshot": new_token, "delta": False}
+            if token:
+                response["note"] = "Unknown or expired snapshot; returning full result."
+            return response
+
+        previous = base[1]
+        added = {path: current[path] for path in current.keys() - previous.keys()}
+        removed = {path: previous[path] for path in previous.keys() - current.keys()}
+        modified = {
+            path: {"old": previous[path], "new": current[path]}
+            for path in current.keys() & previous.keys()
+            if previous[path] != current[path]
+        }
+
+        if added or removed or modified:
+            new_token = self._store(snapshots, tool, current)
+        else:
+            # Nothing changed: keep handing out the same token
+            new_token = token
+            snapshots.move_to_end(token)
+
+        return {
+            "snapshot": new_token,
+            "base_snapshot": token,
+            "delta": True,
+            "changed": bool(added or removed or modified),
+            "added": dict(sorted(added.items())),
+            "removed": dict(sorted(removed.items())),
+            "modified": dict(sorted(modified.items())),
+        }
+
+    def clear(self) -> None:
+        """Drop all snapshots."""
+        self._snapshots.clear()
+
+    def _store(
+        self,
+        snapshots: "OrderedDict[str, tuple[str, dict[str, Any]]]",
+        tool: str,
+        flat: dict[str, Any],
+    ) -> str:
+        """Store a flattened snapshot, evicting the oldest beyond the bound."""
+        token = secrets.token_urlsafe(9)
+        snapshots[token] = (tool, flat)
+        while len(snapshots) > self.max_per_router:
+            snapshots.popitem(last=False)
+        return token
+
+
+# Global snapshot store instance
+snapshot_store = SnapshotStore()
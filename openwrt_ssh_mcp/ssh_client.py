@@ -1,13 +1,20 @@
 """SSH client for executing commands on OpenWRT router."""
 
 import asyncio
-import asyncssh
 import logging
-from typing import Optional
-from datetime import datetime
+import random
+import time
+from typing import Any, Optional
 
+from .circuit import CLOSED, HALF_OPEN, CircuitBreaker
+from .concurrency import LOADAVG_COMMAND, AdaptiveLimiter
 from .config import settings
-from .security import audit_logger
+from .metrics import metrics
+from .scheduler import BACKGROUND, RouterScheduler, priority_class
+from .security import SecurityValidator, audit_logger
+from .timeouts import timeout_policy
+from .tracing import tracer
+from .transport import Transport, TransportError, create_transport
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +22,51 @@ logger = logging.getLogger(__name__)
 class SSHClient:
     """Manages SSH connection to OpenWRT router."""
 
-    def __init__(self):
-        """Initialize SSH client."""
-        self.connection: Optional[asyncssh.SSHClientConnection] = None
+    def __init__(self, transport: Optional[Transport] = None):
+        """
+        Initialize SSH client.
+
+        Args:
+            transport: Transport used to reach the router (defaults to the
+                one selected by the settings, normally asyncssh)
+        """
+        self.transport = transport or create_transport()
+        self.transport.set_disconnect_handler(self._on_disconnect)
         self.is_connected = False
+        # Only one reconnect runs at a time; callers queued behind a failed
+        # one do not start another (see ensure_connected)
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._connect_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connect_rounds = 0
+        # Bound the number of commands running on the router at once,
+        # adapting the bound to the router's latency, errors and load
+        self.limiter = AdaptiveLimiter()
+        # Interactive reads are served before polling and writes
+        self.scheduler = RouterScheduler()
+        # Connection and command counters (exported as metrics)
+        self.connects = 0
+        self.connect_failures = 0
+        self.connection_losses = 0
+        self.active_commands = 0
+        self.waiting_commands = 0
+        # Identical read-only commands in flight share one execution
+        self.coalesce_reads = settings.ssh_coalesce_reads
+        self.coalesced_commands = 0
+        # Read-only commands retried on a new connection after losing the old one
+        self.retried_commands = 0
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+        # Fail fast while the router is unreachable; probe it in the background
+        self.breaker = CircuitBreaker(settings.router_id)
+        self._probe_task: Optional[asyncio.Task] = None
+        # Samples the router's load for the adaptive limit while connected
+        self._load_task: Optional[asyncio.Task] = None
+        # Connection opened at startup while the server already answers clients
+        self._connecting: Optional[asyncio.Task] = None
+
+    @property
+    def command_slots(self) -> int:
+        """Current limit on commands running at once."""
+        return int(self.limiter.limit)
 
     async def connect(self) -> bool:
         """
@@ -40,6 +88,7 @@ class SSHClient:
                 "known_hosts": None,  # Disable host key checking (adjust for production)
                 "connect_timeout": settings.ssh_timeout,
                 "keepalive_interval": settings.ssh_keepalive_interval,
+                "keepalive_count_max": settings.ssh_keepalive_count_max,
             }
 
             # Authentication: prefer key over password, allow default keys
@@ -55,8 +104,14 @@ class SSHClient:
                 # asyncssh will automatically try default keys
 
             # Establish connection
-            self.connection = await asyncssh.connect(**connect_kwargs)
+            await self.transport.connect(**connect_kwargs)
             self.is_connected = True
+            self.connects += 1
+            self._start_load_polling()
+            # A probe only closes the circuit once a command gets through (the
+            # link may be half-open), see _probe_router
+            if self.breaker.state != HALF_OPEN:
+                self.breaker.record_success()
 
             logger.info("SSH connection established successfully")
             audit_logger.log_connection(
@@ -66,33 +121,70 @@ class SSHClient:
 
             return True
 
-        except asyncssh.Error as e:
+        except TransportError as e:
             logger.error(f"SSH connection failed: {e}")
             audit_logger.log_connection("ERROR", str(e))
             self.is_connected = False
+            self.connect_failures += 1
+            self._record_failure(f"Connection failed: {e}")
             return False
         except Exception as e:
             logger.error(f"Unexpected error during SSH connection: {e}")
             audit_logger.log_connection("ERROR", str(e))
             self.is_connected = False
+            self.connect_failures += 1
+            self._record_failure(f"Connection failed: {e}")
             return False
 
+    def connect_in_background(self) -> asyncio.Task:
+        """
+        Start connecting without waiting for the connection.
+
+        Commands executed meanwhile wait for this attempt instead of failing
+        because the connection is not established yet.
+
+        Returns:
+            asyncio.Task: The connection attempt
+        """
+        self._connecting = asyncio.ensure_future(self._connect_at_startup())
+        return self._connecting
+
+    async def _connect_at_startup(self) -> None:
+        logger.info("Establishing SSH connection...")
+        if not await self.ensure_connected():
+            logger.error("Failed to establish SSH connection. Server may not function properly.")
+            logger.warning("Continuing anyway - connection will be retried on first tool call")
+
     async def disconnect(self):
         """Close SSH connection."""
-        if self.connection:
-            self.connection.close()
-            await self.connection.wait_closed()
-            self.is_connected = False
+        if self._connecting is not None:
+            self._connecting.cancel()
+            self._connecting = None
+        for task in (self._probe_task, self._load_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._probe_task = self._load_task = None
+        was_connected = self.transport.is_connected
+        # Close even a dropped connection: transports release their resources
+        # (and a recording transport saves its cassette) on close
+        await self.transport.close()
+        self.is_connected = False
+        if was_connected:
             logger.info("SSH connection closed")
             audit_logger.log_connection("DISCONNECT", "Connection closed gracefully")
 
-    async def execute(self, command: str, timeout: Optional[int] = None) -> dict:
+    async def execute(self, command: str, timeout: Optional[float] = None) -> dict:
         """
         Execute a command on the OpenWRT router.
         
         Args:
             command: Command to execute
-            timeout: Execution timeout in seconds (defaults to SSH_TIMEOUT)
+            timeout: Execution timeout in seconds (defaults to the one learned
+                for this command, see TimeoutPolicy)
             
         Returns:
             dict: Execution result with keys:
@@ -101,26 +193,115 @@ class SSHClient:
                 - stderr: str
                 - exit_code: int
                 - execution_time: float
+
+        A read-only command identical to one already running on the router
+        is not sent again: the caller waits (at most ``timeout``) for the
+        running execution and receives a copy of its result.
+
+        While the circuit breaker is open the command is not attempted and
+        a failure is returned immediately. While connect_in_background() is
+        still connecting, the command waits for it.
         """
-        if not self.is_connected or not self.connection:
+        if not self.breaker.allows_requests():
+            return {
+                "success": False,
+                "stdout": "",
+                "stderr": self.breaker.unavailable()["error"],
+                "exit_code": -1,
+                "execution_time": 0.0,
+            }
+        if self._connecting is not None and not self._connecting.done():
+            await asyncio.shield(self._connecting)
+        if not self.is_connected:
             raise ConnectionError("SSH connection not established. Call connect() first.")
 
-        if timeout is None:
-            timeout = settings.ssh_timeout
+        seconds = timeout_policy.timeout_for(command) if timeout is None else timeout
+
+        if SecurityValidator.is_mutating(command):
+            return await self._execute(command, seconds)
+        if not self.coalesce_reads:
+            return await self._execute_read(command, seconds)
+
+        key = (settings.router_id, command)
+        shared = self._in_flight.get(key)
+        if shared is None:
+            # Run as a task so the execution outlives a cancelled first caller
+            shared = asyncio.ensure_future(self._execute_read(command, seconds))
+            self._in_flight[key] = shared
+            shared.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            return dict(await asyncio.shield(shared))
+
+        self.coalesced_commands += 1
+        logger.debug(f"Sharing in-flight execution of: {command}")
+        start_time = time.perf_counter()
+        try:
+            return dict(await asyncio.wait_for(asyncio.shield(shared), timeout=seconds))
+        except asyncio.TimeoutError:
+            error = f"Command execution timed out after {seconds}s"
+            logger.error(error)
+            return self._failure(command, error, start_time)
+        finally:
+            end_time = time.perf_counter()
+            metrics.record_shared_command(start_time, end_time)
+            tracer.record("ssh.shared", start_time, end_time, command=command)
+
+    async def _execute_read(self, command: str, timeout: float) -> dict:
+        """Run a read-only command, retrying it once if the connection drops."""
+        response = await self._execute(command, timeout)
+        if response["success"] or self.is_connected:
+            return response
+
+        # Reading twice is harmless: reconnect and try again
+        logger.info(f"Retrying after reconnect: {command}")
+        if await self.ensure_connected():
+            self.retried_commands += 1
+            response = await self._execute(command, timeout)
+        return response
+
+    async def _execute(self, command: str, timeout: float) -> dict:
+        """Run one command on the router and record its metrics."""
+        start_time = time.perf_counter()
+        phases: dict[str, float] = {}
+        response: dict[str, Any] = {}
 
-        start_time = datetime.now()
-        
         try:
             logger.debug(f"Executing command: {command}")
-            
+
             # Execute command
-            result = await asyncio.wait_for(
-                self.connection.run(command, check=False),
-                timeout=timeout
+            self.waiting_commands += 1
+            try:
+                await self.scheduler.acquire(self.limiter)
+            finally:
+                self.waiting_commands -= 1
+            self.active_commands += 1
+            try:
+                phases["queue_wait"] = time.perf_counter() - start_time
+                run_start = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(
+                        self.transport.run(command),
+                        timeout=timeout
+                    )
+                except (asyncio.TimeoutError, TransportError):
+                    self.limiter.record(
+                        command, run_start, time.perf_counter() - run_start, ok=False
+                    )
+                    raise
+                self.limiter.record(command, run_start, time.perf_counter() - run_start, ok=True)
+            finally:
+                self.active_commands -= 1
+                self.scheduler.release(self.limiter)
+            phases.update(
+                result.timings or {"remote": time.perf_counter() - run_start}
             )
-            
-            execution_time = (datetime.now() - start_time).total_seconds()
-            
+            # The router answered, whatever the exit status
+            self.breaker.record_success()
+            timeout_policy.observe(
+                command, phases.get("channel_open", 0.0) + phases["remote"]
+            )
+
+            execution_time = time.perf_counter() - start_time
+
             # Parse result
             response = {
                 "success": result.exit_status == 0,
@@ -129,6 +310,12 @@ class SSHClient:
                 "exit_code": result.exit_status,
                 "execution_time": execution_time,
             }
+            if command == LOADAVG_COMMAND and response["success"]:
+                self.limiter.observe_load(response["stdout"])
+            if result.exit_status is None:
+                # Channel closed before the command reported how it ended
+                response["exit_code"] = -1
+                response["stderr"] = response["stderr"] or "Channel closed without exit status"
 
             # Log execution
             audit_logger.log_command(
@@ -149,46 +336,169 @@ class SSHClient:
             return response
 
         except asyncio.TimeoutError:
-            execution_time = (datetime.now() - start_time).total_seconds()
             error = f"Command execution timed out after {timeout}s"
             logger.error(error)
-            audit_logger.log_command(
-                command=command,
-                success=False,
-                error=error,
-                execution_time=execution_time,
-            )
-            return {
-                "success": False,
-                "stdout": "",
-                "stderr": error,
-                "exit_code": -1,
-                "execution_time": execution_time,
-            }
+            self._record_failure(error)
+            timeout_policy.observe(command, timeout)
+            response = self._failure(command, error, start_time)
+            return response
+
+        except TransportError as e:
+            # The connection is gone; make the next ensure_connected() reconnect
+            error = f"Connection lost: {str(e)}"
+            self._mark_lost(error)
+            self._record_failure(error)
+            response = self._failure(command, error, start_time)
+            return response
 
         except Exception as e:
-            execution_time = (datetime.now() - start_time).total_seconds()
             error = f"Command execution error: {str(e)}"
             logger.error(error)
-            audit_logger.log_command(
-                command=command,
-                success=False,
-                error=error,
-                execution_time=execution_time,
-            )
-            return {
-                "success": False,
-                "stdout": "",
-                "stderr": error,
-                "exit_code": -1,
-                "execution_time": execution_time,
-            }
+            response = self._failure(command, error, start_time)
+            return response
+
+        finally:
+            end_time = time.perf_counter()
+            if "queue_wait" in phases and "remote" not in phases:
+                # Failed while running: attribute the rest to the router
+                phases["remote"] = end_time - start_time - phases["queue_wait"]
+            ok = bool(response and response["success"])
+            metrics.record_command(command, start_time, end_time, phases, ok=ok)
+            span = tracer.record("ssh.execute", start_time, end_time, command=command, ok=ok)
+            if span is not None:
+                # Phases run back to back: queue wait, channel open, remote
+                phase_start = start_time
+                for phase in ("queue_wait", "channel_open", "remote"):
+                    if phase in phases:
+                        phase_end = phase_start + phases[phase]
+                        tracer.record(f"ssh.{phase}", phase_start, phase_end, parent=span)
+                        phase_start = phase_end
+
+    @staticmethod
+    def _failure(command: str, error: str, start_time: float) -> dict:
+        """Audit-log a failed command and build its result."""
+        execution_time = time.perf_counter() - start_time
+        audit_logger.log_command(
+            command=command,
+            success=False,
+            error=error,
+            execution_time=execution_time,
+        )
+        return {
+            "success": False,
+            "stdout": "",
+            "stderr": error,
+            "exit_code": -1,
+            "execution_time": execution_time,
+        }
 
-    async def ensure_connected(self):
-        """Ensure SSH connection is active, reconnect if necessary."""
+    def _on_disconnect(self, error: Optional[Exception]) -> None:
+        """Transport callback for a connection that dropped on its own."""
+        self._mark_lost(f"Connection lost: {error or 'closed by the router'}")
+
+    def _mark_lost(self, error: str) -> None:
+        """Record the loss of the connection once, however it was noticed."""
         if not self.is_connected:
+            return
+        self.is_connected = False
+        self.connection_losses += 1
+        logger.error(error)
+        audit_logger.log_connection("ERROR", error)
+
+    async def ensure_connected(self) -> bool:
+        """
+        Ensure SSH connection is active, reconnect if necessary.
+
+        Concurrent callers share a single reconnect: while one caller retries
+        with jittered exponential backoff, the others wait for its outcome
+        instead of opening connections of their own.
+
+        Returns:
+            bool: True if the connection is up
+        """
+        if self.is_connected and self.transport.is_connected:
+            return True
+        if not self.breaker.allows_requests():
+            # The background probe reconnects once the router is back
+            return False
+
+        round_seen = self._connect_rounds
+        async with self._get_connect_lock():
+            if self._connect_rounds != round_seen:
+                # A reconnect finished while we waited; take its outcome
+                return self.is_connected and self.transport.is_connected
+            if self.is_connected and self.transport.is_connected:
+                return True
+
             logger.info("Connection not active, attempting to reconnect...")
-            await self.connect()
+            try:
+                with tracer.span("ssh.connect"):
+                    for attempt in range(settings.ssh_reconnect_attempts):
+                        if attempt:
+                            delay = self._backoff(attempt)
+                            logger.info(f"Reconnect attempt {attempt + 1} in {delay:.2f}s")
+                            await asyncio.sleep(delay)
+                        if await self.connect():
+                            return True
+                    return False
+            finally:
+                self._connect_rounds += 1
+
+    def _record_failure(self, error: str) -> None:
+        """Count a failure to reach the router; start probing if the circuit opens."""
+        if self.breaker.record_failure(error):
+            if self._probe_task is None or self._probe_task.done():
+                self._probe_task = asyncio.ensure_future(self._probe_router())
+
+    async def _probe_router(self) -> None:
+        """While the circuit is open, periodically check whether the router is back."""
+        while self.breaker.state != CLOSED:
+            await asyncio.sleep(self.breaker.retry_after())
+            self.breaker.begin_probe()
+            logger.info(f"Probing {self.breaker.name}")
+            if not (self.is_connected and self.transport.is_connected):
+                if not await self.connect():
+                    continue
+            # Connected is not enough (the link may be half-open): run a command
+            with priority_class(BACKGROUND):
+                await self._execute("echo probe", settings.ssh_timeout)
+
+    def _start_load_polling(self) -> None:
+        if not self.limiter.adaptive or settings.ssh_load_poll_interval <= 0:
+            return
+        if self._load_task is None or self._load_task.done():
+            self._load_task = asyncio.ensure_future(self._poll_load())
+
+    async def _poll_load(self) -> None:
+        """Sample the router's load average for the adaptive limit while connected."""
+        interval = settings.ssh_load_poll_interval
+        while self.is_connected:
+            await asyncio.sleep(interval)
+            # A tool or the metrics sampler may have read it already
+            if time.monotonic() - self.limiter.load_observed_at < interval:
+                continue
+            if not (self.is_connected and self.breaker.allows_requests()):
+                continue
+            with priority_class(BACKGROUND):
+                await self.execute(LOADAVG_COMMAND)
+
+    def _get_connect_lock(self) -> asyncio.Lock:
+        # Locks are bound to one event loop; the global client may outlive it
+        loop = asyncio.get_running_loop()
+        if self._connect_lock is None or self._connect_lock_loop is not loop:
+            self._connect_lock = asyncio.Lock()
+            self._connect_lock_loop = loop
+        return self._connect_lock
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Delay before reconnect attempt ``attempt`` (1-based retries), with jitter."""
+        delay: float = min(
+            settings.ssh_reconnect_backoff_max,
+            settings.ssh_reconnect_backoff * 2 ** (attempt - 1),
+        )
+        # Equal jitter: keeps a minimum wait while spreading out clients
+        return delay / 2 + random.uniform(0, delay / 2)
 
     async def test_connection(self) -> dict:
         """
@@ -0,0 +1,140 @@
+"""Per-command timeouts learned from observed latency."""
+
+import json
+import logging
+import math
+import re
+from collections import deque
+from typing import Any, Optional
+
+from .config import settings
+from .metrics import OTHER_TEMPLATE, command_template
+
+logger = logging.getLogger(__name__)
+
+# Operations known to take long regardless of what has been observed so far
+# (command prefix -> seconds); SSH_TIMEOUT_OVERRIDES adds to or replaces these
+DEFAULT_OVERRIDES = {
+    "opkg update": 300.0,
+    "opkg install": 300.0,
+    "opkg upgrade": 300.0,
+    "opkg remove": 120.0,
+}
+
+# Commands whose run time depends on their arguments (counts, durations) or
+# that follow output until stopped. Templates drop those numbers, so one
+# learned timeout would cover e.g. "ping -c 3" and "ping -c 100": they are
+# never learned and get SSH_TIMEOUT unless an override applies.
+VARIABLE_DURATION = re.compile(
+    r"^(\S*/)?(ping6?|traceroute6?|sleep)\b|^(\S*/)?(logread|tail)\b.*\s-f\b"
+)
+
+# Recent run times kept per command template
+WINDOW = 200
+
+
+class TimeoutPolicy:
+    """
+    Chooses the timeout of each command from its recent run times.
+
+    Run times (channel open plus remote execution, the part covered by the
+    timeout) are kept per command template. Once ``min_samples`` runs have
+    been seen, the timeout is p99 x ``factor`` clamped to [floor, ceiling];
+    before that, and for templates beyond the tracking limit, SSH_TIMEOUT
+    applies. Explicit overrides always win. A command that times out is
+    recorded as having taken the full timeout, so a template that keeps
+    timing out earns longer timeouts up to the ceiling. Commands of
+    VARIABLE_DURATION are never learned.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        factor: Optional[float] = None,
+        floor: Optional[float] = None,
+        ceiling: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        overrides: Optional[dict[str, float]] = None,
+    ):
+        """
+        Initialize the policy with no observations.
+
+        Args:
+            enabled: Learn timeouts (otherwise only overrides and SSH_TIMEOUT
+                apply; defaults to settings)
+            factor: Multiplier applied to the observed p99
+            floor: Shortest learned timeout in seconds
+            ceiling: Longest learned timeout in seconds
+            min_samples: Runs observed before a template's timeout is learned
+            overrides: Command prefix -> timeout in seconds (defaults to
+                DEFAULT_OVERRIDES updated with settings)
+        """
+        self.enabled = settings.ssh_adaptive_timeouts if enabled is None else enabled
+        self.factor = factor or settings.ssh_timeout_factor
+        self.floor = floor or settings.ssh_timeout_floor
+        self.ceiling = ceiling or settings.ssh_timeout_ceiling
+        self.min_samples = min_samples or settings.ssh_timeout_min_samples
+        if overrides is None:
+            overrides = dict(DEFAULT_OVERRIDES)
+            if settings.ssh_timeout_overrides:
+                overrides.update(json.loads(settings.ssh_timeout_overrides))
+        self.overrides = overrides
+        self._samples: dict[str, deque[float]] = {}
+        self._learned: dict[str, float] = {}
+
+    def override_for(self, command: str) -> Optional[float]:
+        """Timeout of the longest override prefix matching ``command``, if any."""
+        matches = [prefix for prefix in self.overrides if command.startswith(prefix)]
+        if not matches:
+            return None
+        return float(self.overrides[max(matches, key=len)])
+
+    def timeout_for(self, command: str) -> float:
+        """Timeout in seconds for running ``command``."""
+        override = self.override_for(command)
+        if override is not None:
+            return override
+        if self.enabled and not VARIABLE_DURATION.match(command):
+            learned = self._learned.get(command_template(command))
+            if learned is not None:
+                return learned
+        return settings.ssh_timeout
+
+    def observe(self, command: str, seconds: float) -> None:
+        """Record how long a run of ``command`` took (or the timeout it hit)."""
+        if VARIABLE_DURATION.match(command):
+            return
+        template = command_template(command)
+        samples = self._samples.get(template)
+        if samples is None:
+            if len(self._samples) >= settings.metrics_max_command_templates:
+                template = OTHER_TEMPLATE
+                samples = self._samples.get(template)
+            if samples is None:
+                samples = self._samples[template] = deque(maxlen=WINDOW)
+        samples.append(seconds)
+
+        if len(samples) >= self.min_samples and template != OTHER_TEMPLATE:
+            ordered = sorted(samples)
+            p99 = ordered[min(len(ordered) - 1, math.ceil(0.99 * len(ordered)) - 1)]
+            self._learned[template] = min(self.ceiling, max(self.floor, p99 * self.factor))
+
+    def reset(self) -> None:
+        """Forget every observation."""
+        self._samples.clear()
+        self._learned.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Learned timeouts per command template and the configured overrides."""
+        return {
+            "enabled": self.enabled,
+            "default": settings.ssh_timeout,
+            "learned": {
+                template: round(timeout, 3) for template, timeout in sorted(self._learned.items())
+            },
+            "overrides": dict(self.overrides),
+        }
+
+
+# Global timeout policy instance
+timeout_policy = TimeoutPolicy()
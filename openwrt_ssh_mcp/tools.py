@@ -5,8 +5,17 @@ import logging
 import re
 from typing import Any
 
+from .offload import offloader
+from .parsers import (
+    parse_dhcp_leases,
+    parse_key_values,
+    parse_opkg_installed,
+    parse_opkg_list,
+)
+from .registry import registry
 from .ssh_client import ssh_client
 from .security import SecurityValidator
+from .tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +24,23 @@ class OpenWRTTools:
     """Collection of OpenWRT management tools."""
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_execute_command",
+        description=(
+            "Execute a validated shell command on the OpenWRT router. "
+            "Commands are validated against a security whitelist. "
+            "Use this for commands not covered by other specialized tools."
+        ),
+        properties={
+            "command": {
+                "type": "string",
+                "minLength": 1,
+                "description": "Shell command to execute (must be in whitelist)",
+            },
+        },
+        required=["command"],
+        mutating=lambda arguments: SecurityValidator.is_mutating(arguments.get("command", "")),
+    )
     async def execute_command(command: str) -> dict[str, Any]:
         """
         Execute a validated command on the OpenWRT router.
@@ -26,7 +52,8 @@ class OpenWRTTools:
             dict: Execution result
         """
         # Validate command
-        is_valid, error_msg = SecurityValidator.validate_command(command)
+        with tracer.span("security.validate"):
+            is_valid, error_msg = SecurityValidator.validate_command(command)
         if not is_valid:
             return {
                 "success": False,
@@ -47,6 +74,13 @@ class OpenWRTTools:
         }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_get_system_info",
+        description=(
+            "Get comprehensive system information including board details, "
+            "uptime, memory usage, and CPU load"
+        ),
+    )
     async def get_system_info() -> dict[str, Any]:
         """
         Get OpenWRT system information (uptime, memory, load).
@@ -93,6 +127,19 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_restart_interface",
+        description="Restart a network interface (e.g., wan, lan, wlan0)",
+        properties={
+            "interface": {
+                "type": "string",
+                "minLength": 1,
+                "description": "Interface name to restart (e.g., 'wan', 'lan')",
+            },
+        },
+        required=["interface"],
+        mutating=True,
+    )
     async def restart_interface(interface: str) -> dict[str, Any]:
         """
         Restart a network interface.
@@ -127,6 +174,11 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_get_wifi_status",
+        description="Get WiFi status including connected clients and signal strength",
+        delta=True,
+    )
     async def get_wifi_status() -> dict[str, Any]:
         """
         Get WiFi status and connected clients.
@@ -139,7 +191,7 @@ class OpenWRTTools:
 
         if result["success"]:
             try:
-                wifi_data = json.loads(result["output"])
+                wifi_data = await offloader.run(json.loads, result["output"])
                 return {
                     "success": True,
                     "wifi_status": wifi_data,
@@ -156,6 +208,11 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_list_dhcp_leases",
+        description="List all DHCP leases (connected devices with IP/MAC addresses)",
+        delta=True,
+    )
     async def list_dhcp_leases() -> dict[str, Any]:
         """
         List DHCP leases (connected devices).
@@ -173,18 +230,7 @@ class OpenWRTTools:
             result = await OpenWRTTools.execute_command(cmd)
             if result["success"] and result["output"]:
                 # Parse DHCP leases
-                leases = []
-                for line in result["output"].strip().split("\n"):
-                    if line:
-                        parts = line.split()
-                        if len(parts) >= 4:
-                            leases.append({
-                                "timestamp": parts[0],
-                                "mac": parts[1],
-                                "ip": parts[2],
-                                "hostname": parts[3] if len(parts) > 3 else "",
-                                "client_id": parts[4] if len(parts) > 4 else "",
-                            })
+                leases = await offloader.run(parse_dhcp_leases, result["output"])
 
                 return {
                     "success": True,
@@ -198,6 +244,10 @@ class OpenWRTTools:
         }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_get_firewall_rules",
+        description="Get current firewall rules (iptables)",
+    )
     async def get_firewall_rules() -> dict[str, Any]:
         """
         Get firewall rules.
@@ -220,6 +270,22 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_read_config",
+        description=(
+            "Read a UCI configuration file. "
+            "Allowed configs: network, wireless, dhcp, firewall, system"
+        ),
+        properties={
+            "config_name": {
+                "type": "string",
+                "minLength": 1,
+                "description": "Configuration name (e.g., 'network', 'wireless')",
+                "enum": ["network", "wireless", "dhcp", "firewall", "system"],
+            },
+        },
+        required=["config_name"],
+    )
     async def read_config(config_name: str) -> dict[str, Any]:
         """
         Read a UCI configuration file.
@@ -255,6 +321,10 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_test_connection",
+        description="Test SSH connection to the OpenWRT router",
+    )
     async def test_connection() -> dict[str, Any]:
         """
         Test SSH connection to the router.
@@ -267,6 +337,10 @@ class OpenWRTTools:
     # ========== OpenThread Border Router (OTBR) Tools ==========
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_thread_get_state",
+        description="Get current OpenThread network state (disabled, detached, child, router, leader)",
+    )
     async def thread_get_state() -> dict[str, Any]:
         """
         Get current OpenThread state.
@@ -289,6 +363,33 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_thread_create_network",
+        description=(
+            "Create a new Thread network with specified parameters. "
+            "This will initialize a new Thread network, configure it, and start it. "
+            "Returns network credentials including network key and dataset."
+        ),
+        properties={
+            "network_name": {
+                "type": "string",
+                "description": "Network name (default: OpenWRT-Thread)",
+                "default": "OpenWRT-Thread",
+            },
+            "channel": {
+                "type": "integer",
+                "description": "Thread channel between 11-26 (default: 15)",
+                "minimum": 11,
+                "maximum": 26,
+                "default": 15,
+            },
+            "panid": {
+                "type": "string",
+                "description": "PAN ID in hex format (e.g., 0x1234). Auto-generated if not provided.",
+            },
+        },
+        mutating=True,
+    )
     async def thread_create_network(
         network_name: str = "OpenWRT-Thread",
         channel: int = 15,
@@ -416,6 +517,13 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_thread_get_dataset",
+        description=(
+            "Get active Thread dataset (network credentials). "
+            "Returns dataset in both human-readable and hex format for sharing."
+        ),
+    )
     async def thread_get_dataset() -> dict[str, Any]:
         """
         Get active Thread dataset (network credentials).
@@ -442,6 +550,14 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_thread_get_info",
+        description=(
+            "Get comprehensive Thread network information including state, "
+            "channel, PAN ID, network name, IP addresses, neighbors, and children."
+        ),
+        delta=True,
+    )
     async def thread_get_info() -> dict[str, Any]:
         """
         Get comprehensive Thread network information.
@@ -488,6 +604,21 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_thread_enable_commissioner",
+        description=(
+            "Enable Thread Commissioner to allow new devices to join the network. "
+            "Devices can join using the provided passphrase."
+        ),
+        properties={
+            "passphrase": {
+                "type": "string",
+                "description": "Joiner passphrase for devices (default: THREAD123)",
+                "default": "THREAD123",
+            },
+        },
+        mutating=True,
+    )
     async def thread_enable_commissioner(passphrase: str = "THREAD123") -> dict[str, Any]:
         """
         Enable Thread Commissioner to allow devices to join.
@@ -534,6 +665,11 @@ class OpenWRTTools:
     # ========== Package Management (opkg) Tools ==========
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_opkg_update",
+        description="Update package lists from repositories (opkg update)",
+        mutating=True,
+    )
     async def opkg_update() -> dict[str, Any]:
         """
         Update package lists from repositories.
@@ -557,6 +693,19 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_opkg_install",
+        description="Install a package using opkg",
+        properties={
+            "package_name": {
+                "type": "string",
+                "minLength": 1,
+                "description": "Name of the package to install (e.g., 'luci-app-openthread', 'ot-br-posix')",
+            },
+        },
+        required=["package_name"],
+        mutating=True,
+    )
     async def opkg_install(package_name: str) -> dict[str, Any]:
         """
         Install a package using opkg.
@@ -591,6 +740,19 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_opkg_remove",
+        description="Remove a package using opkg",
+        properties={
+            "package_name": {
+                "type": "string",
+                "minLength": 1,
+                "description": "Name of the package to remove",
+            },
+        },
+        required=["package_name"],
+        mutating=True,
+    )
     async def opkg_remove(package_name: str) -> dict[str, Any]:
         """
         Remove a package using opkg.
@@ -625,6 +787,10 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_opkg_list_installed",
+        description="List all installed packages on the router",
+    )
     async def opkg_list_installed() -> dict[str, Any]:
         """
         List all installed packages.
@@ -637,15 +803,7 @@ class OpenWRTTools:
 
         if result["success"]:
             # Parse package list
-            packages = []
-            for line in result["output"].strip().split("\n"):
-                if line:
-                    parts = line.split(" - ")
-                    if len(parts) >= 2:
-                        packages.append({
-                            "name": parts[0],
-                            "version": parts[1],
-                        })
+            packages = await offloader.run(parse_opkg_installed, result["output"])
 
             return {
                 "success": True,
@@ -659,6 +817,18 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_opkg_info",
+        description="Get detailed information about a specific package",
+        properties={
+            "package_name": {
+                "type": "string",
+                "minLength": 1,
+                "description": "Name of the package",
+            },
+        },
+        required=["package_name"],
+    )
     async def opkg_info(package_name: str) -> dict[str, Any]:
         """
         Get information about a package.
@@ -681,11 +851,7 @@ class OpenWRTTools:
 
         if result["success"]:
             # Parse package info
-            info = {}
-            for line in result["output"].strip().split("\n"):
-                if ": " in line:
-                    key, value = line.split(": ", 1)
-                    info[key.lower().replace(" ", "_")] = value
+            info = parse_key_values(result["output"])
 
             return {
                 "success": True,
@@ -699,6 +865,13 @@ class OpenWRTTools:
             }
 
     @staticmethod
+    @registry.tool(
+        name="openwrt_opkg_list_available",
+        description=(
+            "List available packages from repositories. "
+            "Large lists are paginated; use openwrt_fetch_result with the returned cursor."
+        ),
+    )
     async def opkg_list_available() -> dict[str, Any]:
         """
         List all available packages from repositories.
@@ -710,30 +883,13 @@ class OpenWRTTools:
         result = await OpenWRTTools.execute_command(command)
 
         if result["success"]:
-            # Parse package list (can be very large)
-            packages = []
-            lines = result["output"].strip().split("\n")
-            
-            for line in lines[:500]:  # Limit to first 500 packages to avoid huge responses
-                if line:
-                    parts = line.split(" - ")
-                    if len(parts) >= 2:
-                        packages.append({
-                            "name": parts[0],
-                            "version": parts[1],
-                            "description": parts[2] if len(parts) > 2 else "",
-                        })
-
-            total_lines = len(result["output"].strip().split("\n"))
-            truncated = total_lines > 500
+            # Parse package list (can be very large; the server paginates it)
+            packages = await offloader.run(parse_opkg_list, result["output"])
 
             return {
                 "success": True,
                 "packages": packages,
                 "count": len(packages),
-                "truncated": truncated,
-                "total_available": total_lines,
-                "note": "List limited to 500 packages. Use opkg_info to search for specific packages." if truncated else "",
             }
         else:
             return {
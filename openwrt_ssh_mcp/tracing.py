@@ -0,0 +1,236 @@
+"""Lightweight span tracing of tool calls, exported as Chrome trace events."""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Option accepted by every tool to return its timing breakdown
+TIMING_PROPERTY = {
+    "type": "boolean",
+    "description": (
+        "Add a 'timing' object with the call's breakdown (validation, queue wait, "
+        "channel open, remote runtime, parsing, shaping) in milliseconds"
+    ),
+    "default": False,
+}
+
+# Span names summed into each phase of the timing breakdown
+PHASE_SPANS = {
+    "validate": ("validate", "security.validate"),
+    "connect": ("ssh.connect",),
+    "queue_wait": ("ssh.queue_wait",),
+    "channel_open": ("ssh.channel_open",),
+    "remote": ("ssh.remote",),
+    "shape": ("shape",),
+}
+
+# Offset between time.perf_counter() and the wall clock, for trace timestamps
+_EPOCH_OFFSET = time.time() - time.perf_counter()
+
+# Serializes appends to the trace file
+_file_lock = threading.Lock()
+
+
+@dataclass
+class Span:
+    """A timed operation, possibly nested in a parent span."""
+
+    name: str
+    trace_id: int
+    span_id: int
+    parent_id: Optional[int]
+    start: float
+    end: Optional[float] = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    children: list["Span"] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end (so far, if still open)."""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    @property
+    def self_time(self) -> float:
+        """Seconds not covered by child spans."""
+        return max(0.0, self.duration - sum(child.duration for child in self.children))
+
+    def walk(self) -> Iterator["Span"]:
+        """This span and all its descendants."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Records spans for the current tool call and exports finished traces.
+
+    Spans are only created inside a trace. A trace is started when a trace
+    file is configured, or when a caller asks for a timing breakdown; otherwise
+    span() is a no-op, so untraced calls pay next to nothing.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            path: Trace file to append finished traces to (defaults to settings;
+                None disables export)
+        """
+        self.path = path if path is not None else settings.trace_file
+        self._ids = itertools.count(1)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether every tool call is traced and exported."""
+        return bool(self.path)
+
+    @contextmanager
+    def span(self, name: str, force: bool = False, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Time a block as a child of the current span.
+
+        Args:
+            name: Span name
+            force: Start a new trace even if export is disabled
+            **attributes: Extra data stored with the span
+
+        Yields:
+            The span, or None when not tracing
+        """
+        parent = _current_span.get()
+        if parent is None and not (force or self.enabled):
+            yield None
+            return
+
+        span = self._new_span(name, parent, time.perf_counter(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+            if parent is None:
+                self._finish(span)
+
+    def record(self, name: str, start: float, end: float, parent: Optional[Span] = None,
+               **attributes: Any) -> Optional[Span]:
+        """
+        Add an already finished span.
+
+        Args:
+            name: Span name
+            start: time.perf_counter() at the start
+            end: time.perf_counter() at the end
+            parent: Parent span (defaults to the current span)
+            **attributes: Extra data stored with the span
+
+        Returns:
+            The span, or None when not tracing
+        """
+        parent = parent or _current_span.get()
+        if parent is None:
+            return None
+        span = self._new_span(name, parent, start, attributes)
+        span.end = end
+        return span
+
+    def _new_span(self, name: str, parent: Optional[Span], start: float,
+                  attributes: dict[str, Any]) -> Span:
+        span_id = next(self._ids)
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else span_id,
+            span_id=span_id,
+            parent_id=parent.span_id if parent else None,
+            start=start,
+            attributes=attributes,
+        )
+        if parent is not None:
+            parent.children.append(span)
+        return span
+
+    def _finish(self, root: Span) -> None:
+        if not self.path:
+            return
+        try:
+            self.export(root, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write trace to {self.path}: {e}")
+
+    @staticmethod
+    def export(root: Span, path: str) -> None:
+        """
+        Append a trace to a file in the Chrome Trace Event JSON array format.
+
+        The closing bracket is omitted, as the format allows, so traces can be
+        appended; the file opens in chrome://tracing and Perfetto.
+        """
+        events = []
+        for span in root.walk():
+            events.append({
+                "name": span.name,
+                "cat": "openwrt_mcp",
+                "ph": "X",
+                "ts": round((span.start + _EPOCH_OFFSET) * 1_000_000, 1),
+                "dur": round(span.duration * 1_000_000, 1),
+                "pid": os.getpid(),
+                # One row per trace so concurrent calls do not overlap
+                "tid": root.trace_id,
+                "args": {"span_id": span.span_id, "parent_id": span.parent_id,
+                         **span.attributes},
+            })
+
+        lines = "".join(json.dumps(event, default=str) + ",\n" for event in events)
+        with _file_lock:
+            new = not os.path.exists(path) or os.path.getsize(path) == 0
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(("[\n" if new else "") + lines)
+
+
+def timing_breakdown(root: Span) -> dict[str, Any]:
+    """
+    Summarize a trace for the ``timing`` field of a tool response.
+
+    Returns:
+        dict: trace id, total and per-phase milliseconds, and each SSH command's
+        duration. ``parse`` is time spent in tool handlers outside SSH,
+        including parsing offloaded to a worker pool.
+    """
+    spans = list(root.walk())
+    phases = {
+        phase: round(sum(span.duration for span in spans if span.name in names) * 1000, 3)
+        for phase, names in PHASE_SPANS.items()
+    }
+    phases["parse"] = round(
+        sum(span.self_time for span in spans if span.name == "handler") * 1000
+        + sum(span.duration for span in spans if span.name == "parse") * 1000, 3
+    )
+    return {
+        "trace_id": root.trace_id,
+        "total_ms": round(root.duration * 1000, 3),
+        "phases": phases,
+        "commands": [
+            {"command": span.attributes.get("command"), "ms": round(span.duration * 1000, 3)}
+            for span in spans if span.name == "ssh.execute"
+        ],
+    }
+
+
+# Global tracer instance
+tracer = Tracer()
@@ -0,0 +1,260 @@
+"""Pluggable transports used by SSHClient to run commands on a router."""
+
+import abc
+import asyncio
+import functools
+import importlib
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from .config import settings
+from .security import audit_logger
+
+if TYPE_CHECKING:
+    import asyncssh
+
+logger = logging.getLogger(__name__)
+
+# Called with the error (or None) when a connection drops on its own
+DisconnectHandler = Callable[[Optional[Exception]], None]
+
+
+class TransportError(ConnectionError):
+    """The connection to the router failed or was lost while running a command."""
+
+
+@dataclass
+class CommandResult:
+    """Raw outcome of a remote command."""
+
+    stdout: str
+    stderr: str
+    exit_status: Optional[int]
+    # Seconds spent opening the channel and running the command remotely,
+    # when the transport can tell them apart
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+class Transport(abc.ABC):
+    """
+    Connection to a router that can run commands.
+
+    Implementations raise TransportError when the connection is unusable; the
+    caller is responsible for timeouts. When run() is cancelled (e.g. by a
+    timeout), implementations stop the remote command rather than leaving it
+    running on the router.
+    """
+
+    _disconnect_handler: Optional[DisconnectHandler] = None
+
+    def set_disconnect_handler(self, handler: Optional[DisconnectHandler]) -> None:
+        """Register a callback for connections that drop without close() being called."""
+        self._disconnect_handler = handler
+
+    @abc.abstractmethod
+    async def connect(self, **options: Any) -> None:
+        """Open the connection using asyncssh-style connect options."""
+
+    @abc.abstractmethod
+    async def run(self, command: str) -> CommandResult:
+        """Run a command and wait for it to finish."""
+
+    @abc.abstractmethod
+    async def close(self) -> None:
+        """Close the connection (safe to call on a closed or dropped one)."""
+
+    @property
+    @abc.abstractmethod
+    def is_connected(self) -> bool:
+        """Whether the connection is believed to be open."""
+
+
+def _text(output: Any) -> str:
+    """Command output as text (asyncssh returns bytes when no encoding is set)."""
+    if isinstance(output, bytes):
+        return output.decode("utf-8", errors="replace")
+    return output or ""
+
+
+@functools.lru_cache(maxsize=None)
+def _liveness_client_class() -> type:
+    """asyncssh client callbacks that report a dropped connection."""
+    import asyncssh
+
+    class _LivenessClient(asyncssh.SSHClient):
+        def __init__(self, on_lost: Callable[[Any, Optional[Exception]], None]):
+            self._on_lost = on_lost
+
+        def connection_lost(self, exc: Optional[Exception]) -> None:
+            self._on_lost(self, exc)
+
+    return _LivenessClient
+
+
+class AsyncSSHTransport(Transport):
+    """
+    Runs commands over a single asyncssh client connection.
+
+    Dead peers are detected by asyncssh keepalives (``keepalive_interval`` and
+    ``keepalive_count_max``); a connection that drops for any reason other
+    than close() is reported to the disconnect handler.
+
+    asyncssh is imported by the first connect(), in a worker thread: it is
+    the slowest import of the server and is not needed to answer MCP
+    clients until a command runs.
+    """
+
+    def __init__(self):
+        """Initialize the transport (not connected)."""
+        self.connection: Optional["asyncssh.SSHClientConnection"] = None
+        self._client: Optional["asyncssh.SSHClient"] = None
+        # Background terminations of remote commands whose caller gave up
+        self._terminations: set[asyncio.Task] = set()
+
+    async def connect(self, **options: Any) -> None:
+        # Drop a stale connection before replacing it
+        await self.close()
+        if "asyncssh" not in sys.modules:
+            await asyncio.to_thread(importlib.import_module, "asyncssh")
+        import asyncssh
+
+        client = _liveness_client_class()(self._connection_lost)
+        try:
+            self.connection = await asyncssh.connect(client_factory=lambda: client, **options)
+        except (OSError, asyncssh.Error) as e:
+            raise TransportError(str(e)) from e
+        self._client = client
+
+    def _connection_lost(self, client: "asyncssh.SSHClient", exc: Optional[Exception]) -> None:
+        if client is not self._client:
+            # Closed by close(), or a connection that has been replaced
+            return
+        self._client = None
+        logger.warning(f"SSH connection lost: {exc or 'closed by the router'}")
+        if self._disconnect_handler is not None:
+            self._disconnect_handler(exc)
+
+    async def run(self, command: str) -> CommandResult:
+        if self.connection is None:
+            raise TransportError("Not connected")
+        import asyncssh
+
+        try:
+            start = time.perf_counter()
+            process = await self.connection.create_process(command)
+            opened = time.perf_counter()
+            try:
+                result = await process.wait(check=False)
+            except asyncio.CancelledError:
+                # Don't make the caller wait for the router to comply
+                task = asyncio.ensure_future(
+                    self._terminate(process, command, time.perf_counter() - opened)
+                )
+                self._terminations.add(task)
+                task.add_done_callback(self._terminations.discard)
+                raise
+        except (asyncssh.DisconnectError, asyncssh.ChannelOpenError, asyncssh.ConnectionLost,
+                OSError) as e:
+            raise TransportError(str(e)) from e
+
+        return CommandResult(
+            stdout=_text(result.stdout),
+            stderr=_text(result.stderr),
+            exit_status=result.exit_status,
+            timings={"channel_open": opened - start, "remote": time.perf_counter() - opened},
+        )
+
+    @staticmethod
+    async def _terminate(
+        process: "asyncssh.SSHClientProcess", command: str, elapsed: float
+    ) -> None:
+        """
+        Stop a remote command nobody is waiting for and free its channel.
+
+        Sends SIGTERM, then SIGKILL if the command has not exited after
+        SSH_KILL_GRACE seconds, and closes the channel. Servers that ignore
+        signal requests (e.g. dropbear) are left with the channel close.
+        """
+        import asyncssh
+
+        grace = settings.ssh_kill_grace
+        signal = "TERM"
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait_closed(), grace)
+        except asyncio.TimeoutError:
+            signal = "KILL"
+            try:
+                process.kill()
+            except (OSError, asyncssh.Error):
+                pass
+        except (OSError, asyncssh.Error):
+            pass
+
+        process.close()
+        try:
+            await asyncio.wait_for(process.wait_closed(), grace)
+            outcome = "channel closed"
+        except asyncio.TimeoutError:
+            outcome = "channel close not acknowledged"
+
+        logger.warning(f"Terminated remote command after {elapsed:.1f}s ({signal}): {command}")
+        audit_logger.log_process_kill(
+            command, signal, f"cancelled after {elapsed:.1f}s, {outcome}"
+        )
+
+    async def close(self) -> None:
+        self._client = None
+        if self.connection:
+            self.connection.close()
+            await self.connection.wait_closed()
+            self.connection = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connection is not None and not self.connection.is_closed()
+
+
+def create_transport(use_broker: bool = True) -> Transport:
+    """
+    Build the transport selected by the settings.
+
+    Args:
+        use_broker: Go through the connection broker if one is configured
+            (the broker itself connects directly)
+    """
+    transport: Transport
+    direct: Transport
+    if use_broker and settings.ssh_broker_socket:
+        from .broker import BrokerTransport
+
+        fallback = AsyncSSHTransport() if settings.ssh_broker_fallback else None
+        direct = BrokerTransport(settings.ssh_broker_socket, fallback)
+    else:
+        direct = AsyncSSHTransport()
+
+    if settings.ssh_replay_cassette:
+        from .cassette import ReplayTransport
+
+        logger.info(f"Replaying router session from {settings.ssh_replay_cassette}")
+        transport = ReplayTransport(settings.ssh_replay_cassette, settings.ssh_replay_timing)
+    elif settings.ssh_record_cassette:
+        from .cassette import RecordingTransport
+
+        logger.info(f"Recording router session to {settings.ssh_record_cassette}")
+        transport = RecordingTransport(direct, settings.ssh_record_cassette)
+    else:
+        transport = direct
+
+    if settings.ssh_faults:
+        from .faults import FaultConfig, FaultInjectingTransport
+
+        config = FaultConfig(**json.loads(settings.ssh_faults))
+        logger.warning(f"SSH fault injection ENABLED: {config}")
+        transport = FaultInjectingTransport(transport, config)
+
+    return transport
@@ -0,0 +1,39 @@
+"""Shared fixtures: an emulated OpenWRT router and a client connected to it."""
+
+import pytest
+from benchmarks.emulator import EmulatorConfig, RouterEmulator
+from openwrt_ssh_mcp.circuit import CircuitBreaker
+from openwrt_ssh_mcp.concurrency import AdaptiveLimiter
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.scheduler import RouterScheduler
+from openwrt_ssh_mcp.ssh_client import ssh_client
+from openwrt_ssh_mcp.timeouts import timeout_policy
+
+
+@pytest.fixture
+async def emulator():
+    """An emulated router with small datasets and no injected latency."""
+    config = EmulatorConfig(opkg_available=600, opkg_installed=40, dhcp_leases=5)
+    async with RouterEmulator(config) as router:
+        yield router
+
+
+@pytest.fixture
+async def connected_router(emulator, monkeypatch):
+    """The global SSH client connected to the emulated router."""
+    # Start from fresh limit, breaker and learned timeouts: earlier tests
+    # (timeouts, faults) leave them lowered, open or skewed
+    monkeypatch.setattr(ssh_client, "limiter", AdaptiveLimiter())
+    monkeypatch.setattr(ssh_client, "scheduler", RouterScheduler())
+    monkeypatch.setattr(ssh_client, "breaker", CircuitBreaker(settings.router_id))
+    timeout_policy.reset()
+    monkeypatch.setattr(settings, "openwrt_host", emulator.host)
+    monkeypatch.setattr(settings, "openwrt_port", emulator.port)
+    monkeypatch.setattr(settings, "openwrt_password", "emulator")
+    monkeypatch.setattr(settings, "openwrt_key_file", None)
+    monkeypatch.setattr(settings, "enable_audit_logging", False)
+
+    assert await ssh_client.connect()
+    yield emulator
+    await ssh_client.disconnect()
+    timeout_policy.reset()
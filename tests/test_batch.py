@@ -0,0 +1,103 @@
+"""Tests for the openwrt_batch meta-tool."""
+
+import asyncio
+import time
+
+import pytest
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.registry import registry
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    """Replace router-facing tools with slow fakes that record call order."""
+    calls = []
+
+    async def read_tool():
+        calls.append("read")
+        await asyncio.sleep(0.1)
+        return {"success": True, "value": 1}
+
+    async def install(package_name):
+        calls.append(f"install:{package_name}")
+        await asyncio.sleep(0.05)
+        return {"success": True, "message": package_name}
+
+    for name in ("openwrt_get_system_info", "openwrt_list_dhcp_leases", "openwrt_thread_get_state"):
+        monkeypatch.setattr(registry.get(name), "handler", read_tool)
+    monkeypatch.setattr(registry.get("openwrt_opkg_install"), "handler", install)
+    return calls
+
+
+class TestBatch:
+    """Test batch validation, concurrency and result reporting."""
+
+    async def test_reads_run_concurrently(self, fake_tools):
+        """Independent read tools overlap instead of running back to back."""
+        start = time.perf_counter()
+        result = await server.run_batch([
+            {"tool": "openwrt_get_system_info"},
+            {"tool": "openwrt_list_dhcp_leases", "arguments": {}},
+            {"tool": "openwrt_thread_get_state"},
+        ])
+        elapsed = time.perf_counter() - start
+
+        assert result["success"] is True
+        assert result["succeeded"] == 3
+        assert elapsed < 0.25
+        assert [item["index"] for item in result["results"]] == [0, 1, 2]
+        assert all(item["duration_ms"] >= 90 for item in result["results"])
+
+    async def test_writes_run_in_order(self, fake_tools):
+        """State-changing tools run sequentially in request order."""
+        result = await server.run_batch([
+            {"tool": "openwrt_opkg_install", "arguments": {"package_name": "a"}},
+            {"tool": "openwrt_opkg_install", "arguments": {"package_name": "b"}},
+        ])
+
+        assert result["success"] is True
+        assert [c for c in fake_tools if c.startswith("install")] == ["install:a", "install:b"]
+
+    async def test_writes_are_barriers(self, fake_tools):
+        """Reads listed after a write run once it is done; reads before it run first."""
+        result = await server.run_batch([
+            {"tool": "openwrt_get_system_info"},
+            {"tool": "openwrt_opkg_install", "arguments": {"package_name": "a"}},
+            {"tool": "openwrt_list_dhcp_leases"},
+            {"tool": "openwrt_thread_get_state"},
+        ])
+
+        assert result["success"] is True
+        assert fake_tools == ["read", "install:a", "read", "read"]
+        assert [item["index"] for item in result["results"]] == [0, 1, 2, 3]
+
+    async def test_invalid_items_reported_per_item(self, fake_tools):
+        """Invalid items fail individually; valid items still run through dispatch."""
+        result = await server.run_batch([
+            {"tool": "openwrt_get_system_info", "arguments": {"fields": ["value"]}},
+            {"tool": "openwrt_batch", "arguments": {"calls": []}},
+            {"tool": "no_such_tool"},
+            {"tool": "openwrt_opkg_install", "arguments": {}},
+            {"tool": ["openwrt_get_system_info"]},
+            {"arguments": {}},
+        ])
+
+        statuses = [item["status"] for item in result["results"]]
+        assert statuses == ["ok", "error", "error", "error", "error", "error"]
+        assert result["results"][0]["result"] == {"success": True, "value": 1}
+        assert "package_name" in result["results"][3]["error"]
+        assert "non-empty string" in result["results"][4]["error"]
+        assert result["results"][5]["tool"] is None
+        assert result["success"] is False
+        assert result["failed"] == 5
+
+    async def test_batch_limits(self, fake_tools):
+        """Empty and oversized batches are rejected."""
+        with pytest.raises(ValueError):
+            await server.run_batch([])
+        with pytest.raises(ValueError):
+            await server.run_batch([{"tool": "openwrt_get_system_info"}] * 1000)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,105 @@
+"""Tests for sharing one router connection between server processes."""
+
+import asyncio
+
+import pytest
+
+from openwrt_ssh_mcp.broker import BrokerTransport, ConnectionBroker
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.ssh_client import SSHClient
+from openwrt_ssh_mcp.transport import AsyncSSHTransport, TransportError
+
+COMMAND = "cat /proc/uptime"
+
+
+@pytest.fixture
+async def broker(emulator, tmp_path, monkeypatch):
+    """A broker connected to the emulated router."""
+    monkeypatch.setattr(settings, "openwrt_host", emulator.host)
+    monkeypatch.setattr(settings, "openwrt_port", emulator.port)
+    monkeypatch.setattr(settings, "openwrt_password", "emulator")
+    monkeypatch.setattr(settings, "openwrt_key_file", None)
+    monkeypatch.setattr(settings, "enable_audit_logging", False)
+
+    client = SSHClient(AsyncSSHTransport())
+    broker = await ConnectionBroker(tmp_path / "broker.sock", client).start()
+    yield broker
+    await broker.stop()
+
+
+@pytest.fixture
+async def processes(broker):
+    """Two server processes' clients, connected through the broker."""
+    clients = [SSHClient(BrokerTransport(broker.path)) for _ in range(2)]
+    for client in clients:
+        assert await client.connect()
+    yield clients
+    for client in clients:
+        await client.disconnect()
+
+
+async def test_processes_share_one_connection(broker, processes, emulator):
+    """Server processes run commands without opening connections of their own."""
+    results = await asyncio.gather(*(client.execute(COMMAND) for client in processes))
+
+    assert all(result["success"] for result in results)
+    assert emulator.connections == 1
+    assert broker.sessions == 2
+
+
+async def test_socket_is_private(broker):
+    """Only the broker's owner can connect to its socket."""
+    assert broker.path.stat().st_mode & 0o777 == 0o600
+
+
+async def test_timed_out_command_is_stopped(broker, processes, emulator):
+    """A command the process stops waiting for is terminated on the router."""
+    # A shared read would keep running for the other processes
+    broker.client.coalesce_reads = False
+    emulator.config.command_latency[COMMAND] = 30
+
+    result = await processes[0].execute(COMMAND, timeout=0.1)
+    assert not result["success"]
+
+    for _ in range(100):
+        if emulator.terminated[COMMAND]:
+            break
+        await asyncio.sleep(0.01)
+    assert emulator.terminated[COMMAND] == 1
+
+
+async def test_broker_shutdown_is_detected(broker, processes):
+    """Processes notice a broker that went away and reconnect on the next call."""
+    await broker.stop()
+    for _ in range(100):
+        if not processes[0].is_connected:
+            break
+        await asyncio.sleep(0.01)
+
+    assert not processes[0].is_connected
+    assert processes[0].connection_losses == 1
+
+
+async def test_direct_connection_without_broker(broker, tmp_path, emulator):
+    """With no broker listening, the fallback transport connects directly."""
+    transport = BrokerTransport(tmp_path / "missing.sock", AsyncSSHTransport())
+    client = SSHClient(transport)
+    try:
+        assert await client.connect()
+        assert transport.direct
+        assert (await client.execute(COMMAND))["success"]
+        assert emulator.connections == 2
+    finally:
+        await client.disconnect()
+
+
+async def test_no_direct_connection_without_fallback(tmp_path):
+    """Without a fallback, a missing broker is an error, never a direct connection."""
+    transport = BrokerTransport(tmp_path / "missing.sock")
+    with pytest.raises(TransportError, match="broker unavailable"):
+        await transport.connect()
+    assert not transport.direct and not transport.is_connected
+
+    transport.direct = True
+    with pytest.raises(TransportError, match="fallback is disabled"):
+        await transport.run(COMMAND)
@@ -0,0 +1,102 @@
+"""Tests for session cassette recording and replay."""
+
+import time
+
+import pytest
+from openwrt_ssh_mcp.cassette import Cassette, Interaction, RecordingTransport, ReplayTransport
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.ssh_client import SSHClient
+from openwrt_ssh_mcp.transport import AsyncSSHTransport, create_transport
+
+
+@pytest.fixture
+def emulator_settings(emulator, monkeypatch):
+    """Point the settings at the emulator without connecting the global client."""
+    monkeypatch.setattr(settings, "openwrt_host", emulator.host)
+    monkeypatch.setattr(settings, "openwrt_port", emulator.port)
+    monkeypatch.setattr(settings, "openwrt_password", "emulator")
+    monkeypatch.setattr(settings, "openwrt_key_file", None)
+    monkeypatch.setattr(settings, "enable_audit_logging", False)
+    return emulator
+
+
+class TestCassette:
+    """Test recording, storage and replay of router sessions."""
+
+    @pytest.mark.parametrize("name", ["session.jsonl", "session.jsonl.gz"])
+    async def test_record_then_replay(self, emulator_settings, tmp_path, name):
+        """Replayed output matches what was recorded from the router."""
+        path = tmp_path / name
+        recorder = SSHClient(RecordingTransport(AsyncSSHTransport(), path))
+        assert await recorder.connect()
+        recorded = await recorder.execute("opkg list")
+        await recorder.execute("ubus call system board")
+        await recorder.disconnect()
+
+        cassette = Cassette.load(path)
+        assert len(cassette) == 2
+        assert cassette.metadata["router"].endswith(f":{emulator_settings.port}")
+
+        replayer = SSHClient(ReplayTransport(path))
+        assert await replayer.connect()
+        replayed = await replayer.execute("opkg list")
+        assert replayed["stdout"] == recorded["stdout"]
+        assert replayed["exit_code"] == 0
+        # Replay never touches the router
+        assert emulator_settings.commands["opkg list"] == 1
+
+    async def test_saved_after_connection_drops(self, emulator_settings, tmp_path):
+        """The cassette is saved on disconnect even if the connection was lost."""
+        path = tmp_path / "session.jsonl"
+        recorder = SSHClient(RecordingTransport(AsyncSSHTransport(), path))
+        assert await recorder.connect()
+        await recorder.execute("uptime")
+        await recorder.transport.inner.close()
+        assert not recorder.transport.is_connected
+
+        await recorder.disconnect()
+        assert len(Cassette.load(path)) == 1
+
+    async def test_repeated_commands_cycle_in_order(self):
+        """Repeated commands are answered in recorded order, then wrap around."""
+        transport = ReplayTransport(Cassette([
+            Interaction("uptime", "1", "", 0, 0.0),
+            Interaction("uptime", "2", "", 0, 0.0),
+        ]))
+        await transport.connect()
+        outputs = [(await transport.run("uptime")).stdout for _ in range(3)]
+        assert outputs == ["1", "2", "1"]
+
+        missing = await transport.run("reboot")
+        assert missing.exit_status == 127
+
+    async def test_scaled_timing(self):
+        """Replay waits the recorded duration times the scale factor."""
+        cassette = Cassette([Interaction("uptime", "1", "", 0, 0.2)])
+        fast = ReplayTransport(cassette, "none")
+        scaled = ReplayTransport(cassette, 0.5)
+        for transport in (fast, scaled):
+            await transport.connect()
+
+        start = time.perf_counter()
+        await fast.run("uptime")
+        assert time.perf_counter() - start < 0.05
+
+        start = time.perf_counter()
+        await scaled.run("uptime")
+        assert 0.09 < time.perf_counter() - start < 0.5
+
+        with pytest.raises(ValueError):
+            ReplayTransport(cassette, "sometimes")
+
+    def test_settings_select_transport(self, tmp_path, monkeypatch):
+        """create_transport() honours the cassette settings."""
+        path = tmp_path / "empty.jsonl"
+        Cassette().save(path)
+
+        monkeypatch.setattr(settings, "ssh_replay_cassette", str(path))
+        assert isinstance(create_transport(), ReplayTransport)
+
+        monkeypatch.setattr(settings, "ssh_replay_cassette", None)
+        monkeypatch.setattr(settings, "ssh_record_cassette", str(path))
+        assert isinstance(create_transport(), RecordingTransport)
@@ -0,0 +1,110 @@
+"""Tests for the per-router circuit breaker."""
+
+import asyncio
+import json
+import time
+
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.faults import FaultConfig, FaultInjectingTransport
+from openwrt_ssh_mcp.ssh_client import ssh_client
+
+
+class TestCircuitBreaker:
+    """Test state transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Only an unbroken run of failures opens the circuit."""
+        breaker = CircuitBreaker("router", failure_threshold=3, reset_timeout=60)
+        breaker.record_failure("timeout")
+        breaker.record_failure("timeout")
+        breaker.record_success()
+        breaker.record_failure("timeout")
+        breaker.record_failure("timeout")
+        assert breaker.state == CLOSED
+
+        assert breaker.record_failure("timeout") is True
+        assert breaker.state == OPEN
+        assert not breaker.allows_requests()
+        assert 59 < breaker.retry_after() <= 60
+
+        result = breaker.unavailable()
+        assert result["success"] is False
+        assert result["router_unavailable"] is True
+
+    def test_probe_outcome(self):
+        """A failed probe reopens the circuit, a successful one closes it."""
+        breaker = CircuitBreaker("router", failure_threshold=1, reset_timeout=60)
+        breaker.record_failure("refused")
+        breaker.begin_probe()
+        assert breaker.state == HALF_OPEN
+        assert breaker.record_failure("refused") is False
+        assert breaker.state == OPEN
+        assert breaker.opens == 1
+
+        breaker.begin_probe()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.failures == 0
+
+
+async def test_fails_fast_and_recovers(connected_router, monkeypatch):
+    """While the router is down tools answer at once; the probe closes the circuit."""
+    monkeypatch.setattr(settings, "ssh_reconnect_backoff", 0.01)
+    monkeypatch.setattr(ssh_client.breaker, "failure_threshold", 3)
+    monkeypatch.setattr(ssh_client.breaker, "reset_timeout", 0.2)
+    faults = FaultInjectingTransport(ssh_client.transport, FaultConfig(connect_failure_rate=1.0))
+    monkeypatch.setattr(ssh_client, "transport", faults)
+
+    connected_router.drop_connections()
+    while ssh_client.is_connected:
+        await asyncio.sleep(0.01)
+    assert not await ssh_client.ensure_connected()
+    assert ssh_client.breaker.state == OPEN
+    attempts = faults.injected["connect_failure"]
+
+    start = time.perf_counter()
+    content = await server.call_tool("openwrt_get_wifi_status", {})
+    result = json.loads(content[0].text)
+    assert time.perf_counter() - start < 0.1
+    assert result["router_unavailable"] is True
+    assert faults.injected["connect_failure"] == attempts
+
+    # The router comes back: the background probe reconnects
+    faults.config.connect_failure_rate = 0.0
+    for _ in range(100):
+        if ssh_client.breaker.allows_requests():
+            break
+        await asyncio.sleep(0.02)
+    assert ssh_client.breaker.state == CLOSED
+    assert ssh_client.is_connected
+
+    content = await server.call_tool("openwrt_get_wifi_status", {})
+    assert json.loads(content[0].text)["success"] is True
+
+
+async def test_probe_reopens_when_command_times_out(connected_router, monkeypatch):
+    """A probe that reconnects but whose command times out leaves the circuit open."""
+    monkeypatch.setattr(settings, "ssh_timeout", 0.2)
+    monkeypatch.setattr(ssh_client.breaker, "failure_threshold", 1)
+    monkeypatch.setattr(ssh_client.breaker, "reset_timeout", 0.05)
+    faults = FaultInjectingTransport(ssh_client.transport, FaultConfig(stall_rate=1.0))
+    monkeypatch.setattr(ssh_client, "transport", faults)
+
+    connected_router.drop_connections()
+    while ssh_client.is_connected:
+        await asyncio.sleep(0.01)
+    ssh_client._record_failure("Connection lost")
+    assert ssh_client.breaker.state == OPEN
+
+    states = set()
+    for _ in range(200):
+        states.add(ssh_client.breaker.state)
+        if faults.injected["stall"] and ssh_client.breaker.state == OPEN:
+            break
+        await asyncio.sleep(0.005)
+    assert ssh_client.breaker.state == OPEN
+    assert CLOSED not in states
+    # The probe did reconnect before its command timed out
+    assert connected_router.connections == 2
@@ -0,0 +1,70 @@
+"""Tests for single-flight sharing of identical concurrent read commands."""
+
+import asyncio
+
+from openwrt_ssh_mcp.ssh_client import ssh_client
+
+SLOW = "ubus call network.wireless status"
+
+
+async def test_identical_reads_share_one_execution(connected_router):
+    """Concurrent identical reads run once on the router."""
+    connected_router.config.command_latency[SLOW] = 0.2
+    before = ssh_client.coalesced_commands
+
+    results = await asyncio.gather(*(ssh_client.execute(SLOW) for _ in range(5)))
+
+    assert connected_router.commands[SLOW] == 1
+    assert ssh_client.coalesced_commands - before == 4
+    assert all(result["success"] for result in results)
+    assert all(result["stdout"] == results[0]["stdout"] for result in results)
+    # Every caller gets its own copy of the result
+    assert len({id(result) for result in results}) == 5
+    assert not ssh_client._in_flight
+
+    await ssh_client.execute(SLOW)
+    assert connected_router.commands[SLOW] == 2
+
+
+async def test_mutating_commands_are_not_shared(connected_router):
+    """Commands that may change the router always run once per caller."""
+    command = "ubus call network.interface.lan restart"
+    connected_router.config.command_latency[command] = 0.1
+
+    await asyncio.gather(ssh_client.execute(command), ssh_client.execute(command))
+
+    assert connected_router.commands[command] == 2
+
+
+async def test_failures_and_timeouts_propagate(connected_router):
+    """A shared failure reaches every caller; each caller keeps its own timeout."""
+    missing = "cat /nonexistent"
+    connected_router.config.command_latency[missing] = 0.1
+    first, second = await asyncio.gather(
+        ssh_client.execute(missing), ssh_client.execute(missing)
+    )
+    assert connected_router.commands[missing] == 1
+    assert not first["success"] and not second["success"]
+    assert first["exit_code"] == second["exit_code"] != 0
+
+    connected_router.config.command_latency[SLOW] = 0.3
+    patient, impatient = await asyncio.gather(
+        ssh_client.execute(SLOW, timeout=5), ssh_client.execute(SLOW, timeout=0.05)
+    )
+    assert patient["success"]
+    assert not impatient["success"]
+    assert "timed out" in impatient["stderr"]
+
+
+async def test_cancelled_first_caller_does_not_fail_others(connected_router):
+    """The shared execution survives the caller that started it."""
+    connected_router.config.command_latency[SLOW] = 0.2
+    first = asyncio.create_task(ssh_client.execute(SLOW))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(ssh_client.execute(SLOW))
+    await asyncio.sleep(0.05)
+    first.cancel()
+
+    result = await second
+    assert result["success"]
+    assert connected_router.commands[SLOW] == 1
@@ -0,0 +1,134 @@
+"""Tests for the adaptive (AIMD) concurrent command limit."""
+
+import asyncio
+import time
+
+import pytest
+
+from openwrt_ssh_mcp.concurrency import AdaptiveLimiter
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.ssh_client import ssh_client
+
+
+def limiter(**options) -> AdaptiveLimiter:
+    """An adaptive limiter starting at 4 within [1, 8]."""
+    defaults = dict(initial=4, min_limit=1, max_limit=8, adaptive=True,
+                    tolerance=2.0, backoff=0.5, max_load=2.0)
+    return AdaptiveLimiter(**{**defaults, **options})
+
+
+class TestAdaptiveLimiter:
+    """Test slot accounting and limit adjustments."""
+
+    async def test_queues_beyond_limit(self):
+        """Callers beyond the limit wait and are served in order."""
+        slots = limiter(initial=2)
+        await slots.acquire()
+        await slots.acquire()
+        third = asyncio.create_task(slots.acquire())
+        cancelled = asyncio.create_task(slots.acquire())
+        await asyncio.sleep(0)
+        assert slots.waiting == 2
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert slots.waiting == 1
+
+        slots.release()
+        await third
+        assert slots.in_flight == 2 and slots.waiting == 0
+
+    def test_additive_increase_only_when_saturated(self):
+        """Healthy commands raise the limit by about one per window in use."""
+        slots = limiter()
+        start = time.perf_counter()
+        slots.in_flight = 1
+        for _ in range(20):
+            slots.record("uptime", start, 0.01, ok=True)
+        assert slots.limit == 4
+
+        slots.in_flight = 4
+        for _ in range(4):
+            slots.record("uptime", start, 0.01, ok=True)
+        assert int(slots.limit) == 4
+        slots.record("uptime", start, 0.01, ok=True)
+        assert int(slots.limit) == 5
+
+    def test_multiplicative_decrease(self):
+        """Failures and inflated latency cut the limit once per generation."""
+        slots = limiter(initial=8)
+        start = time.perf_counter()
+        slots.record("uptime", start, 0.02, ok=True)
+
+        slots.record("uptime", start, 0.2, ok=True)
+        assert slots.limit == 4
+        # Commands sent before that decrease do not cut the limit again
+        slots.record("uptime", start, 0.2, ok=False)
+        assert slots.limit == 4
+
+        slots.record("uptime", time.perf_counter(), 0.0, ok=False)
+        assert slots.limit == 2
+        slots.record("uptime", time.perf_counter(), 0.0, ok=False)
+        slots.record("uptime", time.perf_counter(), 0.0, ok=False)
+        assert slots.limit == 1
+        assert slots.decreases == 3
+
+    def test_router_load(self):
+        """A load average above max_load lowers the limit."""
+        slots = limiter()
+        slots.observe_load("0.50 0.40 0.30 1/80 1234")
+        assert slots.limit == 4 and slots.load == 0.5
+        slots.observe_load("3.10 2.00 1.00 4/80 1234")
+        assert slots.limit == 2
+
+    def test_fixed_when_not_adaptive(self):
+        """With adaptation off the limit never moves."""
+        slots = limiter(adaptive=False)
+        slots.in_flight = 4
+        slots.record("uptime", time.perf_counter(), 0.01, ok=True)
+        slots.record("uptime", time.perf_counter(), 0.0, ok=False)
+        assert slots.limit == 4
+
+
+@pytest.fixture
+def fresh_limiter(monkeypatch):
+    """Give the global client an adaptive limit of 2 for one test."""
+    monkeypatch.setattr(ssh_client, "limiter", limiter(initial=2))
+    return ssh_client.limiter
+
+
+async def test_client_respects_limit(connected_router, fresh_limiter):
+    """No more commands than the limit run on the router at once."""
+    connected_router.config.latency = 0.05
+    peak = excess = 0
+
+    async def watch():
+        nonlocal peak, excess
+        while True:
+            peak = max(peak, ssh_client.active_commands)
+            # The limit may grow during the run (healthy, saturated commands)
+            excess = max(excess, ssh_client.active_commands - ssh_client.command_slots)
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(watch())
+    results = await asyncio.gather(*(ssh_client.execute(f"ping -c {i} router")
+                                     for i in range(1, 7)))
+    watcher.cancel()
+
+    assert len(results) == 6
+    assert peak >= 2 and excess == 0
+    assert ssh_client.command_slots >= 2
+
+
+async def test_client_polls_router_load(connected_router, fresh_limiter, monkeypatch):
+    """While adapting, the client samples the router's load by itself."""
+    monkeypatch.setattr(settings, "ssh_load_poll_interval", 0.05)
+    await ssh_client.disconnect()
+    assert await ssh_client.connect()
+
+    for _ in range(100):
+        if fresh_limiter.load is not None:
+            break
+        await asyncio.sleep(0.01)
+    assert fresh_limiter.load == 0.08
+    assert connected_router.commands["cat /proc/loadavg"] >= 1
@@ -0,0 +1,67 @@
+"""End-to-end tool tests against the local OpenWRT router emulator."""
+
+import time
+
+import pytest
+from benchmarks.emulator import EmulatorConfig, RouterEmulator
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.tools import OpenWRTTools
+
+
+class TestRouterEmulator:
+    """Test the emulator through the real SSH client and tools."""
+
+    async def test_system_info(self, connected_router):
+        """ubus JSON output is parsed by get_system_info."""
+        result = await OpenWRTTools.get_system_info()
+        assert result["success"] is True
+        assert result["system_info"]["board"]["model"] == "Emulated OpenWRT Router"
+        assert connected_router.commands["ubus call system board"] == 1
+
+    async def test_dhcp_and_thread(self, connected_router):
+        """Lease files and ot-ctl output are served like a real router."""
+        leases = await OpenWRTTools.list_dhcp_leases()
+        assert leases["count"] == 5
+        assert leases["leases"][0]["hostname"] == "host-0"
+
+        state = await OpenWRTTools.thread_get_state()
+        assert state["state"].startswith("leader")
+
+    async def test_large_outputs_are_paginated(self, connected_router):
+        """opkg list output is large enough to exercise the result store."""
+        result = await server.dispatch_tool("openwrt_opkg_list_available", {})
+        assert result["count"] == 600
+        assert result["pagination"]["has_more"] is True
+
+    async def test_unknown_commands_fail(self, connected_router):
+        """Commands the emulator does not know exit like a missing binary."""
+        from openwrt_ssh_mcp.ssh_client import ssh_client
+
+        result = await ssh_client.execute("frobnicate")
+        assert result["success"] is False
+        assert result["exit_code"] == 127
+
+    async def test_injected_latency(self):
+        """Per-command latency is applied before output is produced."""
+        config = EmulatorConfig(command_latency={"opkg update": 0.2})
+        async with RouterEmulator(config) as router:
+            assert router.respond("opkg update")[2] == 0
+            assert router._latency_for("opkg update") == pytest.approx(0.2)
+            assert router._latency_for("opkg list") == 0
+
+    async def test_bandwidth_limit(self, emulator, connected_router, monkeypatch):
+        """Output is throttled to the configured bandwidth."""
+        from openwrt_ssh_mcp.ssh_client import ssh_client
+
+        monkeypatch.setattr(emulator.config, "bandwidth", 200_000)
+        monkeypatch.setattr(emulator.config, "chunk_size", 8192)
+        start = time.perf_counter()
+        result = await ssh_client.execute("opkg list")
+        elapsed = time.perf_counter() - start
+
+        assert result["success"] is True
+        assert elapsed >= len(result["stdout"]) / 200_000 * 0.8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
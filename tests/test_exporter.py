@@ -0,0 +1,71 @@
+"""Tests for the OpenMetrics endpoint."""
+
+import asyncio
+
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.exporter import MetricsExporter, RouterSampler, parse_router_sample
+
+
+async def scrape(exporter: MetricsExporter, path: str = "/metrics") -> tuple[str, str]:
+    """GET a path from the exporter; returns (status line, body)."""
+    reader, writer = await asyncio.open_connection(exporter.host, exporter.port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = (await reader.read()).decode()
+    writer.close()
+    head, _, body = response.partition("\r\n\r\n")
+    return head.splitlines()[0], body
+
+
+class TestExporter:
+    """Test exposition of server and router metrics."""
+
+    def test_parse_router_sample(self):
+        """/proc output is turned into load, memory, uptime and interface counters."""
+        sample = parse_router_sample({
+            "loadavg": "0.50 0.25 0.10 1/90 1234",
+            "meminfo": "MemTotal: 1000 kB\nMemAvailable: 500 kB\nSlab: 10 kB",
+            "uptime": "3600.5 7000.1",
+            "net_dev": "header\nheader\n  eth0: 100 2 0 0 0 0 0 0 300 4 0 1 0 0 0 0",
+        })
+        assert sample["load"] == {"1": 0.5, "5": 0.25, "15": 0.1}
+        assert sample["memory"] == {"total": 1024000, "available": 512000}
+        assert sample["uptime"] == 3600.5
+        assert sample["interfaces"]["eth0"]["transmit_bytes"] == 300
+        assert sample["interfaces"]["eth0"]["transmit_drop"] == 1
+
+    async def test_scrape(self, connected_router):
+        """A scrape returns server counters, histograms and sampled router metrics."""
+        await server.dispatch_tool("openwrt_get_system_info", {})
+        sampler = RouterSampler(interval=3600)
+        assert await sampler.sample_once()
+
+        exporter = await MetricsExporter(port=0, sampler=sampler).start()
+        await sampler.stop()
+        try:
+            before = sum(connected_router.commands.values())
+            status, body = await scrape(exporter)
+            missing, _ = await scrape(exporter, "/other")
+            # Samples are pre-aggregated: a scrape runs nothing on the router
+            assert sum(connected_router.commands.values()) == before
+        finally:
+            await exporter.stop()
+
+        assert status == "HTTP/1.1 200 OK"
+        assert missing == "HTTP/1.1 404 Not Found"
+        assert body.endswith("# EOF\n")
+        assert 'openwrt_mcp_tool_calls_total{tool="openwrt_get_system_info"}' in body
+        assert ('openwrt_mcp_tool_duration_seconds_bucket{tool="openwrt_get_system_info",'
+                'phase="total",le="+Inf"}') in body
+        assert "openwrt_mcp_ssh_connected 1" in body
+        assert "openwrt_mcp_result_store_hits_total" in body
+        assert 'openwrt_router_load{router=' in body
+        assert 'interface="wlan0"} ' in body
+
+    async def test_sampler_skips_disconnected_router(self, emulator):
+        """The sampler never opens a connection on its own."""
+        from openwrt_ssh_mcp.ssh_client import SSHClient
+
+        sampler = RouterSampler(client=SSHClient(), interval=3600)
+        assert await sampler.sample_once() is False
+        assert emulator.connections == 0
@@ -0,0 +1,134 @@
+"""Resilience and tail-latency tests using the fault-injecting transport."""
+
+import json
+import time
+
+import pytest
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.faults import FaultConfig, FaultInjectingTransport
+from openwrt_ssh_mcp.ssh_client import ssh_client
+from openwrt_ssh_mcp.timeouts import timeout_policy
+
+TIMEOUT = 0.1
+
+# Read tools with their arguments and the number of commands one call runs
+TOOLS = {
+    "openwrt_test_connection": ({}, 1),
+    "openwrt_get_system_info": ({}, 4),
+    "openwrt_get_wifi_status": ({}, 1),
+    "openwrt_list_dhcp_leases": ({}, 2),
+    "openwrt_get_firewall_rules": ({}, 1),
+    "openwrt_read_config": ({"config_name": "network"}, 1),
+    "openwrt_thread_get_state": ({}, 1),
+    "openwrt_thread_get_dataset": ({}, 2),
+    "openwrt_thread_get_info": ({}, 10),
+    "openwrt_opkg_list_installed": ({}, 1),
+    "openwrt_opkg_info": ({"package_name": "luci-pkg00000"}, 1),
+    "openwrt_opkg_list_available": ({}, 1),
+}
+
+
+@pytest.fixture
+def faults(connected_router, monkeypatch):
+    """Wrap the connected client's transport in a fault injector (no faults yet)."""
+    monkeypatch.setattr(settings, "ssh_timeout", TIMEOUT)
+    monkeypatch.setattr(settings, "ssh_reconnect_backoff", 0.01)
+    # Every command gets the same short timeout, whatever has been learned
+    monkeypatch.setattr(timeout_policy, "enabled", False)
+    transport = FaultInjectingTransport(ssh_client.transport, FaultConfig(seed=7))
+    monkeypatch.setattr(ssh_client, "transport", transport)
+    return transport
+
+
+async def timed_call(tool: str, arguments: dict) -> tuple[dict, float]:
+    """Call a tool the way an MCP client does and time it."""
+    start = time.perf_counter()
+    content = await server.call_tool(tool, dict(arguments))
+    return json.loads(content[0].text), time.perf_counter() - start
+
+
+def bound(commands: int) -> float:
+    """Worst case for a call: every command hits the timeout, plus a reconnect."""
+    return commands * TIMEOUT + 0.5
+
+
+class TestTailLatency:
+    """Hung commands never pin a call for longer than the command timeout."""
+
+    @pytest.mark.parametrize("tool", sorted(TOOLS))
+    async def test_stalls_bounded_by_timeout(self, faults, tool):
+        arguments, commands = TOOLS[tool]
+        faults.config.stall_rate = 0.5
+        faults.config.stall_time = 60
+
+        for _ in range(3):
+            _, elapsed = await timed_call(tool, arguments)
+            assert elapsed < bound(commands)
+
+    async def test_delayed_exit_and_slow_reads_bounded(self, faults):
+        faults.config.exit_delay_rate = 1.0
+        faults.config.exit_delay = 30
+        result, elapsed = await timed_call("openwrt_thread_get_state", {})
+        assert result["success"] is False
+        assert "timed out" in result["error"]
+        assert elapsed < bound(1)
+
+        faults.config.exit_delay_rate = 0.0
+        faults.config.slow_read_rate = 1.0
+        faults.config.slow_read_bandwidth = 1000
+        _, elapsed = await timed_call("openwrt_opkg_list_available", {})
+        assert elapsed < bound(1)
+
+    async def test_half_open_connection_bounded(self, faults):
+        faults.config.half_open_rate = 1.0
+        faults.config.stall_time = 60
+        for _ in range(3):
+            result, elapsed = await timed_call("openwrt_get_wifi_status", {})
+            assert result["success"] is False
+            assert elapsed < bound(1)
+
+
+class TestRecovery:
+    """Tools recover once the fault clears."""
+
+    @pytest.mark.parametrize("tool", sorted(TOOLS))
+    async def test_recovers_after_disconnect(self, faults, connected_router, tool):
+        arguments, commands = TOOLS[tool]
+        connections = connected_router.connections
+
+        faults.config.disconnect_rate = 1.0
+        _, elapsed = await timed_call(tool, arguments)
+        assert elapsed < bound(commands)
+
+        faults.config.disconnect_rate = 0.0
+        result, elapsed = await timed_call(tool, arguments)
+        assert result.get("success", result.get("connected")) is True
+        assert elapsed < bound(commands)
+        assert connected_router.connections > connections
+
+    async def test_partial_output_reported_as_failure(self, faults):
+        faults.config.partial_output_rate = 1.0
+        result = await ssh_client.execute("opkg list-installed")
+        assert result["success"] is False
+        assert result["exit_code"] == -1
+
+    async def test_recovers_after_failed_connects(self, faults):
+        faults.config.disconnect_rate = 1.0
+        await timed_call("openwrt_thread_get_state", {})
+
+        faults.config.disconnect_rate = 0.0
+        faults.config.connect_failure_rate = 1.0
+        result, elapsed = await timed_call("openwrt_thread_get_state", {})
+        assert result["success"] is False
+        assert elapsed < bound(1)
+
+        faults.config.connect_failure_rate = 0.0
+        result, _ = await timed_call("openwrt_thread_get_state", {})
+        assert result["success"] is True
+        # One round of attempts, not one per caller or per command
+        assert faults.injected["connect_failure"] == settings.ssh_reconnect_attempts
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
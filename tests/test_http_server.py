@@ -0,0 +1,97 @@
+"""Tests for serving many MCP sessions over streamable HTTP."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from mcp import ClientSession
+from mcp.client.streamable_http import streamable_http_client
+
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.http_server import MCPHTTPServer
+from openwrt_ssh_mcp.sessions import SessionLimiter, session_limiter
+
+
+class Session:
+    """Stand-in for an MCP session."""
+
+
+async def call(url: str, tool: str) -> dict:
+    """Open a session, call a tool and return its decoded result."""
+    async with streamable_http_client(url) as (read_stream, write_stream, _):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            tools = await session.list_tools()
+            assert tool in {spec.name for spec in tools.tools}
+            result = await session.call_tool(tool, {})
+            return json.loads(result.content[0].text)
+
+
+async def test_sessions_share_one_connection(connected_router, monkeypatch):
+    """Concurrent clients are served by one process over one router connection."""
+    monkeypatch.setattr(settings, "mcp_transport", "http")
+    calls = session_limiter.calls
+    http = await MCPHTTPServer(server.app, "127.0.0.1", 0).start()
+    try:
+        results = await asyncio.gather(
+            *(call(http.url, "openwrt_get_system_info") for _ in range(4))
+        )
+    finally:
+        await http.stop()
+
+    assert all(result["success"] for result in results)
+    assert connected_router.connections == 1
+    assert session_limiter.calls == calls + 4
+
+
+async def test_stdio_calls_are_not_limited(connected_router, monkeypatch):
+    """The single stdio client is not held to the per-session limit."""
+    monkeypatch.setattr(settings, "mcp_transport", "stdio")
+    monkeypatch.setattr(server, "current_session", lambda: Session())
+    calls = session_limiter.calls
+
+    response = await server.call_tool("openwrt_get_system_info", {})
+
+    assert json.loads(response[0].text)["success"]
+    assert session_limiter.calls == calls
+
+
+async def test_only_local_requests_are_served():
+    """Non-loopback listen addresses and foreign Host headers are rejected."""
+    with pytest.raises(ValueError, match="loopback"):
+        MCPHTTPServer(server.app, "0.0.0.0", 0)
+
+    http = await MCPHTTPServer(server.app, "127.0.0.1", 0).start()
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(http.url, json={}, headers={"Host": "evil.example"})
+    finally:
+        await http.stop()
+    assert response.status_code == 421
+
+
+async def test_calls_are_limited_per_session():
+    """A session waits for its own calls; other sessions are not held up."""
+    limiter = SessionLimiter(max_concurrent=1)
+    busy, other = Session(), Session()
+    release = asyncio.Event()
+
+    async def hold(session: Session) -> None:
+        async with limiter.slot(session):
+            await release.wait()
+
+    first = asyncio.create_task(hold(busy))
+    second = asyncio.create_task(hold(busy))
+    await asyncio.sleep(0.01)
+    assert limiter.snapshot()["running"] == 1
+
+    async with limiter.slot(other):
+        assert limiter.snapshot()["running"] == 2
+
+    release.set()
+    await asyncio.gather(first, second)
+    snapshot = limiter.snapshot()
+    assert snapshot["sessions"] == 2
+    assert snapshot["calls"] == 3
@@ -0,0 +1,60 @@
+"""Tests for the event-loop lag monitor and blocking-call detector."""
+
+import asyncio
+import time
+
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.exporter import render_metrics
+from openwrt_ssh_mcp.loop_monitor import LoopMonitor
+
+
+def block_the_loop(seconds: float) -> None:
+    """Synchronous work that stalls every coroutine."""
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    """Test lag sampling and stall detection."""
+
+    async def test_idle_loop_has_low_lag(self):
+        """An idle loop wakes the sampler on time."""
+        monitor = LoopMonitor(interval=0.01, threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+
+        assert monitor.lag.count >= 5
+        assert monitor.stall_count == 0
+        assert not monitor.running
+
+    async def test_blocking_call_is_reported_with_stack(self):
+        """A callback blocking past the threshold is caught with its stack."""
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        assert monitor.stall_count == 1
+        stall = monitor.stalls[-1]
+        assert any("block_the_loop" in line for line in stall["stack"])
+        # Updated with the full duration once the loop ran again
+        assert stall["blocked_ms"] >= 250
+        assert monitor.lag.max >= 250_000
+
+    async def test_exposed_through_metrics(self, monkeypatch):
+        """Lag and stalls are part of openwrt_metrics and the OpenMetrics output."""
+        monitor = LoopMonitor(interval=0.01, threshold=0.1)
+        monkeypatch.setattr(server, "loop_monitor", monitor)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        try:
+            report = await server.dispatch_tool("openwrt_metrics", {})
+            text = render_metrics(monitor=monitor)
+        finally:
+            await monitor.stop()
+
+        assert report["event_loop"]["lag"]["count"] >= 1
+        assert "openwrt_mcp_event_loop_lag_seconds_count" in text
+        assert "openwrt_mcp_event_loop_stalls_total 0" in text
@@ -0,0 +1,85 @@
+"""Tests for latency histograms and the openwrt_metrics tool."""
+
+import json
+
+import pytest
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.metrics import Histogram, Metrics, command_template, metrics
+
+
+class TestHistogram:
+    """Test the log-linear histogram."""
+
+    def test_percentiles_within_precision(self):
+        """Percentiles stay within the bucket precision of the exact values."""
+        hist = Histogram()
+        values = [i / 1000 for i in range(1, 1001)]  # 1 ms .. 1 s
+        for value in values:
+            hist.record(value)
+
+        assert hist.count == 1000
+        for pct, exact in ((50, 0.5), (90, 0.9), (99, 0.99)):
+            assert hist.percentile(pct) == pytest.approx(exact, rel=0.02)
+        assert hist.percentile(100) == pytest.approx(1.0)
+        # Memory is bounded by the bucket layout, not the sample count
+        assert len(hist.buckets) < 500
+
+    def test_cumulative_counts(self):
+        """Cumulative counts at fixed bounds feed exposition formats."""
+        hist = Histogram()
+        for value in (0.001, 0.002, 0.050, 2.0):
+            hist.record(value)
+        assert hist.cumulative([0.005, 0.1, 10.0]) == [2, 3, 4]
+
+
+class TestCommandTemplate:
+    """Test command normalization."""
+
+    @pytest.mark.parametrize("command,template", [
+        ("ping -c 3 10.0.0.1", "ping -c <n> <ip>"),
+        ("uci show network", "uci show network"),
+        ("/usr/sbin/ot-ctl commissioner joiner add * 'J01NME'",
+         "/usr/sbin/ot-ctl commissioner joiner add * ?"),
+        ("iw dev wlan0 station get aa:bb:cc:dd:ee:ff", "iw dev wlan0 station get <mac>"),
+    ])
+    def test_values_are_replaced(self, command, template):
+        """Values vary between calls; the command shape does not."""
+        assert command_template(command) == template
+
+    def test_template_cardinality_is_capped(self):
+        """Templates beyond the limit are grouped together."""
+        local = Metrics(max_templates=2)
+        for name in ("a", "b", "c", "d"):
+            local.record_command(f"cat /tmp/{name}", 0.0, 0.001, {"remote": 0.001}, ok=True)
+        assert set(local.commands) == {"cat /tmp/a", "cat /tmp/b", "<other>"}
+        assert local.commands["<other>"]["total"].count == 2
+
+
+class TestMetricsTool:
+    """Test per-tool phase breakdown through the real dispatch path."""
+
+    async def test_tool_phases_recorded(self, connected_router):
+        """A tool call is broken down into queue, SSH, parse and serialize time."""
+        metrics.reset()
+        await server.call_tool("openwrt_list_dhcp_leases", {})
+
+        contents = await server.call_tool("openwrt_metrics", {"tool": "openwrt_list_dhcp_leases"})
+        report = json.loads(contents[0].text)
+        tool = report["tools"]["openwrt_list_dhcp_leases"]
+        assert tool["calls"] == 1
+        assert tool["errors"] == 0
+        assert set(tool["phases"]) == {
+            "total", "queue_wait", "channel_open", "remote", "parse", "serialize"
+        }
+        assert tool["phases"]["remote"]["max_ms"] <= tool["phases"]["total"]["max_ms"]
+
+        command = report["commands"]["cat /tmp/dhcp.leases"]
+        assert command["calls"] == 1
+        assert command["phases"]["channel_open"]["count"] == 1
+
+    async def test_reset(self, connected_router):
+        """reset=true clears the histograms after reporting them."""
+        await server.dispatch_tool("openwrt_get_system_info", {})
+        report = await server.dispatch_tool("openwrt_metrics", {"reset": True})
+        assert report["tools"]["openwrt_get_system_info"]["calls"] >= 1
+        assert "openwrt_get_system_info" not in metrics.snapshot()["tools"]
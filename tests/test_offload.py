@@ -0,0 +1,74 @@
+"""Tests for offloading parsing of large outputs to a worker pool."""
+
+import asyncio
+import time
+
+import pytest
+
+from openwrt_ssh_mcp.offload import ParseOffloader
+from openwrt_ssh_mcp.parsers import parse_key_values, parse_opkg_list
+
+
+def package_list(count: int) -> str:
+    """An ``opkg list`` output with ``count`` packages."""
+    return "\n".join(f"pkg{i} - 1.{i} - Package number {i}" for i in range(count))
+
+
+def slow_parse(output: str) -> int:
+    """A parser that holds its worker for a while."""
+    time.sleep(0.3)
+    return len(output)
+
+
+class TestParseOffloader:
+    """Test inline and offloaded parsing."""
+
+    async def test_small_outputs_are_parsed_inline(self):
+        """Outputs below the threshold never reach the pool."""
+        offloader = ParseOffloader(mode="thread", threshold=1024)
+        info = await offloader.run(parse_key_values, "Package: luci\nVersion: 1.0")
+        assert info == {"package": "luci", "version": "1.0"}
+        assert offloader.snapshot()["inline"] == 1
+        assert offloader.offloaded == 0
+        assert offloader._executor is None
+
+    @pytest.mark.parametrize("mode", ["thread", "process"])
+    async def test_offloaded_result_matches_inline(self, mode):
+        """The pool returns the same result as parsing inline."""
+        output = package_list(2000)
+        offloader = ParseOffloader(mode=mode, threshold=1024, workers=1)
+        try:
+            packages = await offloader.run(parse_opkg_list, output)
+        finally:
+            offloader.shutdown()
+        assert packages == parse_opkg_list(output)
+        assert offloader.offloaded == 1
+
+    async def test_parser_errors_propagate(self):
+        """Exceptions raised in a worker reach the caller."""
+        offloader = ParseOffloader(mode="thread", threshold=0)
+        with pytest.raises(ValueError):
+            await offloader.run(int, "not a number")
+        offloader.shutdown()
+
+    async def test_loop_stays_responsive(self):
+        """Other coroutines keep running while a parse is offloaded."""
+        offloader = ParseOffloader(mode="thread", threshold=0)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        await offloader.run(slow_parse, "x")
+        ticker.cancel()
+        offloader.shutdown()
+        assert ticks >= 10
+
+    def test_rejects_unknown_mode(self):
+        """Only thread, process and off are accepted."""
+        with pytest.raises(ValueError):
+            ParseOffloader(mode="fiber")
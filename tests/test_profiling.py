@@ -0,0 +1,44 @@
+"""Tests for on-demand profiling of tool calls."""
+
+import json
+
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.profiling import ToolProfiler, profiler
+
+
+class TestProfiling:
+    """Test profile selection and report output."""
+
+    def test_tool_selection(self):
+        """Tools are profiled when listed, with "*", or on request."""
+        assert ToolProfiler(tools="a, b").should_profile("b")
+        assert not ToolProfiler(tools="a").should_profile("b")
+        assert ToolProfiler(tools="*").should_profile("b")
+        assert ToolProfiler(tools="").should_profile("b", requested=True)
+
+    async def test_profile_argument(self, connected_router, tmp_path, monkeypatch):
+        """profile=true writes a pstats file and a text report named by tool."""
+        monkeypatch.setattr(profiler, "directory", tmp_path)
+
+        contents = await server.call_tool("openwrt_opkg_list_available", {"profile": True})
+        result = json.loads(contents[0].text)
+
+        stats = result["profile"]["stats"]
+        report = result["profile"]["report"]
+        assert stats.startswith(str(tmp_path / "openwrt_opkg_list_available-"))
+        assert stats.endswith(".prof")
+
+        text = (tmp_path / report.rsplit("/", 1)[1]).read_text()
+        assert "function calls" in text
+        assert "opkg_list_available" in text
+        assert "allocation sites" in text
+
+    def test_overlapping_profiles_are_skipped(self, tmp_path):
+        """Only one call is profiled at a time."""
+        local = ToolProfiler(tools="*", directory=str(tmp_path))
+        with local.profile("outer") as outer:
+            with local.profile("inner") as inner:
+                pass
+        assert outer is not None
+        assert inner is None
+        assert outer.report_path.exists()
@@ -0,0 +1,98 @@
+"""Tests for liveness detection, single-flight reconnects and read retries."""
+
+import asyncio
+
+import pytest
+
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.faults import FaultConfig, FaultInjectingTransport
+from openwrt_ssh_mcp.ssh_client import SSHClient, ssh_client
+
+
+async def wait_for_disconnect(client: SSHClient) -> None:
+    """Give the transport time to notice a dropped connection."""
+    for _ in range(100):
+        if not client.is_connected:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    """Keep reconnect backoff short."""
+    monkeypatch.setattr(settings, "ssh_reconnect_backoff", 0.01)
+
+
+async def test_dropped_connection_is_detected(connected_router):
+    """A connection closed by the router clears is_connected without running a command."""
+    losses = ssh_client.connection_losses
+    connected_router.drop_connections()
+    await wait_for_disconnect(ssh_client)
+
+    assert not ssh_client.is_connected
+    assert ssh_client.connection_losses == losses + 1
+    assert await ssh_client.ensure_connected()
+
+
+async def test_concurrent_callers_share_one_reconnect(connected_router):
+    """Callers that find the connection down open it once between them."""
+    connected_router.drop_connections()
+    await wait_for_disconnect(ssh_client)
+    connections = connected_router.connections
+
+    results = await asyncio.gather(*(ssh_client.ensure_connected() for _ in range(5)))
+
+    assert all(results)
+    assert connected_router.connections == connections + 1
+
+
+async def test_failed_reconnect_is_not_repeated_by_waiters(connected_router, fast_backoff,
+                                                           monkeypatch):
+    """Callers queued behind a failed reconnect fail without retrying it."""
+    faults = FaultInjectingTransport(ssh_client.transport, FaultConfig(connect_failure_rate=1.0))
+    monkeypatch.setattr(ssh_client, "transport", faults)
+    connected_router.drop_connections()
+    await wait_for_disconnect(ssh_client)
+
+    results = await asyncio.gather(*(ssh_client.ensure_connected() for _ in range(5)))
+
+    assert not any(results)
+    assert faults.injected["connect_failure"] == settings.ssh_reconnect_attempts
+
+
+def test_backoff_grows_with_jitter(monkeypatch):
+    """Delays double per attempt up to the cap, never below half of it."""
+    monkeypatch.setattr(settings, "ssh_reconnect_backoff", 1.0)
+    monkeypatch.setattr(settings, "ssh_reconnect_backoff_max", 4.0)
+    for attempt, base in [(1, 1.0), (2, 2.0), (3, 4.0), (6, 4.0)]:
+        delay = SSHClient._backoff(attempt)
+        assert base / 2 <= delay <= base
+
+
+async def test_reads_are_retried_after_reconnect(connected_router, fast_backoff, monkeypatch):
+    """A read that loses its connection runs again on a new one; writes do not."""
+    faults = FaultInjectingTransport(ssh_client.transport, FaultConfig(seed=1))
+    monkeypatch.setattr(ssh_client, "transport", faults)
+    original_run = faults.run
+    drops = {"left": 1}
+
+    async def run_dropping_once(command):
+        if drops["left"]:
+            drops["left"] -= 1
+            faults.config.disconnect_rate = 1.0
+        try:
+            return await original_run(command)
+        finally:
+            faults.config.disconnect_rate = 0.0
+
+    monkeypatch.setattr(faults, "run", run_dropping_once)
+    retried = ssh_client.retried_commands
+
+    result = await ssh_client.execute("ubus call system board")
+    assert result["success"]
+    assert ssh_client.retried_commands == retried + 1
+
+    drops["left"] = 1
+    result = await ssh_client.execute("ubus call network.interface.lan restart")
+    assert not result["success"]
+    assert ssh_client.retried_commands == retried + 1
@@ -0,0 +1,74 @@
+"""Tests for the declarative tool registry."""
+
+import pytest
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.registry import ToolRegistry, registry
+
+
+class TestToolRegistry:
+    """Test schema building, validation and dispatch lookup."""
+
+    def test_all_tools_registered_once(self):
+        """Every tool appears exactly once with the shared shaping options."""
+        names = [tool.name for tool in registry.tools]
+        assert len(names) == len(set(names)) == len(registry)
+        assert "openwrt_get_system_info" in names
+        assert "openwrt_batch" in names
+        for tool in registry.tools:
+            assert "fields" in tool.inputSchema["properties"]
+            assert "compact" in tool.inputSchema["properties"]
+
+    def test_schemas_are_valid(self):
+        """Every tool's input schema is a valid JSON schema."""
+        for name in (tool.name for tool in registry.tools):
+            assert registry.get(name).validator is registry.get(name).validator
+
+    async def test_list_tools_is_precomputed(self):
+        """list_tools returns the same prebuilt definitions on every call."""
+        assert await server.list_tools() is await server.list_tools()
+
+    def test_delta_and_mutating_flags(self):
+        """Polling tools accept snapshots; write tools are marked mutating."""
+        leases = registry.get("openwrt_list_dhcp_leases")
+        assert leases.delta and not leases.mutating
+        assert "snapshot" in leases.tool.inputSchema["properties"]
+        assert registry.get("openwrt_opkg_install").mutating
+
+        execute = registry.get("openwrt_execute_command")
+        assert not execute.is_mutating({"command": "uci show network"})
+        assert execute.is_mutating({"command": "uci commit network"})
+        assert not registry.get("openwrt_fetch_result").requires_router
+
+    def test_validation_errors(self):
+        """Arguments are checked against the precompiled schema."""
+        spec = registry.get("openwrt_thread_create_network")
+        spec.validate({"channel": 20})
+        with pytest.raises(ValueError, match="channel"):
+            spec.validate({"channel": 99})
+
+        with pytest.raises(ValueError, match="Missing required argument: package_name"):
+            registry.get("openwrt_opkg_install").validate({})
+        with pytest.raises(ValueError, match="command"):
+            registry.get("openwrt_execute_command").validate({"command": ""})
+        with pytest.raises(ValueError, match="Unknown tool"):
+            registry.get("openwrt_nope")
+
+    async def test_decorator_binds_own_arguments(self):
+        """Handlers receive only their own arguments, not the shaping options."""
+        local = ToolRegistry()
+
+        @local.tool(name="echo", description="Echo", properties={"text": {"type": "string"}})
+        async def echo(text: str = "") -> dict:
+            return {"success": True, "text": text}
+
+        spec = local.get("echo")
+        arguments = {"text": "hi", "fields": ["text"], "compact": True}
+        spec.validate(arguments)
+        assert await spec.handler(**spec.bind(arguments)) == {"success": True, "text": "hi"}
+
+        with pytest.raises(ValueError, match="already registered"):
+            local.tool(name="echo", description="Again")(echo)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
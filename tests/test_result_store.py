@@ -0,0 +1,79 @@
+"""Tests for the server-side result store and cursor pagination."""
+
+import pytest
+from openwrt_ssh_mcp.result_store import ResultStore
+
+
+class TestResultStore:
+    """Test pagination, paging via cursors and eviction."""
+
+    def test_small_results_untouched(self):
+        """Results below the page size are returned as-is."""
+        store = ResultStore(page_size=10)
+        result = {"success": True, "packages": list(range(5)), "output": "a\nb"}
+
+        assert store.paginate(result) == result
+        assert len(store) == 0
+
+    def test_list_pagination_roundtrip(self):
+        """Large lists return a first page and cursors that walk the rest."""
+        store = ResultStore(page_size=10)
+        result = store.paginate({"success": True, "packages": list(range(25)), "count": 25})
+
+        assert result["packages"] == list(range(10))
+        assert result["count"] == 25
+        assert result["pagination"]["total"] == 25
+        assert result["pagination"]["has_more"] is True
+
+        seen = list(result["packages"])
+        cursor = result["pagination"]["next_cursor"]
+        while cursor:
+            page = store.fetch(cursor)
+            assert page["success"] is True
+            seen.extend(page["packages"])
+            cursor = page["pagination"]["next_cursor"]
+
+        assert seen == list(range(25))
+
+    def test_text_pagination_and_slices(self):
+        """Large text outputs are paged by line and support explicit slices."""
+        store = ResultStore(page_size=3)
+        text = "\n".join(f"line{i}" for i in range(10))
+        result = store.paginate({"success": True, "rules": text})
+
+        assert result["rules"] == "line0\nline1\nline2"
+        page = store.fetch(result["pagination"]["next_cursor"], offset=8, limit=5)
+        assert page["rules"] == "line8\nline9"
+        assert page["pagination"]["has_more"] is False
+        assert page["pagination"]["next_cursor"] is None
+
+    def test_lru_eviction(self):
+        """Oldest results are evicted once the entry limit is reached."""
+        store = ResultStore(page_size=1, max_entries=2)
+        cursors = [
+            store.paginate({"success": True, "items": [i, i]})["pagination"]["next_cursor"]
+            for i in range(3)
+        ]
+
+        assert len(store) == 2
+        assert store.fetch(cursors[0])["success"] is False
+        assert store.fetch(cursors[2])["items"] == [2]
+
+    def test_ttl_and_memory_limits(self, monkeypatch):
+        """Expired results are dropped and oversized results are not stored."""
+        store = ResultStore(page_size=1, max_bytes=64, ttl=10)
+        cursor = store.paginate({"success": True, "items": [1, 2]})["pagination"]["next_cursor"]
+
+        huge = store.paginate({"success": True, "items": ["x" * 100, "y"]})
+        assert huge["pagination"]["next_cursor"] is None
+        assert huge["pagination"]["has_more"] is True
+
+        import openwrt_ssh_mcp.result_store as module
+        real_monotonic = module.time.monotonic
+        monkeypatch.setattr(module.time, "monotonic", lambda: real_monotonic() + 60)
+        assert store.fetch(cursor)["success"] is False
+        assert store.total_bytes == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
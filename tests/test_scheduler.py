@@ -0,0 +1,143 @@
+"""Tests for priority classes and serialization of mutating tools."""
+
+import asyncio
+import time
+
+import pytest
+
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.concurrency import AdaptiveLimiter
+from openwrt_ssh_mcp.scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    WRITE,
+    RouterScheduler,
+    current_class,
+    priority_class,
+)
+
+
+class TestRouterScheduler:
+    """Test slot ordering and the write lock."""
+
+    def test_priority_class_context(self):
+        """Commands are interactive unless a block says otherwise."""
+        assert current_class() == INTERACTIVE
+        with priority_class(BACKGROUND):
+            assert current_class() == BACKGROUND
+        assert current_class() == INTERACTIVE
+        with pytest.raises(ValueError):
+            with priority_class("urgent"):
+                pass
+
+    async def test_interactive_commands_go_first(self):
+        """Queued interactive commands overtake queued background and write ones."""
+        scheduler = RouterScheduler()
+        limiter = AdaptiveLimiter(initial=1, adaptive=False)
+        await scheduler.acquire(limiter)
+        served = []
+
+        async def command(name):
+            with priority_class(name):
+                await scheduler.acquire(limiter)
+                served.append(name)
+                scheduler.release(limiter)
+
+        tasks = [asyncio.create_task(command(name)) for name in (WRITE, BACKGROUND, INTERACTIVE)]
+        await asyncio.sleep(0)
+        assert scheduler.queued == {WRITE: 1, BACKGROUND: 1, INTERACTIVE: 1}
+
+        limiter.release()
+        await asyncio.gather(*tasks)
+        assert served == [INTERACTIVE, BACKGROUND, WRITE]
+        assert scheduler.snapshot()["classes"][WRITE]["wait"]["count"] == 1
+
+    async def test_interactive_slot_is_kept(self):
+        """Writes never take the last slot; at a limit of one, reads run next to them."""
+        scheduler = RouterScheduler()
+        limiter = AdaptiveLimiter(initial=2, adaptive=False)
+        with priority_class(WRITE):
+            await scheduler.acquire(limiter)
+            second_write = asyncio.create_task(scheduler.acquire(limiter))
+        await asyncio.sleep(0)
+        assert not second_write.done()
+        await asyncio.wait_for(scheduler.acquire(limiter), 1)
+        assert limiter.in_flight == 2
+        second_write.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second_write
+
+        limiter = AdaptiveLimiter(initial=1, adaptive=False)
+        with priority_class(WRITE):
+            await scheduler.acquire(limiter)
+        await asyncio.wait_for(scheduler.acquire(limiter), 1)
+        with priority_class(BACKGROUND):
+            background = asyncio.create_task(scheduler.acquire(limiter))
+        await asyncio.sleep(0)
+        assert limiter.in_flight == 2 and not background.done()
+        background.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await background
+
+    async def test_waiting_writes_age_past_reads(self):
+        """A write queued long enough is served before newer interactive commands."""
+        scheduler = RouterScheduler()
+        limiter = AdaptiveLimiter(initial=1, adaptive=False, aging=0.01)
+        await scheduler.acquire(limiter)
+        served = []
+
+        async def command(name):
+            with priority_class(name):
+                await scheduler.acquire(limiter)
+                served.append(name)
+                scheduler.release(limiter)
+
+        write = asyncio.create_task(command(WRITE))
+        await asyncio.sleep(0.05)
+        read = asyncio.create_task(command(INTERACTIVE))
+        await asyncio.sleep(0)
+
+        scheduler.release(limiter)
+        await asyncio.gather(write, read)
+        assert served == [WRITE, INTERACTIVE]
+
+    async def test_mutating_tools_run_one_at_a_time(self):
+        """Writes wait for each other; reads do not wait for writes."""
+        scheduler = RouterScheduler()
+        running = []
+
+        async def tool(name, mutating):
+            async with scheduler.tool(mutating):
+                running.append(name)
+                await asyncio.sleep(0.05)
+                running.remove(name)
+                return current_class()
+
+        first = asyncio.create_task(tool("install", True))
+        second = asyncio.create_task(tool("remove", True))
+        await asyncio.sleep(0.01)
+        assert running == ["install"] and scheduler.writes_waiting == 1
+
+        assert await tool("state", False) == INTERACTIVE
+        assert await first == WRITE and await second == WRITE
+
+
+async def test_reads_are_not_delayed_by_installs(connected_router):
+    """A status read finishes while package installs are still running."""
+    connected_router.config.command_latency["opkg install"] = 0.3
+    start = time.perf_counter()
+
+    installs = [
+        asyncio.create_task(server.dispatch_tool("openwrt_opkg_install",
+                                                 {"package_name": f"luci-pkg0000{i}"}))
+        for i in range(2)
+    ]
+    await asyncio.sleep(0.05)
+    state = await server.dispatch_tool("openwrt_thread_get_state", {})
+    read_done = time.perf_counter() - start
+    await asyncio.gather(*installs)
+
+    assert state["success"]
+    assert read_done < 0.3
+    # The two installs ran one after the other
+    assert time.perf_counter() - start >= 0.6
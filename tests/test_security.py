@@ -52,6 +52,38 @@ class TestSecurityValidator:
             is_valid, error = SecurityValidator.validate_command(cmd)
             assert not is_valid, f"Command should be rejected (not whitelisted): {cmd}"
 
+    def test_is_mutating(self):
+        """Only commands known to be read-only count as non-mutating."""
+        reads = [
+            "ubus call network.wireless status",
+            "uci show network",
+            "cat /tmp/dhcp.leases",
+            "opkg list-installed",
+            "/usr/sbin/ot-ctl dataset active -x",
+            "echo 'Connection test successful'",
+            "ubus list network.*",
+            "uci get network.lan.ipaddr",
+        ]
+        writes = [
+            "ubus call network.interface.wan restart",
+            "opkg install luci",
+            "/usr/sbin/ot-ctl channel 15",
+            "/usr/sbin/ot-ctl thread start",
+            "uci set network.lan.ipaddr=10.0.0.1",
+            "echo x > /etc/config/network",
+            "uci get a.b; reboot",
+            "ubus list; uci set network.lan.ipaddr=10.9.9.9; uci commit",
+            "uci show network | tee /etc/config/backup",
+            "echo `reboot`",
+            "cat $(uci get a.b)",
+            "uci get a.b && reboot",
+        ]
+
+        for cmd in reads:
+            assert not SecurityValidator.is_mutating(cmd), f"Should be read-only: {cmd}"
+        for cmd in writes:
+            assert SecurityValidator.is_mutating(cmd), f"Should be mutating: {cmd}"
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,85 @@
+"""Tests for response shaping (field projection and compact output)."""
+
+import json
+
+import pytest
+from openwrt_ssh_mcp.shaping import add_shaping_properties, project, serialize
+
+
+SYSTEM_INFO = {
+    "success": True,
+    "system_info": {
+        "board": {"model": "GL.iNet GL-MT3000", "release": {"version": "23.05.2"}},
+        "info": {"uptime": 1234, "memory": {"total": 512, "free": 128}},
+        "loadavg": "0.10 0.20 0.30 1/80 1234",
+    },
+}
+
+
+class TestProjection:
+    """Test dotted-path field projection."""
+
+    def test_no_fields_returns_result(self):
+        """Without fields the result is returned unchanged."""
+        assert project(SYSTEM_INFO, None) is SYSTEM_INFO
+        assert project(SYSTEM_INFO, []) is SYSTEM_INFO
+
+    def test_nested_paths_are_merged(self):
+        """Several paths into the same object are merged together."""
+        shaped = project(
+            SYSTEM_INFO, ["system_info.board.model", "$.system_info.info.memory.free"]
+        )
+        assert shaped == {
+            "success": True,
+            "system_info": {
+                "board": {"model": "GL.iNet GL-MT3000"},
+                "info": {"memory": {"free": 128}},
+            },
+        }
+
+    def test_wildcards_over_lists_and_dicts(self):
+        """'*' and '[*]' project every list item or dict value."""
+        result = {
+            "success": True,
+            "packages": [
+                {"name": "luci", "version": "1", "description": "web ui"},
+                {"name": "ot-br-posix", "version": "2", "description": "otbr"},
+            ],
+        }
+        shaped = project(result, "packages[*].name, packages.*.version")
+        assert shaped["packages"] == [
+            {"name": "luci", "version": "1"},
+            {"name": "ot-br-posix", "version": "2"},
+        ]
+
+        shaped = project(SYSTEM_INFO, ["system_info.*.uptime"])
+        assert shaped["system_info"]["info"] == {"uptime": 1234}
+
+    def test_unknown_paths_keep_status(self):
+        """Unknown paths are ignored but success/error are always kept."""
+        shaped = project({"success": False, "error": "boom", "x": 1}, ["missing.path"])
+        assert shaped == {"success": False, "error": "boom"}
+
+
+class TestSerialization:
+    """Test compact and indented JSON output."""
+
+    def test_compact_output_is_smaller(self):
+        """Compact mode produces equivalent, smaller JSON."""
+        pretty = serialize(SYSTEM_INFO)
+        compact = serialize(SYSTEM_INFO, compact=True)
+
+        assert json.loads(pretty) == json.loads(compact)
+        assert len(compact) < len(pretty)
+        assert "\n" not in compact
+
+    def test_shaping_properties_added(self):
+        """Every schema gets the shared shaping options without clobbering its own."""
+        schema = {"type": "object", "properties": {"compact": {"type": "string"}}}
+        add_shaping_properties(schema)
+        assert "fields" in schema["properties"]
+        assert schema["properties"]["compact"] == {"type": "string"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,90 @@
+"""Tests for snapshot tokens and delta responses."""
+
+import pytest
+from openwrt_ssh_mcp.snapshots import SnapshotStore, flatten
+
+ROUTER = "root@192.168.1.1:22"
+
+
+def leases(*macs):
+    """Build a DHCP leases payload for the given MAC addresses."""
+    return {
+        "leases": [
+            {"mac": mac, "ip": f"192.168.1.{i + 10}", "hostname": f"host{i}"}
+            for i, mac in enumerate(macs)
+        ],
+        "count": len(macs),
+    }
+
+
+class TestFlatten:
+    """Test flattening of nested results."""
+
+    def test_lists_keyed_by_identity(self):
+        """List items with an identity field are keyed by it, not by position."""
+        flat = flatten(leases("aa", "bb"))
+        assert flat["leases[mac=bb].ip"] == "192.168.1.11"
+        assert flat["count"] == 2
+
+    def test_multiline_strings_are_line_sets(self):
+        """Tables in multi-line strings are compared line by line."""
+        flat = flatten({"neighbor_table": "| Role | RLOC16 |\n| R | 0x0400 |\n"})
+        assert flat == {
+            "neighbor_table[| Role | RLOC16 |]": True,
+            "neighbor_table[| R | 0x0400 |]": True,
+        }
+
+
+class TestSnapshotStore:
+    """Test delta computation against stored snapshots."""
+
+    def test_first_call_returns_token(self):
+        """Without a base snapshot the caller gets a token and no delta."""
+        store = SnapshotStore()
+        response = store.delta(ROUTER, "leases", leases("aa"), "")
+        assert response["delta"] is False
+        assert response["snapshot"]
+
+    def test_additions_removals_modifications(self):
+        """Changes since the snapshot are reported by category."""
+        store = SnapshotStore()
+        token = store.delta(ROUTER, "leases", leases("aa", "bb"), "")["snapshot"]
+
+        state = leases("aa", "cc")
+        state["leases"][0]["hostname"] = "renamed"
+        response = store.delta(ROUTER, "leases", state, token)
+
+        assert response["delta"] is True and response["changed"] is True
+        assert "leases[mac=cc].ip" in response["added"]
+        assert "leases[mac=bb].ip" in response["removed"]
+        assert response["modified"]["leases[mac=aa].hostname"] == {
+            "old": "host0",
+            "new": "renamed",
+        }
+        assert response["snapshot"] != token
+
+    def test_unchanged_state_reuses_token(self):
+        """Polling a stable network keeps the same token and returns no changes."""
+        store = SnapshotStore()
+        token = store.delta(ROUTER, "leases", leases("aa"), "")["snapshot"]
+        response = store.delta(ROUTER, "leases", leases("aa"), token)
+
+        assert response["changed"] is False
+        assert response["snapshot"] == token
+
+    def test_tokens_bounded_and_scoped(self):
+        """Old tokens are evicted and tokens are only valid for their tool and router."""
+        store = SnapshotStore(max_per_router=2)
+        first = store.delta(ROUTER, "leases", leases("aa"), "")["snapshot"]
+        store.delta(ROUTER, "leases", leases("bb"), "")
+        store.delta(ROUTER, "leases", leases("cc"), "")
+
+        assert store.delta(ROUTER, "leases", leases("aa"), first)["delta"] is False
+
+        token = store.delta(ROUTER, "leases", leases("aa"), "")["snapshot"]
+        assert store.delta(ROUTER, "wifi", {}, token)["delta"] is False
+        assert store.delta("root@10.0.0.1:22", "leases", leases("aa"), token)["delta"] is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,42 @@
+"""Tests for fast startup: lazy imports and the background router connection."""
+
+import json
+import os
+import subprocess
+import sys
+
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.ssh_client import ssh_client
+
+
+def test_import_defers_asyncssh():
+    """Importing the server leaves asyncssh to the first connect."""
+    script = "import sys, openwrt_ssh_mcp.server; print('asyncssh' in sys.modules)"
+    env = {**os.environ, "LOG_FILE": os.devnull}
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "False"
+
+
+async def test_tool_call_waits_for_background_connect(emulator, monkeypatch):
+    """A call made while the startup connection is being opened waits for it."""
+    monkeypatch.setattr(settings, "openwrt_host", emulator.host)
+    monkeypatch.setattr(settings, "openwrt_port", emulator.port)
+    monkeypatch.setattr(settings, "openwrt_password", "emulator")
+    monkeypatch.setattr(settings, "openwrt_key_file", None)
+    monkeypatch.setattr(settings, "enable_audit_logging", False)
+    emulator.config.handshake_latency = 0.2
+
+    connecting = ssh_client.connect_in_background()
+    try:
+        tools = await server.list_tools()
+        assert tools and not ssh_client.is_connected
+
+        response = await server.call_tool("openwrt_list_dhcp_leases", {})
+        assert json.loads(response[0].text)["success"]
+        assert emulator.connections == 1
+        await connecting
+    finally:
+        await ssh_client.disconnect()
@@ -0,0 +1,33 @@
+"""Tests for stopping remote commands that time out."""
+
+import asyncio
+import time
+
+from openwrt_ssh_mcp.security import audit_logger
+from openwrt_ssh_mcp.ssh_client import ssh_client
+
+COMMAND = "cat /proc/uptime"
+
+
+async def test_timed_out_command_is_terminated(connected_router, monkeypatch):
+    """A timeout stops the command on the router and audit-logs the kill."""
+    kills = []
+    monkeypatch.setattr(audit_logger, "log_process_kill",
+                        lambda command, signal, reason: kills.append((command, signal)))
+    connected_router.config.command_latency[COMMAND] = 30
+
+    start = time.perf_counter()
+    result = await ssh_client.execute(COMMAND, timeout=0.1)
+    assert not result["success"]
+    assert time.perf_counter() - start < 0.5
+
+    for _ in range(100):
+        if kills:
+            break
+        await asyncio.sleep(0.01)
+    assert connected_router.terminated[COMMAND] == 1
+    assert kills == [(COMMAND, "TERM")]
+
+    # The connection stays usable
+    del connected_router.config.command_latency[COMMAND]
+    assert (await ssh_client.execute(COMMAND))["success"]
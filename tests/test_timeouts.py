@@ -0,0 +1,89 @@
+"""Tests for per-command timeouts learned from observed latency."""
+
+import pytest
+
+from openwrt_ssh_mcp.config import settings
+from openwrt_ssh_mcp.ssh_client import ssh_client
+from openwrt_ssh_mcp.timeouts import TimeoutPolicy, timeout_policy
+
+
+def policy(**options) -> TimeoutPolicy:
+    """A policy learning after 5 runs, with a 3x factor within [1, 60] s."""
+    defaults = dict(enabled=True, factor=3.0, floor=1.0, ceiling=60.0, min_samples=5,
+                    overrides={"opkg update": 300.0, "opkg up": 10.0})
+    return TimeoutPolicy(**{**defaults, **options})
+
+
+class TestTimeoutPolicy:
+    """Test how timeouts are derived."""
+
+    def test_default_until_enough_samples(self):
+        """SSH_TIMEOUT applies until min_samples runs have been seen."""
+        learner = policy()
+        for _ in range(4):
+            learner.observe("cat /proc/uptime", 0.5)
+        assert learner.timeout_for("cat /proc/uptime") == settings.ssh_timeout
+
+        learner.observe("cat /proc/uptime", 0.5)
+        assert learner.timeout_for("cat /proc/uptime") == pytest.approx(1.5)
+
+    def test_clamped_and_shared_by_template(self):
+        """Learned timeouts stay within bounds and apply to the whole template."""
+        learner = policy()
+        for i in range(5):
+            learner.observe(f"ip route get 10.0.0.{i + 1}", 0.001)
+            learner.observe("opkg list", 100.0)
+        assert learner.timeout_for("ip route get 192.168.1.1") == 1.0
+        assert learner.timeout_for("opkg list") == 60.0
+
+    def test_overrides_win(self):
+        """The longest matching override applies, whatever was learned."""
+        learner = policy()
+        for _ in range(5):
+            learner.observe("opkg update", 0.1)
+        assert learner.timeout_for("opkg update") == 300.0
+        assert learner.timeout_for("opkg upgrade luci") == 10.0
+
+    def test_variable_duration_commands_are_not_learned(self):
+        """Counts and durations change the run time: such commands keep SSH_TIMEOUT."""
+        learner = policy()
+        for command in ("ping -c 3 10.0.0.1", "sleep 1", "logread -f", "traceroute 10.0.0.1"):
+            for _ in range(5):
+                learner.observe(command, 0.01)
+            assert learner.timeout_for(command) == settings.ssh_timeout
+        assert learner.timeout_for("ping -c 100 10.0.0.1") == settings.ssh_timeout
+        assert learner.snapshot()["learned"] == {}
+
+    def test_timeouts_raise_the_next_timeout(self):
+        """A template that keeps timing out gets more time, up to the ceiling."""
+        learner = policy()
+        for _ in range(20):
+            learner.observe("opkg list", learner.timeout_for("opkg list"))
+        assert learner.timeout_for("opkg list") == 60.0
+
+    def test_disabled(self):
+        """Without learning only overrides and SSH_TIMEOUT apply."""
+        learner = policy(enabled=False)
+        for _ in range(5):
+            learner.observe("uptime", 0.01)
+        assert learner.timeout_for("uptime") == settings.ssh_timeout
+        assert learner.timeout_for("opkg update") == 300.0
+
+
+async def test_execute_uses_learned_timeout(connected_router, monkeypatch):
+    """A command that suddenly hangs fails after its learned timeout."""
+    monkeypatch.setattr(timeout_policy, "enabled", True)
+    monkeypatch.setattr(timeout_policy, "floor", 0.1)
+    monkeypatch.setattr(timeout_policy, "min_samples", 5)
+    monkeypatch.setattr(settings, "ssh_timeout", 30)
+    timeout_policy.reset()
+
+    for _ in range(5):
+        assert (await ssh_client.execute("cat /proc/loadavg"))["success"]
+    assert timeout_policy.timeout_for("cat /proc/loadavg") == pytest.approx(0.1)
+
+    connected_router.config.command_latency["cat /proc/loadavg"] = 1.0
+    result = await ssh_client.execute("cat /proc/loadavg")
+    assert not result["success"]
+    assert "timed out after 0.1" in result["stderr"]
+    timeout_policy.reset()
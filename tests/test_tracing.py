@@ -0,0 +1,72 @@
+"""Tests for span tracing and the include_timing option."""
+
+import json
+
+from openwrt_ssh_mcp import server
+from openwrt_ssh_mcp.tracing import Tracer, tracer
+
+
+async def call(name: str, arguments: dict) -> dict:
+    """Call a tool like an MCP client and decode the response."""
+    contents = await server.call_tool(name, arguments)
+    return json.loads(contents[0].text)
+
+
+class TestTracing:
+    """Test span nesting, timing breakdowns and trace export."""
+
+    def test_spans_are_noops_without_a_trace(self):
+        """Nothing is recorded unless tracing is enabled or forced."""
+        local = Tracer(path="")
+        with local.span("outer") as span:
+            assert span is None
+
+        with local.span("outer", force=True) as root:
+            with local.span("inner") as inner:
+                pass
+        assert inner.parent_id == root.span_id
+        assert inner.trace_id == root.trace_id
+        assert root.children == [inner]
+
+    async def test_include_timing(self, connected_router):
+        """include_timing adds a per-phase breakdown to the response."""
+        result = await call("openwrt_get_system_info", {"include_timing": True})
+        timing = result["timing"]
+        assert set(timing["phases"]) == {
+            "validate", "connect", "queue_wait", "channel_open", "remote", "shape", "parse"
+        }
+        assert [c["command"] for c in timing["commands"]][:2] == [
+            "ubus call system board", "ubus call system info"
+        ]
+        assert sum(timing["phases"].values()) <= timing["total_ms"]
+
+        plain = await call("openwrt_get_system_info", {})
+        assert "timing" not in plain
+
+    async def test_validator_span(self, connected_router):
+        """Security validation shows up as its own phase."""
+        result = await call("openwrt_execute_command",
+                            {"command": "cat /proc/uptime", "include_timing": True})
+        assert result["timing"]["phases"]["validate"] > 0
+
+    async def test_export_chrome_trace(self, connected_router, tmp_path, monkeypatch):
+        """With a trace file configured, every call is appended as trace events."""
+        path = tmp_path / "trace.json"
+        monkeypatch.setattr(tracer, "path", str(path))
+
+        await call("openwrt_list_dhcp_leases", {})
+        await call("openwrt_get_wifi_status", {})
+
+        # The closing bracket is optional in the format; add it to parse the file
+        events = json.loads(path.read_text().rstrip().rstrip(",") + "]")
+        assert {event["ph"] for event in events} == {"X"}
+
+        roots = [event for event in events if event["args"]["parent_id"] is None]
+        assert [root["name"] for root in roots] == [
+            "tool openwrt_list_dhcp_leases", "tool openwrt_get_wifi_status"
+        ]
+        by_id = {event["args"]["span_id"]: event for event in events}
+        remote = next(event for event in events if event["name"] == "ssh.remote")
+        parent = by_id[remote["args"]["parent_id"]]
+        assert parent["name"] == "ssh.execute"
+        assert parent["tid"] == remote["tid"]